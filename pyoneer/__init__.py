@@ -2,18 +2,7 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
-from pyoneer import activations
-from pyoneer import debugging
-from pyoneer import distributions
-from pyoneer import initializers
-from pyoneer import regularizers
-from pyoneer import layers
-from pyoneer import manip
-from pyoneer import math
-from pyoneer import metrics
-from pyoneer import moments
-from pyoneer import rl
-from pyoneer import schedules
+from pyoneer import _lazy_imports
 
 __all__ = [
     "activations",
@@ -29,3 +18,5 @@ __all__ = [
     "rl",
     "schedules",
 ]
+
+__getattr__, __dir__ = _lazy_imports.attach(__name__, globals(), __all__)
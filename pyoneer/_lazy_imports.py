@@ -0,0 +1,67 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import importlib
+import os
+import sys
+
+
+def _lazy_imports_enabled():
+    # module level `__getattr__` requires PEP 562 (Python 3.7)
+    if sys.version_info < (3, 7):
+        return False
+    return os.environ.get("PYONEER_LAZY_IMPORTS", "1") != "0"
+
+
+def attach(package_name, package_globals, submodules, attributes=None):
+    """
+    Attach submodules to a package which are imported on first access,
+    and attributes of those submodules which import them on first access.
+
+    Falls back to importing all submodules eagerly on Python versions
+    without PEP 562 or when the `PYONEER_LAZY_IMPORTS` environment
+    variable is set to "0".
+
+    Example:
+
+    ```
+    __all__ = ["losses", "targets"]
+    __getattr__, __dir__ = _lazy_imports.attach(__name__, globals(), __all__)
+    ```
+
+    Args:
+        package_name: Name of the package, i.e. its `__name__`.
+        package_globals: The `globals()` of the package.
+        submodules: Names of the submodules to attach.
+        attributes: Optional dictionary which maps the names of attributes
+            to the names of the submodules defining them.
+
+    Returns:
+        Tuple of the module level `__getattr__` and `__dir__` functions.
+    """
+    submodules = frozenset(submodules)
+    attributes = dict(attributes or {})
+
+    def __getattr__(name):
+        if name in submodules:
+            module = importlib.import_module(package_name + "." + name)
+            package_globals[name] = module
+            return module
+        if name in attributes:
+            module = importlib.import_module(package_name + "." + attributes[name])
+            value = getattr(module, name)
+            package_globals[name] = value
+            return value
+        raise AttributeError(
+            "module '{}' has no attribute '{}'".format(package_name, name)
+        )
+
+    def __dir__():
+        return sorted(submodules.union(attributes, package_globals))
+
+    if not _lazy_imports_enabled():
+        for name in sorted(submodules.union(attributes)):
+            __getattr__(name)
+
+    return __getattr__, __dir__
@@ -4,6 +4,8 @@ from __future__ import print_function
 
 import tensorflow as tf
 
+from pyoneer.debugging import numerics_ops
+
 
 def swish(x):
     """
@@ -16,5 +18,5 @@ def swish(x):
         Tensor of same dimension as `x`.
     """
     y = x * tf.sigmoid(x)
-    y = tf.debugging.check_numerics(y, "swish")
+    y = numerics_ops.check_numerics(y, "swish")
     return y
@@ -3,5 +3,17 @@ from __future__ import division
 from __future__ import print_function
 
 from pyoneer.debugging.debugging_impl import Stopwatch
+from pyoneer.debugging.numerics_ops import (
+    check_numerics,
+    check_numerics_mode,
+    get_check_numerics,
+    set_check_numerics,
+)
 
-__all__ = ["Stopwatch"]
+__all__ = [
+    "Stopwatch",
+    "check_numerics",
+    "check_numerics_mode",
+    "get_check_numerics",
+    "set_check_numerics",
+]
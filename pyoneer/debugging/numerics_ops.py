@@ -0,0 +1,159 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import os
+import contextlib
+import collections
+
+import tensorflow as tf
+
+_MODES = ("on", "off", "sampled")
+
+
+def _parse_mode(value):
+    # "on", "off", or a number of calls between checks
+    value = value.strip().lower()
+    if value in ("on", "off"):
+        return value, 1
+    try:
+        return "sampled", int(value)
+    except ValueError:
+        raise ValueError('Unknown mode "{}".'.format(value))
+
+
+class _Config(object):
+    def __init__(self):
+        self.mode = "on"
+        self.every_n = 1
+
+        # calls and runtime counters of each call site for "sampled" mode
+        self.calls = collections.defaultdict(int)
+        self.counters = {}
+
+
+_config = _Config()
+
+
+def set_check_numerics(mode, every_n=1):
+    """
+    Set how `pynr.debugging.check_numerics` checks tensors across pyoneer.
+
+    The default mode is "on", or the value of the `PYONEER_CHECK_NUMERICS`
+    environment variable ("on", "off" or a number of calls for
+    "sampled").
+
+    Under `tf.function` the mode is read when the function is traced, so
+    functions must be retraced for a new mode to take effect. With "off"
+    the checks are removed from the traced graph entirely.
+
+    Args:
+        mode: One of "on" to check every tensor, "off" to skip the checks
+            or "sampled" to check only every `every_n` calls. Calls are
+            counted separately for each `message`.
+        every_n: Number of calls between checks in "sampled" mode.
+    """
+    if mode not in _MODES:
+        raise ValueError(
+            'Unknown mode "{}", expected one of {}.'.format(mode, ", ".join(_MODES))
+        )
+    if every_n < 1:
+        raise ValueError("`every_n` must be at least 1.")
+
+    _config.mode = mode
+    _config.every_n = every_n
+
+
+def _set_check_numerics_from_environment():
+    value = os.environ.get("PYONEER_CHECK_NUMERICS")
+    if value is None:
+        return
+
+    try:
+        set_check_numerics(*_parse_mode(value))
+    except ValueError as error:
+        raise ValueError(
+            'Invalid PYONEER_CHECK_NUMERICS="{}", expected "on", "off" or a '
+            "positive number of calls between checks: {}".format(value, error)
+        )
+
+
+_set_check_numerics_from_environment()
+
+
+def get_check_numerics():
+    """
+    Returns:
+        Tuple of the current mode and `every_n`.
+    """
+    return _config.mode, _config.every_n
+
+
+@contextlib.contextmanager
+def check_numerics_mode(mode, every_n=1):
+    """
+    Context manager which sets the numerics checking mode and restores the
+    previous one on exit. See `set_check_numerics`.
+
+    Example:
+
+    ```
+    with pynr.debugging.check_numerics_mode("off"):
+        train_step = tf.function(train_step)
+        train_step()
+    ```
+    """
+    previous = get_check_numerics()
+    set_check_numerics(mode, every_n)
+    try:
+        yield
+    finally:
+        set_check_numerics(*previous)
+
+
+def _sampled_counter(message):
+    if message not in _config.counters:
+        # create the counter outside of any function being traced
+        with tf.init_scope():
+            _config.counters[message] = tf.Variable(
+                0, dtype=tf.int64, trainable=False, name="check_numerics_calls"
+            )
+    return _config.counters[message]
+
+
+def check_numerics(tensor, message):
+    """
+    Drop-in replacement for `tf.debugging.check_numerics` which follows
+    the mode set by `set_check_numerics`.
+
+    Args:
+        tensor: Tensor to check.
+        message: Message prefix of the error.
+
+    Returns:
+        The tensor, checked or not.
+    """
+    mode = _config.mode
+
+    if mode == "off":
+        return tensor
+
+    if mode == "on" or _config.every_n == 1:
+        return tf.debugging.check_numerics(tensor, message)
+
+    # calls are counted per call site, keyed by the message, so every site
+    # is sampled regardless of how many sites run per step
+    if tf.executing_eagerly():
+        _config.calls[message] += 1
+        if _config.calls[message] % _config.every_n == 0:
+            return tf.debugging.check_numerics(tensor, message)
+        return tensor
+
+    # count calls at runtime so a traced function is sampled as it runs
+    counter = _sampled_counter(message)
+    calls = counter.assign_add(1)
+    return tf.cond(
+        tf.equal(calls % _config.every_n, 0),
+        lambda: tf.debugging.check_numerics(tensor, message),
+        lambda: tf.identity(tensor),
+    )
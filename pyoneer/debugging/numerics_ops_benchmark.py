@@ -0,0 +1,76 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import time
+
+import tensorflow as tf
+
+from pyoneer.activations import activations_impl
+from pyoneer.debugging import numerics_ops
+from pyoneer.layers import layers_impl
+from pyoneer.math import math_ops
+from pyoneer.rl.losses import policy_gradient_ops
+from pyoneer.rl.targets import target_ops
+
+
+class NumericsOpsBenchmark(tf.test.Benchmark):
+    def _benchmark(self, name, fn, inputs, iters=500):
+        for mode in ["on", "sampled", "off"]:
+            with numerics_ops.check_numerics_mode(mode, every_n=10):
+                traced_fn = tf.function(fn)
+
+                # trace outside of the timed loop
+                traced_fn(*inputs)
+
+                start_time = time.time()
+                for _ in range(iters):
+                    traced_fn(*inputs)
+                wall_time = (time.time() - start_time) / iters
+
+            self.report_benchmark(
+                iters=iters, wall_time=wall_time, name="{}_{}".format(name, mode)
+            )
+
+    def benchmark_math(self):
+        inputs = tf.random.normal([256, 64])
+        self._benchmark(
+            "normalize",
+            lambda x: math_ops.denormalize(
+                math_ops.normalize(x, loc=0.5, scale=2.0), loc=0.5, scale=2.0
+            ),
+            [inputs],
+        )
+
+    def benchmark_activations(self):
+        inputs = tf.random.normal([256, 64])
+        self._benchmark("swish", activations_impl.swish, [inputs])
+
+    def benchmark_layers(self):
+        inputs = tf.random.uniform([256, 64], maxval=10, dtype=tf.int64)
+        self._benchmark(
+            "one_hot_encoder", layers_impl.OneHotEncoder(depth=10), [inputs]
+        )
+
+    def benchmark_losses(self):
+        log_probs = tf.random.normal([64, 200])
+        advantages = tf.random.normal([64, 200])
+        loss_fn = policy_gradient_ops.ClippedPolicyGradient(epsilon_clipping=0.2)
+        self._benchmark(
+            "clipped_policy_gradient",
+            lambda log_probs, advantages: loss_fn(log_probs, log_probs, advantages),
+            [log_probs, advantages],
+        )
+
+    def benchmark_targets(self):
+        rewards = tf.random.normal([64, 200])
+        values = tf.random.normal([64, 200])
+        self._benchmark(
+            "generalized_advantages",
+            target_ops.GeneralizedAdvantages(method="associative"),
+            [rewards, values],
+        )
+
+
+if __name__ == "__main__":
+    tf.test.main()
@@ -0,0 +1,112 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import os
+
+import numpy as np
+import tensorflow as tf
+
+from pyoneer.debugging import numerics_ops
+from pyoneer.math import math_ops
+
+
+class NumericsOpsTest(tf.test.TestCase):
+    def test_check_numerics(self):
+        inputs = tf.constant([1.0, np.nan])
+
+        with self.assertRaises(tf.errors.InvalidArgumentError):
+            numerics_ops.check_numerics(inputs, "inputs")
+
+        with numerics_ops.check_numerics_mode("off"):
+            self.assertEqual(numerics_ops.get_check_numerics(), ("off", 1))
+            outputs = numerics_ops.check_numerics(inputs, "inputs")
+            self.assertIs(outputs, inputs)
+
+            # applies to the ops of the package
+            math_ops.rescale(inputs, 0.0, 1.0, 0.0, 2.0)
+
+        self.assertEqual(numerics_ops.get_check_numerics(), ("on", 1))
+
+        with self.assertRaises(ValueError):
+            numerics_ops.set_check_numerics("sometimes")
+
+    def test_check_numerics_sampled(self):
+        inputs = tf.constant([1.0, np.nan])
+
+        with numerics_ops.check_numerics_mode("sampled", every_n=3):
+            failures = 0
+            for _ in range(6):
+                try:
+                    numerics_ops.check_numerics(inputs, "inputs")
+                except tf.errors.InvalidArgumentError:
+                    failures += 1
+            self.assertEqual(failures, 2)
+
+    def test_check_numerics_sampled_sites(self):
+        inputs = tf.constant([1.0, np.nan])
+        outputs = tf.constant([1.0, 2.0])
+
+        def fn(inputs, outputs):
+            # the invalid site runs first, every other call
+            numerics_ops.check_numerics(inputs, "inputs")
+            return numerics_ops.check_numerics(outputs, "outputs")
+
+        with numerics_ops.check_numerics_mode("sampled", every_n=2):
+            for call_fn in [fn, tf.function(fn)]:
+                failures = 0
+                for _ in range(10):
+                    try:
+                        call_fn(inputs, outputs)
+                    except tf.errors.InvalidArgumentError:
+                        failures += 1
+                self.assertEqual(failures, 5)
+
+    def test_check_numerics_environment(self):
+        for value, expected in [
+            ("OFF", ("off", 1)),
+            (" on ", ("on", 1)),
+            ("10", ("sampled", 10)),
+        ]:
+            self.assertEqual(numerics_ops._parse_mode(value), expected)
+
+        with self.assertRaises(ValueError):
+            numerics_ops._parse_mode("false")
+
+        for value in ["0", "false"]:
+            os.environ["PYONEER_CHECK_NUMERICS"] = value
+            try:
+                with self.assertRaisesRegex(ValueError, "PYONEER_CHECK_NUMERICS"):
+                    numerics_ops._set_check_numerics_from_environment()
+            finally:
+                del os.environ["PYONEER_CHECK_NUMERICS"]
+
+        self.assertEqual(numerics_ops.get_check_numerics(), ("on", 1))
+
+    def test_check_numerics_traced(self):
+        inputs = tf.constant([1.0, np.nan])
+
+        def fn(inputs):
+            return numerics_ops.check_numerics(inputs * 2.0, "outputs")
+
+        with numerics_ops.check_numerics_mode("off"):
+            traced_fn = tf.function(fn)
+            graph = traced_fn.get_concrete_function(inputs).graph
+            op_types = [op.type for op in graph.get_operations()]
+            self.assertNotIn("CheckNumerics", op_types)
+            self.assertNotIn("CheckNumericsV2", op_types)
+            traced_fn(inputs)
+
+        with numerics_ops.check_numerics_mode("sampled", every_n=2):
+            traced_fn = tf.function(fn)
+            failures = 0
+            for _ in range(4):
+                try:
+                    traced_fn(inputs)
+                except tf.errors.InvalidArgumentError:
+                    failures += 1
+            self.assertEqual(failures, 2)
+
+
+if __name__ == "__main__":
+    tf.test.main()
@@ -2,34 +2,112 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import numpy as np
 import tensorflow as tf
 
 
+def _logits(distribution):
+    if hasattr(distribution, "logits_parameter"):
+        return distribution.logits_parameter()
+    return distribution.logits
+
+
 class MultiCategorical(object):
     """
-    Distribution composed of multiple distributions.
+    Distribution composed of multiple categorical distributions.
 
     Useful for representing `gym.spaces.MultiDiscrete`.
 
+    The heads are stored as a single tensor of padded logits with shape
+    `[..., heads, max_categories]` and a mask of the valid categories, so
+    `log_prob`, `entropy`, `sample` and `mode` are a handful of batched
+    ops regardless of the number of heads.
+
+    Example:
+
+    ```
+    # two heads with 3 and 2 categories
+    dist = MultiCategorical(
+        logits=[[0.1, 0.2, 0.3], [0.3, 0.2, 0.0]],
+        mask=[[True, True, True], [True, True, False]])
+    ```
+
     Args:
-        distributions: list of distributions.
+        distributions: list of categorical distributions, one per head.
+        logits: padded logits with shape `[..., heads, max_categories]`,
+            used instead of `distributions`.
+        mask: optional boolean mask of the valid categories, broadcastable
+            to the shape of `logits`. All categories are valid by default.
     """
 
-    def __init__(self, distributions):
+    def __init__(self, distributions=None, logits=None, mask=None):
+        if (distributions is None) == (logits is None):
+            raise ValueError("Exactly one of `distributions` or `logits` is required.")
+
+        if distributions is not None:
+            head_logits = [
+                tf.convert_to_tensor(_logits(dist)) for dist in distributions
+            ]
+            num_categories = [
+                tf.compat.dimension_value(head.shape[-1]) for head in head_logits
+            ]
+            max_categories = max(num_categories)
+
+            logits = tf.stack(
+                [
+                    tf.pad(
+                        head,
+                        [[0, 0]] * (head.shape.rank - 1)
+                        + [[0, max_categories - categories]],
+                    )
+                    for head, categories in zip(head_logits, num_categories)
+                ],
+                axis=-2,
+            )
+            if min(num_categories) < max_categories:
+                mask = tf.sequence_mask(num_categories, max_categories)
+
         self.distributions = distributions
+        self.logits = tf.convert_to_tensor(logits)
+        self.mask = None if mask is None else tf.convert_to_tensor(mask, tf.bool)
+
+        if self.mask is None:
+            self._masked_logits = self.logits
+        else:
+            self._masked_logits = tf.where(
+                self.mask, self.logits, self.logits.dtype.min
+            )
+
+    def _log_probs(self):
+        return tf.nn.log_softmax(self._masked_logits, axis=-1)
 
     def log_prob(self, value):
-        values = tf.split(value, len(self.distributions), axis=-1)
-        log_probs = [
-            dist.log_prob(val[..., 0]) for dist, val in zip(self.distributions, values)
-        ]
-        return tf.math.add_n(log_probs)
+        value = tf.convert_to_tensor(value)
+        log_probs = tf.gather(
+            self._log_probs(),
+            value[..., None],
+            axis=-1,
+            batch_dims=self.logits.shape.rank - 1,
+        )
+        return tf.reduce_sum(log_probs[..., 0], axis=-1)
 
     def entropy(self):
-        return tf.math.add_n([dist.entropy() for dist in self.distributions])
+        log_probs = self._log_probs()
+        if self.mask is not None:
+            # masked categories have zero probability, drop their log-probability
+            log_probs = tf.where(self.mask, log_probs, tf.zeros_like(log_probs))
+        return -tf.reduce_sum(tf.exp(log_probs) * log_probs, axis=[-2, -1])
 
     def sample(self):
-        return tf.stack([dist.sample() for dist in self.distributions], axis=-1)
+        # Gumbel-max trick samples all heads with a single argmax
+        uniform = tf.random.uniform(
+            tf.shape(self.logits),
+            minval=np.finfo(self.logits.dtype.as_numpy_dtype).tiny,
+            maxval=1.0,
+            dtype=self.logits.dtype,
+        )
+        gumbel = -tf.math.log(-tf.math.log(uniform))
+        return tf.argmax(self._masked_logits + gumbel, axis=-1, output_type=tf.int32)
 
     def mode(self):
-        return tf.stack([dist.mode() for dist in self.distributions], axis=-1)
+        return tf.argmax(self._masked_logits, axis=-1, output_type=tf.int32)
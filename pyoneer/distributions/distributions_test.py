@@ -39,6 +39,63 @@ class DistributionsTest(tf.test.TestCase):
         expected = tf.constant([[2, 0]], dtype=tf.int32)
         self.assertAllClose(output, expected)
 
+    def test_multicategorical_heads(self):
+        # heads with different numbers of categories against the per-head
+        # distributions
+        logits = [
+            tf.random.normal([4, 5]),
+            tf.random.normal([4, 2]),
+            tf.random.normal([4, 3]),
+        ]
+        dists = [tfp.distributions.Categorical(logits=head) for head in logits]
+        distribution = MultiCategorical(dists)
+
+        self.assertAllEqual(distribution.logits.shape, [4, 3, 5])
+        self.assertAllEqual(distribution.mask.shape, [3, 5])
+
+        value = tf.stack([dist.sample() for dist in dists], axis=-1)
+        expected = tf.math.add_n(
+            [dist.log_prob(value[:, i]) for i, dist in enumerate(dists)]
+        )
+        self.assertAllClose(distribution.log_prob(value), expected)
+
+        expected = tf.math.add_n([dist.entropy() for dist in dists])
+        self.assertAllClose(distribution.entropy(), expected)
+
+        expected = tf.stack([dist.mode() for dist in dists], axis=-1)
+        self.assertAllEqual(distribution.mode(), expected)
+
+        samples = tf.stack([distribution.sample() for _ in range(100)], axis=0)
+        self.assertEqual(samples.dtype, tf.int32)
+        self.assertAllEqual(samples.shape, [100, 4, 3])
+        self.assertAllInRange(samples[..., 0], 0, 4)
+        self.assertAllInRange(samples[..., 1], 0, 1)
+        self.assertAllInRange(samples[..., 2], 0, 2)
+
+    def test_multicategorical_logits(self):
+        logits = tf.Variable([[0.1, 0.2, 0.3], [0.3, 0.2, 0.0]])
+        mask = [[True, True, True], [True, True, False]]
+
+        with tf.GradientTape() as tape:
+            distribution = MultiCategorical(logits=logits, mask=mask)
+            loss = -distribution.entropy() - distribution.log_prob([2, 0])
+
+        expected = MultiCategorical(
+            [
+                tfp.distributions.Categorical(logits=[0.1, 0.2, 0.3]),
+                tfp.distributions.Categorical(logits=[0.3, 0.2]),
+            ]
+        )
+        self.assertAllClose(distribution.log_prob([2, 0]), expected.log_prob([2, 0]))
+        self.assertAllClose(distribution.entropy(), expected.entropy())
+
+        gradients = tape.gradient(loss, logits)
+        self.assertAllEqual(tf.math.is_finite(gradients), tf.ones([2, 3], tf.bool))
+        self.assertEqual(gradients[1, 2], 0.0)
+
+        with self.assertRaises(ValueError):
+            MultiCategorical()
+
 
 if __name__ == "__main__":
     tf.test.main()
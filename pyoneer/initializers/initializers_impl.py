@@ -2,8 +2,8 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import numpy as np
 import tensorflow as tf
-import tensorflow_probability as tfp
 
 
 class SoftplusInverse(tf.keras.initializers.Initializer):
@@ -19,9 +19,10 @@ class SoftplusInverse(tf.keras.initializers.Initializer):
         self.scale = scale
 
     def __call__(self, shape, dtype=tf.float32):
-        return tf.constant(
-            tfp.math.softplus_inverse(self.scale), dtype=dtype, shape=shape
-        )
+        # stable log(exp(scale) - 1) without importing tensorflow_probability
+        scale = np.asarray(self.scale, dtype=np.float64)
+        value = scale + np.log(-np.expm1(-scale))
+        return tf.constant(value, dtype=dtype, shape=shape)
 
     def get_config(self):
         return {"scale": self.scale, "dtype": self.dtype.name}
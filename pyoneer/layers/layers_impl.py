@@ -6,6 +6,7 @@ import numpy as np
 import tensorflow as tf
 
 from pyoneer.activations import activations_impl
+from pyoneer.debugging import numerics_ops
 from pyoneer.math import angle_ops, math_ops
 from pyoneer.regularizers import regularizers_impl
 
@@ -53,7 +54,7 @@ class OneHotEncoder(tf.keras.layers.Layer):
         """
         inputs = tf.cast(inputs, tf.int64)
         outputs = tf.one_hot(inputs, self.depth)
-        outputs = tf.debugging.check_numerics(outputs, "outputs")
+        outputs = numerics_ops.check_numerics(outputs, "outputs")
         return outputs
 
     def get_config(self):
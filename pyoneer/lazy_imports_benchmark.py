@@ -0,0 +1,43 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import os
+import subprocess
+import sys
+import time
+
+import tensorflow as tf
+
+
+class LazyImportsBenchmark(tf.test.Benchmark):
+    def _benchmark(self, name, statement, iters=5):
+        for mode, lazy in [("lazy", "1"), ("eager", "0")]:
+            env = dict(os.environ, PYONEER_LAZY_IMPORTS=lazy)
+
+            # each import runs in a fresh interpreter, as in a worker
+            start_time = time.time()
+            for _ in range(iters):
+                subprocess.check_call(
+                    [sys.executable, "-c", statement],
+                    env=env,
+                    stderr=subprocess.DEVNULL,
+                )
+            wall_time = (time.time() - start_time) / iters
+
+            self.report_benchmark(
+                iters=iters, wall_time=wall_time, name="{}_{}".format(name, mode)
+            )
+
+    def benchmark_import_tensorflow(self):
+        self._benchmark("import_tensorflow", "import tensorflow")
+
+    def benchmark_import_pyoneer(self):
+        self._benchmark("import_pyoneer", "import pyoneer")
+
+    def benchmark_import_math(self):
+        self._benchmark("import_math", "import pyoneer.math")
+
+
+if __name__ == "__main__":
+    tf.test.main()
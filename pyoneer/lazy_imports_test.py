@@ -0,0 +1,85 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import json
+import os
+import subprocess
+import sys
+
+import tensorflow as tf
+
+# modules which `import pyoneer` should not load until they are used
+HEAVY_MODULES = [
+    "gym",
+    "tensorflow",
+    "tensorflow_probability",
+    "pyoneer.metrics",
+    "pyoneer.rl",
+    "pyoneer.rl.wrappers",
+]
+
+
+def loaded_modules(statement, lazy=True):
+    """
+    Run `statement` in a fresh interpreter and return which of the
+    `HEAVY_MODULES` it loaded.
+    """
+    code = (
+        "import json, sys\n"
+        "{}\n"
+        "print(json.dumps([m for m in {!r} if m in sys.modules]))"
+    ).format(statement, HEAVY_MODULES)
+    env = dict(os.environ, PYONEER_LAZY_IMPORTS="1" if lazy else "0")
+    output = subprocess.check_output(
+        [sys.executable, "-c", code], env=env, stderr=subprocess.DEVNULL
+    )
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+class LazyImportsTest(tf.test.TestCase):
+    def test_import_is_lazy(self):
+        self.assertEqual(loaded_modules("import pyoneer"), [])
+        self.assertEqual(loaded_modules("import pyoneer.math"), ["tensorflow"])
+        self.assertEqual(loaded_modules("import pyoneer.rl.targets"), ["pyoneer.rl"])
+
+    def test_numpy_targets(self):
+        # actor processes compute targets with NumPy only
+        self.assertEqual(
+            loaded_modules("import pyoneer.rl.targets.numpy_ops"), ["pyoneer.rl"]
+        )
+        self.assertIn(
+            "tensorflow",
+            loaded_modules(
+                "import pyoneer.rl.targets; pyoneer.rl.targets.GeneralizedAdvantages"
+            ),
+        )
+
+    def test_attribute_access(self):
+        self.assertEqual(
+            loaded_modules("import pyoneer; pyoneer.rl.wrappers.Batch"),
+            ["gym", "pyoneer.rl", "pyoneer.rl.wrappers"],
+        )
+
+        import pyoneer
+
+        self.assertIn("rl", dir(pyoneer))
+        self.assertIs(pyoneer.rl.targets, sys.modules["pyoneer.rl.targets"])
+        with self.assertRaises(AttributeError):
+            pyoneer.missing
+
+    def test_eager_fallback(self):
+        self.assertEqual(
+            loaded_modules("import pyoneer", lazy=False),
+            [
+                "gym",
+                "tensorflow",
+                "pyoneer.metrics",
+                "pyoneer.rl",
+                "pyoneer.rl.wrappers",
+            ],
+        )
+
+
+if __name__ == "__main__":
+    tf.test.main()
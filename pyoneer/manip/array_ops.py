@@ -51,17 +51,33 @@ def pad_or_truncate(tensor, sizes, mode="CONSTANT", constant_values=0.0):
     """
     tensor = tf.convert_to_tensor(tensor)
 
-    paddings = [
-        [0, max(sizes[axis] - tensor.shape[axis], 0)]
-        for axis in range(tensor.shape.ndims)
-    ]
-
-    slices = [slice(0, sizes[axis]) for axis in range(tensor.shape.ndims)]
-
-    tensor = tf.pad(
-        tensor=tensor, paddings=paddings, mode=mode, constant_values=constant_values
-    )
-    tensor = tensor[slices]
+    static_shape = tensor.shape.as_list()
+    dynamic_shape = tf.shape(tensor)
+
+    slices = []
+    paddings = []
+    truncate = False
+    pad = False
+
+    # truncate before padding and skip either when static shapes allow it
+    for axis, size in enumerate(sizes):
+        dim = static_shape[axis]
+        slices.append(slice(0, size))
+        if dim is None:
+            paddings.append([0, tf.maximum(size - dynamic_shape[axis], 0)])
+            truncate = pad = True
+        else:
+            paddings.append([0, max(size - dim, 0)])
+            truncate = truncate or dim > size
+            pad = pad or dim < size
+
+    if truncate:
+        tensor = tensor[tuple(slices)]
+
+    if pad:
+        tensor = tf.pad(
+            tensor=tensor, paddings=paddings, mode=mode, constant_values=constant_values
+        )
 
     return tensor
 
@@ -89,49 +105,77 @@ def shift(inputs, shift, axis, padding_values=0.0):
             previous_actions = pynr.manip.shift(actions, shift=1, axis=1)
             previous_rewards = pynr.manip.shift(rewards, shift=1, axis=1)
 
+    Integer shifts slice the inputs and fill the vacated positions with a
+    single pad, or a single broadcast for tensor `padding_values`, and skip
+    the work entirely when the static shape allows it. Tensor shifts roll
+    the inputs and mask the positions which wrapped around.
+
     Args:
         inputs: A `Tensor` to shift.
-        shift:  A `Tensor`. Must be one of the following types: int32, int64.
-            Dimension must be 0-D or 1-D. shift[i] specifies the number of
-            places by which elements are shifted positively (towards larger
-            indices) along the dimension specified by axis[i]. Negative shifts
-            will roll the elements in the opposite direction.
-        axis: A `Tensor`. Must be one of the following types: int32, int64.
-            Dimension must be 0-D or 1-D. axis[i] specifies the dimension that
-            the shift shift[i] should occur. If the same axis is referenced
-            more than once, the total shift for that axis will be the sum of
-            all the shifts that belong to that axis.
-        padding_values: A tensor to use for padding.
+        shift: An integer or a scalar int32/int64 `Tensor`. Positive shifts
+            move the elements towards larger indices along `axis`, negative
+            shifts towards smaller indices.
+        axis: An integer specifying the dimension to shift along.
+        padding_values: A tensor to use for padding, broadcastable to the
+            shape of the vacated positions, or to the shape of `inputs` for
+            tensor shifts.
 
     Returns:
         A shifted Tensor.
     """
     inputs = tf.convert_to_tensor(inputs)
+    padding_values = tf.convert_to_tensor(padding_values, dtype_hint=inputs.dtype)
+    padding_values = tf.cast(padding_values, inputs.dtype)
+
+    rank = inputs.shape.rank
+    axis = axis % rank
+
+    if tf.is_tensor(shift):
+        return _shift_dynamic(inputs, shift, axis, padding_values)
 
-    # slice inputs
-    slices = [slice(None)] * inputs.shape.ndims
+    if shift == 0:
+        return inputs
 
-    if shift >= 0:
+    size = tf.compat.dimension_value(inputs.shape[axis])
+    if size is not None and abs(shift) >= size:
+        return tf.broadcast_to(padding_values, tf.shape(inputs))
+
+    slices = [slice(None)] * rank
+    if shift > 0:
         slices[axis] = slice(0, -shift)
     else:
         slices[axis] = slice(-shift, None)
+    sliced = inputs[tuple(slices)]
 
-    sliced = inputs[slices]
-
-    # pad inputs
-    paddings = [[0, 0]] * inputs.shape.ndims
-    paddings[axis] = [max(shift, 0), max(-shift, 0)]
-    padding_slices = [slice(None)] * inputs.shape.ndims
+    # scalar padding values are filled by a single pad
+    if padding_values.shape.rank == 0:
+        paddings = [[0, 0]] * rank
+        paddings[axis] = [max(shift, 0), max(-shift, 0)]
+        return tf.pad(sliced, paddings, constant_values=padding_values)
 
-    if shift >= 0:
-        padding_slices[axis] = slice(-shift, None)
-        padded = tf.concat(
-            [padding_values * tf.ones_like(inputs[padding_slices]), sliced], axis=axis
-        )
-    else:
-        padding_slices[axis] = slice(0, -shift)
-        padded = tf.concat(
-            [sliced, tf.ones_like(inputs[padding_slices]) * padding_values], axis=axis
-        )
+    padding_shape = tf.tensor_scatter_nd_update(
+        tf.shape(inputs), [[axis]], [abs(shift)]
+    )
+    padding = tf.broadcast_to(padding_values, padding_shape)
+
+    if shift > 0:
+        return tf.concat([padding, sliced], axis=axis)
+    return tf.concat([sliced, padding], axis=axis)
+
+
+def _shift_dynamic(inputs, shift, axis, padding_values):
+    # roll and mask the positions which wrapped around
+    shift = tf.cast(shift, tf.int32)
+    rolled = tf.roll(inputs, shift=shift, axis=axis)
+
+    size = tf.shape(inputs)[axis]
+    positions = tf.range(size) - shift
+    mask = tf.logical_and(positions >= 0, positions < size)
+    mask = tf.reshape(
+        mask,
+        tf.tensor_scatter_nd_update(
+            tf.ones([inputs.shape.rank], tf.int32), [[axis]], [size]
+        ),
+    )
 
-    return padded
+    return tf.where(mask, rolled, padding_values)
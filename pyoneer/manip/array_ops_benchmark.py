@@ -0,0 +1,106 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import time
+
+import tensorflow as tf
+
+from pyoneer.manip import array_ops
+
+
+def shift_concat(inputs, shift, axis, padding_values=0.0):
+    """
+    Previous `shift` which multiplies `ones_like` by the padding values and
+    concatenates. Used as the baseline.
+    """
+    slices = [slice(None)] * inputs.shape.ndims
+    padding_slices = [slice(None)] * inputs.shape.ndims
+    if shift >= 0:
+        slices[axis] = slice(0, -shift)
+        padding_slices[axis] = slice(-shift, None)
+        return tf.concat(
+            [
+                padding_values * tf.ones_like(inputs[tuple(padding_slices)]),
+                inputs[tuple(slices)],
+            ],
+            axis=axis,
+        )
+    slices[axis] = slice(-shift, None)
+    padding_slices[axis] = slice(0, -shift)
+    return tf.concat(
+        [
+            inputs[tuple(slices)],
+            tf.ones_like(inputs[tuple(padding_slices)]) * padding_values,
+        ],
+        axis=axis,
+    )
+
+
+def pad_or_truncate_pad_slice(tensor, sizes, constant_values=0.0):
+    """
+    Previous `pad_or_truncate` which always pads and then slices. Used as
+    the baseline.
+    """
+    paddings = [
+        [0, max(sizes[axis] - tensor.shape[axis], 0)]
+        for axis in range(tensor.shape.ndims)
+    ]
+    slices = tuple(slice(0, sizes[axis]) for axis in range(tensor.shape.ndims))
+    tensor = tf.pad(tensor=tensor, paddings=paddings, constant_values=constant_values)
+    return tensor[slices]
+
+
+class ArrayOpsBenchmark(tf.test.Benchmark):
+    def _benchmark(self, name, fn, inputs, iters=100):
+        fn = tf.function(fn)
+
+        # trace outside of the timed loop
+        fn(*inputs)
+
+        start_time = time.time()
+        for _ in range(iters):
+            fn(*inputs)
+        wall_time = (time.time() - start_time) / iters
+
+        self.report_benchmark(iters=iters, wall_time=wall_time, name=name)
+
+    def benchmark_shift(self):
+        inputs = tf.random.normal([64, 1024, 64])
+        bootstrap_values = tf.random.normal([64, 1, 64])
+
+        for name, shift_fn in [("shift", array_ops.shift), ("concat", shift_concat)]:
+            self._benchmark(
+                "shift_scalar_{}".format(name),
+                lambda x: shift_fn(x, shift=-1, axis=1),
+                [inputs],
+            )
+            self._benchmark(
+                "shift_bootstrap_{}".format(name),
+                lambda x, y: shift_fn(x, shift=-1, axis=1, padding_values=y),
+                [inputs, bootstrap_values],
+            )
+
+        self._benchmark(
+            "shift_tensor_shift",
+            lambda x, s: array_ops.shift(x, shift=s, axis=1),
+            [inputs, tf.constant(-1)],
+        )
+
+    def benchmark_pad_or_truncate(self):
+        inputs = tf.random.normal([64, 1024, 64])
+
+        for name, pad_fn in [
+            ("pad_or_truncate", array_ops.pad_or_truncate),
+            ("pad_slice", pad_or_truncate_pad_slice),
+        ]:
+            for sizes in [[64, 1024, 64], [64, 512, 64], [64, 1536, 64]]:
+                self._benchmark(
+                    "{}_{}".format(name, sizes[1]),
+                    lambda x: pad_fn(x, sizes=sizes),
+                    [inputs],
+                )
+
+
+if __name__ == "__main__":
+    tf.test.main()
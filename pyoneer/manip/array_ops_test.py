@@ -43,6 +43,48 @@ class ArrayOpsTest(tf.test.TestCase):
         )
         self.assertAllEqual(outputs, expected)
 
+    def test_pad_or_truncate_axes(self):
+        inputs = tf.reshape(tf.range(12.0), [3, 4])
+
+        # pad the first axis and truncate the second
+        outputs = array_ops.pad_or_truncate(inputs, sizes=[4, 2], constant_values=-1.0)
+        expected = tf.constant([[0.0, 1.0], [4.0, 5.0], [8.0, 9.0], [-1.0, -1.0]])
+        self.assertAllEqual(outputs, expected)
+
+        # no-op on matching static shapes
+        outputs = array_ops.pad_or_truncate(inputs, sizes=[3, 4])
+        self.assertIs(outputs, inputs)
+
+        @tf.function(input_signature=[tf.TensorSpec([None, None], tf.float32)])
+        def pad_or_truncate_fn(inputs):
+            return array_ops.pad_or_truncate(inputs, sizes=[4, 2], constant_values=-1.0)
+
+        self.assertAllEqual(pad_or_truncate_fn(inputs), expected)
+
+    def test_shift_dynamic(self):
+        inputs = tf.random.normal([2, 5, 3])
+        padding_values = tf.random.normal([2, 1, 3])
+
+        @tf.function(
+            input_signature=[
+                tf.TensorSpec([None, None, 3], tf.float32),
+                tf.TensorSpec([], tf.int32),
+            ]
+        )
+        def shift_fn(inputs, shift):
+            return array_ops.shift(
+                inputs, shift=shift, axis=-2, padding_values=padding_values
+            )
+
+        for shift in [-6, -2, -1, 0, 1, 3, 5]:
+            expected = array_ops.shift(
+                inputs, shift=shift, axis=1, padding_values=padding_values
+            )
+            self.assertAllEqual(expected.shape, [2, 5, 3])
+            self.assertAllEqual(shift_fn(inputs, tf.constant(shift)), expected)
+
+        self.assertIs(array_ops.shift(inputs, shift=0, axis=1), inputs)
+
     def test_shift(self):
         # shift forwards
         inputs = tf.constant([[0.0, 1.0, 2.0]])
@@ -5,21 +5,51 @@ from __future__ import print_function
 import tensorflow as tf
 
 
-def batched_index(values, indices):
+def batched_index(values, indices, mode="gather"):
     """
-    Performs indexing on batches and sequence-batches by reducing over
-    zero-masked values.
+    Performs indexing on batches and sequence-batches.
 
-    Equivalent to `values[:, indices]`.
+    Equivalent to `values[:, indices]`. Indices outside of
+    `[0, num_values)` select zero.
+
+    With `mode="gather"` the values are gathered with `tf.gather` over the
+    leading batch dimensions, which does not depend on `num_values`. With
+    `mode="one_hot"` the values are reduced over a zero-mask, which keeps
+    the gradient dense instead of `tf.IndexedSlices` and can be faster
+    for small `num_values` on accelerators.
 
     Args:
-        values: tensor of shape `[B, num_values]` or `[T, B, num_values]`
-        indices: tensor of shape `[B]` or `[T, B]` containing indices.
+        values: tensor of shape `[B, num_values]`, `[T, B, num_values]` or
+            `[..., num_values]`.
+        indices: tensor of shape `[B]`, `[T, B]` or `[...]` containing
+            indices.
+        mode: Either "gather" or "one_hot" (default: "gather").
     Returns:
-        Tensor of shape `[B]` or `[T, B]` containing values for the given
-        indices.
+        Tensor of shape `[B]`, `[T, B]` or `[...]` containing values for the
+        given indices.
     """
     values = tf.convert_to_tensor(values)
     indices = tf.convert_to_tensor(indices)
-    mask = tf.one_hot(indices, values.shape[-1], dtype=values.dtype)
-    return tf.reduce_sum(values * mask, axis=-1)
+
+    if mode == "one_hot":
+        mask = tf.one_hot(indices, tf.shape(values)[-1], dtype=values.dtype)
+        return tf.reduce_sum(values * mask, axis=-1)
+
+    if mode != "gather":
+        raise ValueError(
+            'Unknown mode "{}", expected "gather" or "one_hot".'.format(mode)
+        )
+
+    batch_dims = indices.shape.rank
+    if values.shape.rank != batch_dims + 1:
+        # match the broadcasting of the one-hot reduction
+        values = tf.broadcast_to(
+            values, tf.concat([tf.shape(indices), tf.shape(values)[-1:]], axis=0)
+        )
+
+    num_values = tf.shape(values, out_type=indices.dtype)[-1]
+    valid = tf.logical_and(indices >= 0, indices < num_values)
+    safe_indices = tf.where(valid, indices, tf.zeros_like(indices))
+
+    outputs = tf.gather(values, safe_indices, axis=-1, batch_dims=batch_dims)
+    return tf.where(valid, outputs, tf.zeros_like(outputs))
@@ -0,0 +1,47 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import time
+
+import tensorflow as tf
+
+from pyoneer.manip import indexing_ops
+
+
+class IndexingOpsBenchmark(tf.test.Benchmark):
+    def _benchmark(self, name, shape, num_values, iters=200):
+        values = tf.random.normal(shape + [num_values])
+        indices = tf.random.uniform(shape, maxval=num_values, dtype=tf.int32)
+
+        for mode in ["gather", "one_hot"]:
+            fn = tf.function(
+                lambda values, indices: indexing_ops.batched_index(
+                    values, indices, mode=mode
+                )
+            )
+
+            # trace outside of the timed loop
+            fn(values, indices)
+
+            start_time = time.time()
+            for _ in range(iters):
+                fn(values, indices)
+            wall_time = (time.time() - start_time) / iters
+
+            self.report_benchmark(
+                iters=iters, wall_time=wall_time, name="{}_{}".format(name, mode)
+            )
+
+    def benchmark_batched_index_small(self):
+        self._benchmark("batch_4", [1024], 4)
+
+    def benchmark_batched_index_large(self):
+        self._benchmark("batch_4096", [1024], 4096)
+
+    def benchmark_batched_index_sequences(self):
+        self._benchmark("sequences_256", [128, 64], 256)
+
+
+if __name__ == "__main__":
+    tf.test.main()
@@ -15,6 +15,46 @@ class IndexingOpsTest(tf.test.TestCase):
         expected = tf.constant([0, 1, 2])
         self.assertAllEqual(output, expected)
 
+    def test_batched_index_sequences(self):
+        values = tf.random.normal([5, 4, 3])
+        indices = tf.random.uniform([5, 4], maxval=3, dtype=tf.int32)
+        output = indexing_ops.batched_index(values, indices)
+        expected = tf.reduce_sum(values * tf.one_hot(indices, 3), axis=-1)
+        self.assertAllEqual(output.shape, [5, 4])
+        self.assertAllClose(output, expected)
+
+        # arbitrary leading dimensions
+        values = tf.random.normal([2, 5, 4, 3])
+        indices = tf.random.uniform([2, 5, 4], maxval=3, dtype=tf.int64)
+        output = indexing_ops.batched_index(values, indices)
+        expected = indexing_ops.batched_index(values, indices, mode="one_hot")
+        self.assertAllClose(output, expected)
+
+    def test_batched_index_out_of_range(self):
+        values = tf.constant([[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]])
+        indices = tf.constant([-1, 3])
+        for mode in ["gather", "one_hot"]:
+            output = indexing_ops.batched_index(values, indices, mode=mode)
+            self.assertAllEqual(output, [0.0, 0.0])
+
+        with self.assertRaises(ValueError):
+            indexing_ops.batched_index(values, indices, mode="dense")
+
+    def test_batched_index_gradients(self):
+        values = tf.random.normal([4, 6])
+        indices = tf.constant([0, 5, 2, 2])
+
+        gradients = []
+        for mode in ["gather", "one_hot"]:
+            with tf.GradientTape() as tape:
+                tape.watch(values)
+                output = indexing_ops.batched_index(values, indices, mode=mode)
+                loss = tf.reduce_sum(tf.square(output))
+            gradients.append(tf.convert_to_tensor(tape.gradient(loss, values)))
+
+        self.assertAllClose(gradients[0], gradients[1])
+        self.assertAllClose(gradients[0], 2 * values * tf.one_hot(indices, 6))
+
 
 if __name__ == "__main__":
     tf.test.main()
@@ -4,6 +4,7 @@ from __future__ import print_function
 
 import tensorflow as tf
 
+from pyoneer.debugging import numerics_ops
 from pyoneer.math import logical_ops
 
 
@@ -12,7 +13,7 @@ def safe_divide(x, y, rtol=1e-5, atol=1e-8):
     Safely divide x by y while avoiding dividing by zero.
     """
     y = tf.where(logical_ops.isclose(y, 0.0, rtol=rtol, atol=atol), tf.ones_like(y), y)
-    return tf.debugging.check_numerics(x / y, "safe_divide")
+    return numerics_ops.check_numerics(x / y, "safe_divide")
 
 
 def rescale(x, oldmin, oldmax, newmin, newmax):
@@ -26,7 +27,7 @@ def rescale(x, oldmin, oldmax, newmin, newmax):
     newmax = tf.convert_to_tensor(newmax)
     x = (x - oldmin) / (oldmax - oldmin)
     x = (x * (newmax - newmin)) + newmin
-    x = tf.debugging.check_numerics(x, "rescale")
+    x = numerics_ops.check_numerics(x, "rescale")
     return x
 
 
@@ -48,7 +49,7 @@ def normalize(x, loc, scale, sample_weight=1.0):
     scale = tf.convert_to_tensor(scale)
     sample_weight = tf.convert_to_tensor(sample_weight)
     outputs = safe_divide((x - loc), scale) * sample_weight
-    outputs = tf.debugging.check_numerics(outputs, "normalize")
+    outputs = numerics_ops.check_numerics(outputs, "normalize")
     return outputs
 
 
@@ -70,7 +71,7 @@ def denormalize(x, loc, scale, sample_weight=1.0):
     scale = tf.convert_to_tensor(scale)
     sample_weight = tf.convert_to_tensor(sample_weight)
     outputs = ((x * scale) + loc) * sample_weight
-    outputs = tf.debugging.check_numerics(outputs, "denormalize")
+    outputs = numerics_ops.check_numerics(outputs, "denormalize")
     return outputs
 
 
@@ -2,9 +2,8 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
-from pyoneer.rl import losses
-from pyoneer.rl import strategies
-from pyoneer.rl import targets
-from pyoneer.rl import wrappers
+from pyoneer import _lazy_imports
 
-__all__ = ["losses", "strategies", "targets", "wrappers"]
+__all__ = ["losses", "rollouts", "strategies", "targets", "wrappers"]
+
+__getattr__, __dir__ = _lazy_imports.attach(__name__, globals(), __all__)
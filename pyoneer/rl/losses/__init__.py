@@ -7,5 +7,12 @@ from pyoneer.rl.losses.policy_gradient_ops import (
     ClippedPolicyGradient,
     PolicyEntropy,
 )
+from pyoneer.rl.losses.ppo_ops import PPODiagnostics, PPOLoss
 
-__all__ = ["PolicyGradient", "ClippedPolicyGradient", "PolicyEntropy"]
+__all__ = [
+    "PolicyGradient",
+    "ClippedPolicyGradient",
+    "PolicyEntropy",
+    "PPOLoss",
+    "PPODiagnostics",
+]
@@ -6,6 +6,8 @@ import tensorflow as tf
 
 from tensorflow.python.keras.utils import losses_utils
 
+from pyoneer.debugging import numerics_ops
+
 
 def policy_gradient(log_probs, advantages):
     """
@@ -20,7 +22,7 @@ def policy_gradient(log_probs, advantages):
     """
     advantages = tf.stop_gradient(advantages)
     losses = -log_probs * advantages
-    losses = tf.debugging.check_numerics(losses, "loss")
+    losses = numerics_ops.check_numerics(losses, "loss")
     return losses
 
 
@@ -55,7 +57,7 @@ def clipped_policy_gradient(
     surrogate_min = tf.minimum(surrogate1, surrogate2)
 
     losses = -surrogate_min
-    losses = tf.debugging.check_numerics(losses, "losses")
+    losses = numerics_ops.check_numerics(losses, "losses")
     return losses
 
 
@@ -70,7 +72,7 @@ def policy_entropy(entropy):
         Tensor of losses.
     """
     losses = -entropy
-    losses = tf.debugging.check_numerics(losses, "losses")
+    losses = numerics_ops.check_numerics(losses, "losses")
     return losses
 
 
@@ -0,0 +1,223 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import collections
+
+import tensorflow as tf
+
+from pyoneer.debugging import numerics_ops
+
+
+class PPODiagnostics(
+    collections.namedtuple(
+        "PPODiagnostics",
+        [
+            "policy_loss",
+            "value_loss",
+            "entropy_loss",
+            "clip_fraction",
+            "approx_kl",
+            "explained_variance",
+        ],
+    )
+):
+    """
+    Diagnostics of a `PPOLoss` step.
+
+    Attributes:
+        policy_loss: Reduced clipped surrogate loss.
+        value_loss: Reduced squared error of the values.
+        entropy_loss: Reduced negative entropy.
+        clip_fraction: Weighted fraction of ratios outside of the clipping
+            range.
+        approx_kl: Weighted approximation of the KL divergence between the
+            anchor and the current policy.
+        explained_variance: Fraction of the variance of the returns which
+            is explained by the values.
+    """
+
+
+def _weighted_mean(inputs, sample_weight, weight_sum):
+    return tf.reduce_sum(inputs * sample_weight) / weight_sum
+
+
+def ppo_loss(
+    log_probs,
+    log_probs_anchor,
+    advantages,
+    values,
+    returns,
+    entropy,
+    sample_weight=None,
+    epsilon_clipping=0.2,
+    value_coef=0.5,
+    entropy_coef=0.0,
+    reduction=tf.keras.losses.Reduction.SUM_OVER_BATCH_SIZE,
+):
+    """
+    Computes the combined Proximal Policy Optimization objective: the
+    clipped surrogate, the squared error of the values and the entropy
+    bonus, in one pass which shares the probability ratios and the
+    reduction.
+
+    Args:
+        log_probs: Log probabilities of taking actions under a policy.
+        log_probs_anchor: Log probabilities of taking actions under an anchor
+            policy which is updated less frequently.
+        advantages: Advantage estimation.
+        values: Value predictions.
+        returns: Value targets.
+        entropy: Entropy of the policy distribution.
+        sample_weight: Optional tensor for weighting the losses.
+        epsilon_clipping: Scalar for clipping the policy ratio.
+        value_coef: Weight of the value loss.
+        entropy_coef: Weight of the entropy loss.
+        reduction: a tf.keras.losses.Reduction method.
+
+    Returns:
+        Tuple of the total loss and `PPODiagnostics`.
+    """
+    log_probs = tf.convert_to_tensor(log_probs)
+    log_probs_anchor = tf.stop_gradient(log_probs_anchor)
+    advantages = tf.stop_gradient(advantages)
+    returns = tf.stop_gradient(returns)
+
+    if sample_weight is None:
+        sample_weight = 1.0
+    sample_weight = tf.broadcast_to(
+        tf.cast(sample_weight, log_probs.dtype), tf.shape(log_probs)
+    )
+
+    log_ratio = log_probs - log_probs_anchor
+    ratio = tf.exp(log_ratio)
+    ratio_clipped = tf.clip_by_value(ratio, 1 - epsilon_clipping, 1 + epsilon_clipping)
+
+    policy_losses = -tf.minimum(ratio * advantages, ratio_clipped * advantages)
+    value_losses = tf.square(values - returns)
+    entropy_losses = -entropy
+
+    if reduction == tf.keras.losses.Reduction.NONE:
+        policy_loss = policy_losses * sample_weight
+        value_loss = value_losses * sample_weight
+        entropy_loss = entropy_losses * sample_weight
+    else:
+        policy_loss = tf.reduce_sum(policy_losses * sample_weight)
+        value_loss = tf.reduce_sum(value_losses * sample_weight)
+        entropy_loss = tf.reduce_sum(entropy_losses * sample_weight)
+
+        if reduction != tf.keras.losses.Reduction.SUM:
+            num_elements = tf.cast(tf.size(log_probs), log_probs.dtype)
+            policy_loss = policy_loss / num_elements
+            value_loss = value_loss / num_elements
+            entropy_loss = entropy_loss / num_elements
+
+    loss = policy_loss + value_coef * value_loss + entropy_coef * entropy_loss
+    loss = numerics_ops.check_numerics(loss, "loss")
+
+    with tf.name_scope("diagnostics"):
+        # single pass sums over the already computed terms
+        weight_sum = tf.maximum(tf.reduce_sum(sample_weight), 1e-8)
+
+        clipped = tf.cast(tf.not_equal(ratio, ratio_clipped), ratio.dtype)
+        clip_fraction = _weighted_mean(clipped, sample_weight, weight_sum)
+
+        # low variance estimator of KL(anchor || policy)
+        approx_kl = 0.5 * _weighted_mean(
+            tf.square(log_ratio), sample_weight, weight_sum
+        )
+
+        values = tf.stop_gradient(values)
+        errors_variance = _weighted_mean(
+            value_losses, sample_weight, weight_sum
+        ) - tf.square(_weighted_mean(returns - values, sample_weight, weight_sum))
+        returns_variance = _weighted_mean(
+            tf.square(returns), sample_weight, weight_sum
+        ) - tf.square(_weighted_mean(returns, sample_weight, weight_sum))
+        explained_variance = 1 - errors_variance / tf.maximum(returns_variance, 1e-8)
+
+    diagnostics = PPODiagnostics(
+        policy_loss=tf.stop_gradient(policy_loss),
+        value_loss=tf.stop_gradient(value_loss),
+        entropy_loss=tf.stop_gradient(entropy_loss),
+        clip_fraction=clip_fraction,
+        approx_kl=approx_kl,
+        explained_variance=explained_variance,
+    )
+    return loss, diagnostics
+
+
+class PPOLoss(tf.keras.losses.Loss):
+    """
+    Computes the combined Proximal Policy Optimization objective with the
+    clipped surrogate of `ClippedPolicyGradient`, a squared error value
+    loss and the entropy loss of `PolicyEntropy`, and returns the
+    diagnostics of the step.
+
+    Example:
+
+    ```
+    loss_fn = PPOLoss(epsilon_clipping=0.2, value_coef=0.5, entropy_coef=0.01)
+    loss, diagnostics = loss_fn(
+        log_probs, log_probs_anchor, advantages, values, returns, entropy,
+        sample_weight=sample_weight)
+    ```
+
+    Attributes:
+        epsilon_clipping: epsilon parameter of the clipped surrogate objective.
+        value_coef: weight of the value loss.
+        entropy_coef: weight of the entropy loss.
+        reduction: a tf.keras.losses.Reduction method.
+        name: name of the loss.
+    """
+
+    def __init__(
+        self,
+        epsilon_clipping=0.2,
+        value_coef=0.5,
+        entropy_coef=0.0,
+        reduction=tf.keras.losses.Reduction.SUM_OVER_BATCH_SIZE,
+        name=None,
+    ):
+        self.epsilon_clipping = epsilon_clipping
+        self.value_coef = value_coef
+        self.entropy_coef = entropy_coef
+        self.reduction = reduction
+        self.name = name
+
+    def __call__(
+        self,
+        log_probs,
+        log_probs_anchor,
+        advantages,
+        values,
+        returns,
+        entropy,
+        sample_weight=None,
+    ):
+        return ppo_loss(
+            log_probs,
+            log_probs_anchor,
+            advantages,
+            values,
+            returns,
+            entropy,
+            sample_weight=sample_weight,
+            epsilon_clipping=self.epsilon_clipping,
+            value_coef=self.value_coef,
+            entropy_coef=self.entropy_coef,
+            reduction=self.reduction,
+        )
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(**config)
+
+    def get_config(self):
+        return {
+            "epsilon_clipping": self.epsilon_clipping,
+            "value_coef": self.value_coef,
+            "entropy_coef": self.entropy_coef,
+            "reduction": self.reduction,
+            "name": self.name,
+        }
@@ -0,0 +1,93 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import time
+
+import tensorflow as tf
+
+from tensorflow.python.keras.utils import losses_utils
+
+from pyoneer.rl.losses.policy_gradient_ops import ClippedPolicyGradient, PolicyEntropy
+from pyoneer.rl.losses.ppo_ops import PPOLoss
+
+
+class PPOLossBenchmark(tf.test.Benchmark):
+    def _benchmark(self, name, fn, iters=500):
+        fn = tf.function(fn)
+
+        # trace outside of the timed loop
+        fn()
+
+        start_time = time.time()
+        for _ in range(iters):
+            fn()
+        wall_time = (time.time() - start_time) / iters
+
+        self.report_benchmark(iters=iters, wall_time=wall_time, name=name)
+
+    def benchmark_ppo_loss(self):
+        shape = [256, 256]
+        log_probs = tf.random.normal(shape)
+        log_probs_anchor = log_probs + 0.1 * tf.random.normal(shape)
+        advantages = tf.random.normal(shape)
+        values = tf.random.normal(shape)
+        returns = tf.random.normal(shape)
+        entropy = tf.random.normal(shape)
+        sample_weight = tf.ones(shape)
+
+        policy_loss_fn = ClippedPolicyGradient()
+        entropy_loss_fn = PolicyEntropy()
+
+        def separate():
+            loss = (
+                policy_loss_fn(
+                    log_probs,
+                    log_probs_anchor,
+                    advantages,
+                    sample_weight=sample_weight,
+                )
+                + 0.5
+                * losses_utils.compute_weighted_loss(
+                    tf.square(values - returns), sample_weight=sample_weight
+                )
+                + 0.01 * entropy_loss_fn(entropy, sample_weight=sample_weight)
+            )
+
+            # diagnostics as usually computed by hand
+            ratio = tf.exp(log_probs - log_probs_anchor)
+            weight_sum = tf.reduce_sum(sample_weight)
+            clipped = tf.cast(tf.abs(ratio - 1) > 0.2, tf.float32)
+            clip_fraction = tf.reduce_sum(clipped * sample_weight) / weight_sum
+            approx_kl = (
+                tf.reduce_sum(
+                    0.5 * tf.square(log_probs - log_probs_anchor) * sample_weight
+                )
+                / weight_sum
+            )
+            _, errors_variance = tf.nn.weighted_moments(
+                returns - values, [0, 1], sample_weight
+            )
+            _, returns_variance = tf.nn.weighted_moments(returns, [0, 1], sample_weight)
+            explained_variance = 1 - errors_variance / returns_variance
+            return loss, clip_fraction, approx_kl, explained_variance
+
+        loss_fn = PPOLoss(entropy_coef=0.01)
+
+        def fused():
+            return loss_fn(
+                log_probs,
+                log_probs_anchor,
+                advantages,
+                values,
+                returns,
+                entropy,
+                sample_weight=sample_weight,
+            )
+
+        self._benchmark("ppo_loss_separate", separate)
+        self._benchmark("ppo_loss_fused", fused)
+
+
+if __name__ == "__main__":
+    tf.test.main()
@@ -0,0 +1,89 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import numpy as np
+import tensorflow as tf
+
+from tensorflow.python.keras.utils import losses_utils
+
+from pyoneer.rl.losses.policy_gradient_ops import (
+    ClippedPolicyGradient,
+    PolicyEntropy,
+)
+from pyoneer.rl.losses.ppo_ops import PPOLoss
+
+
+class PPOLossTest(tf.test.TestCase):
+    def test_ppo_loss(self):
+        random = np.random.RandomState(0)
+        shape = (4, 6)
+        log_probs = tf.Variable(random.uniform(-2.0, 0.0, size=shape), dtype=tf.float32)
+        log_probs_anchor = tf.constant(
+            random.uniform(-2.0, 0.0, size=shape), dtype=tf.float32
+        )
+        advantages = tf.constant(random.normal(size=shape), dtype=tf.float32)
+        values = tf.Variable(random.normal(size=shape), dtype=tf.float32)
+        returns = tf.constant(random.normal(size=shape), dtype=tf.float32)
+        entropy = tf.Variable(random.uniform(0.0, 1.0, size=shape), dtype=tf.float32)
+        sample_weight = np.ones(shape, dtype=np.float32)
+        sample_weight[0, 3:] = 0.0
+
+        loss_fn = PPOLoss(epsilon_clipping=0.2, value_coef=0.5, entropy_coef=0.01)
+
+        with tf.GradientTape(persistent=True) as tape:
+            loss, diagnostics = loss_fn(
+                log_probs,
+                log_probs_anchor,
+                advantages,
+                values,
+                returns,
+                entropy,
+                sample_weight=sample_weight,
+            )
+
+            policy_loss = ClippedPolicyGradient()(
+                log_probs, log_probs_anchor, advantages, sample_weight=sample_weight
+            )
+            value_loss = losses_utils.compute_weighted_loss(
+                tf.square(values - returns), sample_weight=sample_weight
+            )
+            entropy_loss = PolicyEntropy()(entropy, sample_weight=sample_weight)
+            expected_loss = policy_loss + 0.5 * value_loss + 0.01 * entropy_loss
+
+        self.assertAllClose(diagnostics.policy_loss, policy_loss)
+        self.assertAllClose(diagnostics.value_loss, value_loss)
+        self.assertAllClose(diagnostics.entropy_loss, entropy_loss)
+        self.assertAllClose(loss, expected_loss)
+
+        variables = [log_probs, values, entropy]
+        self.assertAllClose(
+            tape.gradient(loss, variables), tape.gradient(expected_loss, variables)
+        )
+
+        # diagnostics
+        mask = sample_weight > 0
+        log_ratio = (log_probs - log_probs_anchor).numpy()[mask]
+        ratio = np.exp(log_ratio)
+        self.assertAllClose(diagnostics.clip_fraction, np.mean(np.abs(ratio - 1) > 0.2))
+        self.assertAllClose(diagnostics.approx_kl, np.mean(0.5 * log_ratio**2))
+        errors = (returns - values).numpy()[mask]
+        self.assertAllClose(
+            diagnostics.explained_variance,
+            1 - np.var(errors) / np.var(returns.numpy()[mask]),
+        )
+
+    def test_ppo_loss_reduction(self):
+        log_probs = tf.math.log(tf.constant([[0.9, 0.8], [0.8, 0.8]]))
+        zeros = tf.zeros_like(log_probs)
+
+        loss_fn = PPOLoss(reduction=tf.keras.losses.Reduction.NONE)
+        loss, _ = loss_fn(log_probs, log_probs, zeros, zeros, zeros, zeros)
+        self.assertAllEqual(loss.shape, [2, 2])
+
+        loss_fn = PPOLoss.from_config(PPOLoss(entropy_coef=0.1).get_config())
+        self.assertEqual(loss_fn.entropy_coef, 0.1)
+
+
+if __name__ == "__main__":
+    tf.test.main()
@@ -0,0 +1,9 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+from pyoneer.rl.rollouts.minibatch_impl import Minibatches
+from pyoneer.rl.rollouts.pipeline_impl import Pipeline
+from pyoneer.rl.rollouts.rollout_impl import Rollout, Transitions
+
+__all__ = ["Minibatches", "Pipeline", "Rollout", "Transitions"]
@@ -0,0 +1,183 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import tensorflow as tf
+
+
+class Minibatches(object):
+    """
+    Iterates over shuffled minibatches of a nested structure of rollout
+    tensors with shape `[batch_size, max_time, ...]` for several epochs,
+    e.g. for Proximal Policy Optimization updates.
+
+    Only a permutation of indices is shuffled each epoch and each
+    minibatch is gathered on its own, so the rollout is never copied as a
+    whole.
+
+    With `mode="steps"` the minibatches are drawn from the flattened
+    `[batch_size * max_time, ...]` steps. With `mode="sequences"` they are
+    drawn from whole `[max_time, ...]` sequences, as needed for recurrent
+    policies.
+
+    Each minibatch comes with its `sample_weight`. When the number of steps
+    or sequences is not divisible by `minibatch_size`, the last minibatch
+    is padded to `minibatch_size` with zero weights so every minibatch has
+    the same shape, unless `drop_remainder=True`.
+
+    Example:
+
+    ```
+    minibatches = Minibatches(
+        {"states": states, "actions": actions, "advantages": advantages},
+        minibatch_size=256, epochs=4, sample_weight=sample_weight)
+    for features, sample_weight in minibatches.dataset():
+        ...
+    ```
+
+    Args:
+        data: Nested structure of tensors with shape
+            `[batch_size, max_time, ...]`.
+        minibatch_size: Number of steps or sequences per minibatch.
+        epochs: Number of passes over the data (default: 1).
+        mode: Either "steps" or "sequences" (default: "steps").
+        sample_weight: Optional `[batch_size, max_time]` sample weights.
+        shuffle: Boolean indicating whether the order is shuffled each
+            epoch (default: True).
+        drop_remainder: Boolean indicating whether the last incomplete
+            minibatch of each epoch is dropped (default: False).
+        seed: Optional random seed of the shuffling.
+    """
+
+    def __init__(
+        self,
+        data,
+        minibatch_size,
+        epochs=1,
+        mode="steps",
+        sample_weight=None,
+        shuffle=True,
+        drop_remainder=False,
+        seed=None,
+    ):
+        if mode not in ("steps", "sequences"):
+            raise ValueError(
+                'Unknown mode "{}", expected "steps" or "sequences".'.format(mode)
+            )
+
+        data = tf.nest.map_structure(tf.convert_to_tensor, data)
+        first = tf.nest.flatten(data)[0]
+
+        if sample_weight is None:
+            sample_weight = tf.ones(tf.shape(first)[:2], dtype=tf.float32)
+        sample_weight = tf.convert_to_tensor(sample_weight, dtype=tf.float32)
+
+        if mode == "steps":
+            # merging the leading dimensions is a reshape, not a copy
+            data = tf.nest.map_structure(self._flatten_steps, data)
+            sample_weight = tf.reshape(sample_weight, [-1])
+
+        self.data = data
+        self.sample_weight = sample_weight
+        self.minibatch_size = minibatch_size
+        self.epochs = epochs
+        self.mode = mode
+        self.shuffle = shuffle
+        self.drop_remainder = drop_remainder
+        self.seed = seed
+
+        self.size = int(tf.nest.flatten(data)[0].shape[0])
+
+    @staticmethod
+    def _flatten_steps(tensor):
+        return tf.reshape(tensor, tf.concat([[-1], tf.shape(tensor)[2:]], axis=0))
+
+    def __len__(self):
+        """
+        Number of minibatches over all epochs.
+        """
+        if self.drop_remainder:
+            per_epoch = self.size // self.minibatch_size
+        else:
+            per_epoch = -(-self.size // self.minibatch_size)
+        return per_epoch * self.epochs
+
+    def _permutation(self):
+        indices = tf.range(self.size, dtype=tf.int64)
+        if self.shuffle:
+            indices = tf.random.shuffle(indices, seed=self.seed)
+        return indices
+
+    def indices(self):
+        """
+        Iterate over the indices of each minibatch into the first dimension
+        of `data`, after flattening the steps when `mode="steps"`.
+
+        Yields:
+            `[minibatch_size]` tensors of indices. The last minibatch of
+            each epoch may be smaller.
+        """
+        for _ in range(self.epochs):
+            permutation = self._permutation()
+            for start in range(0, self.size, self.minibatch_size):
+                indices = permutation[start : start + self.minibatch_size]
+                if self.drop_remainder and indices.shape[0] < self.minibatch_size:
+                    break
+                yield indices
+
+    def gather(self, indices):
+        """
+        Gather a minibatch, padded to `minibatch_size` with zero weights.
+
+        Args:
+            indices: Indices returned by `indices`.
+
+        Returns:
+            Tuple of the nested minibatch tensors and their `sample_weight`.
+        """
+        indices = tf.convert_to_tensor(indices, dtype=tf.int64)
+
+        sample_weight = tf.gather(self.sample_weight, indices)
+
+        padding = self.minibatch_size - tf.shape(indices, out_type=tf.int64)[0]
+        if not self.drop_remainder:
+            indices = tf.pad(indices, [[0, padding]])
+            sample_weight = tf.pad(
+                sample_weight,
+                tf.concat(
+                    [
+                        [[0, padding]],
+                        tf.zeros([tf.rank(sample_weight) - 1, 2], tf.int64),
+                    ],
+                    axis=0,
+                ),
+            )
+
+        minibatch = tf.nest.map_structure(
+            lambda tensor: tf.gather(tensor, indices), self.data
+        )
+        return minibatch, sample_weight
+
+    def __iter__(self):
+        for indices in self.indices():
+            yield self.gather(indices)
+
+    def dataset(self, prefetch=1):
+        """
+        Create a `tf.data.Dataset` of the minibatches.
+
+        Args:
+            prefetch: Number of minibatches to prefetch (default: 1).
+
+        Returns:
+            Dataset of `(minibatch, sample_weight)` tuples.
+        """
+        dataset = tf.data.Dataset.range(self.epochs)
+        dataset = dataset.flat_map(
+            lambda _: tf.data.Dataset.from_tensor_slices(self._permutation()).batch(
+                self.minibatch_size, drop_remainder=self.drop_remainder
+            )
+        )
+        dataset = dataset.map(self.gather)
+        dataset = dataset.prefetch(prefetch)
+        return dataset
@@ -0,0 +1,90 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import numpy as np
+import tensorflow as tf
+
+from pyoneer.rl.rollouts.minibatch_impl import Minibatches
+
+
+class MinibatchesTest(tf.test.TestCase):
+    def setUp(self):
+        self.states = np.arange(3 * 5 * 2, dtype=np.float32).reshape(3, 5, 2)
+        self.actions = np.arange(3 * 5, dtype=np.int64).reshape(3, 5)
+        self.sample_weight = np.ones((3, 5), dtype=np.float32)
+        self.sample_weight[0, 3:] = 0.0
+
+    def test_minibatches_steps(self):
+        minibatches = Minibatches(
+            {"states": self.states, "actions": self.actions},
+            minibatch_size=4,
+            epochs=2,
+            sample_weight=self.sample_weight,
+            seed=0,
+        )
+        self.assertEqual(len(minibatches), 8)
+
+        for minibatches_iter in [iter(minibatches), iter(minibatches.dataset())]:
+            seen = []
+            for features, sample_weight in minibatches_iter:
+                self.assertAllEqual(features["states"].shape, [4, 2])
+                self.assertAllEqual(features["actions"].shape, [4])
+                self.assertAllEqual(sample_weight.shape, [4])
+
+                # the features of each step stay aligned
+                self.assertAllEqual(features["states"][:, 0], features["actions"] * 2)
+
+                actions = features["actions"].numpy()
+                weights = sample_weight.numpy()
+                self.assertAllEqual(
+                    weights[weights > 0],
+                    self.sample_weight.reshape(-1)[actions[weights > 0]],
+                )
+                seen.extend(actions[weights > 0].tolist())
+                seen.extend(actions[weights == 0].tolist())
+
+            # each step is seen once per epoch, padding aside
+            counts = np.bincount(seen, minlength=15)
+            self.assertTrue(np.all(counts >= 2))
+            self.assertEqual(len(seen), 32)
+
+    def test_minibatches_sequences(self):
+        minibatches = Minibatches(
+            (self.states, self.actions),
+            minibatch_size=2,
+            mode="sequences",
+            sample_weight=self.sample_weight,
+            drop_remainder=True,
+        )
+        self.assertEqual(len(minibatches), 1)
+
+        batches = list(minibatches)
+        self.assertEqual(len(batches), 1)
+
+        (states, actions), sample_weight = batches[0]
+        self.assertAllEqual(states.shape, [2, 5, 2])
+        self.assertAllEqual(actions.shape, [2, 5])
+        self.assertAllEqual(sample_weight.shape, [2, 5])
+
+        rows = actions[:, 0].numpy() // 5
+        self.assertAllEqual(sample_weight, self.sample_weight[rows])
+        self.assertAllEqual(states, self.states[rows])
+
+    def test_minibatches_indices(self):
+        minibatches = Minibatches(self.actions, minibatch_size=6, shuffle=False)
+
+        indices = list(minibatches.indices())
+        self.assertAllEqual(indices[0], [0, 1, 2, 3, 4, 5])
+        self.assertAllEqual(indices[-1], [12, 13, 14])
+
+        actions, sample_weight = minibatches.gather(indices[-1])
+        self.assertAllEqual(actions, [12, 13, 14, 0, 0, 0])
+        self.assertAllEqual(sample_weight, [1, 1, 1, 0, 0, 0])
+
+        with self.assertRaises(ValueError):
+            Minibatches(self.actions, minibatch_size=6, mode="episodes")
+
+
+if __name__ == "__main__":
+    tf.test.main()
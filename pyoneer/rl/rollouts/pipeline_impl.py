@@ -0,0 +1,197 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import sys
+import threading
+
+import numpy as np
+import six
+import tensorflow as tf
+
+from six.moves import queue
+
+
+class Pipeline(object):
+    """
+    Overlaps rollout collection with learning. Each `Rollout` is run in a
+    background actor thread which pushes finished trajectory batches into a
+    bounded queue. The learner consumes them as a prefetching
+    `tf.data.Dataset`.
+
+    Every batch is tagged with the policy version it was collected with.
+    The learner calls `increment_version` after each update so the lag
+    between the collecting and the current policy can be computed with
+    `lag` and used for off-policy corrections.
+
+    The environments of each `Rollout` already run in external processes
+    when the `pynr.rl.wrappers.Batch` is non-blocking, so the actors only
+    need threads to overlap collection with the learner.
+
+    Example:
+
+    ```
+    pipeline = Pipeline([Rollout(env, policy, horizon=200)])
+    for transitions, version in pipeline.dataset().take(100):
+        lag = pipeline.lag(version)
+        ...
+        pipeline.increment_version()
+    pipeline.close()
+    ```
+
+    Args:
+        rollouts: List of `Rollout` collectors, one per actor thread.
+        capacity: Maximum number of finished batches waiting in the queue
+            (default: 2). Actors block when the queue is full, which bounds
+            the policy lag.
+    """
+
+    def __init__(self, rollouts, capacity=2):
+        if not isinstance(rollouts, (list, tuple)):
+            rollouts = [rollouts]
+
+        self.rollouts = list(rollouts)
+        self.capacity = capacity
+
+        self._version = 0
+        self._queue = queue.Queue(maxsize=capacity)
+        self._stop = threading.Event()
+        self._threads = []
+        self._exc_info = None
+
+    @property
+    def version(self):
+        """
+        Current policy version.
+        """
+        return self._version
+
+    def increment_version(self):
+        """
+        Mark the policy as updated. Batches collected from now on are
+        tagged with the new version.
+        """
+        self._version += 1
+        return self._version
+
+    def lag(self, version):
+        """
+        Number of policy updates since a batch was collected.
+
+        Args:
+            version: Version the batch was tagged with.
+
+        Returns:
+            Difference between the current and the collecting version.
+        """
+        return self._version - version
+
+    def start(self):
+        """
+        Start the actor threads. Called by `get` and `dataset` if needed.
+        """
+        if self._threads:
+            return
+
+        self._stop.clear()
+        for rollout in self.rollouts:
+            thread = threading.Thread(target=self._actor, args=(rollout,))
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+
+    def _put(self, item):
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _actor(self, rollout):
+        try:
+            while not self._stop.is_set():
+                version = self._version
+                transitions = rollout.collect()
+
+                # the rollout reuses its buffers so copy before queueing
+                transitions = type(transitions)(
+                    *[np.copy(buffer) for buffer in transitions]
+                )
+
+                if not self._put((transitions, version)):
+                    break
+        except Exception:
+            self._exc_info = sys.exc_info()
+            self._put(None)
+
+    def get(self):
+        """
+        Get the next finished batch.
+
+        Returns:
+            Tuple of the `Transitions` and the policy version they were
+            collected with.
+        """
+        self.start()
+
+        item = self._queue.get()
+
+        if item is None:
+            exc_info, self._exc_info = self._exc_info, None
+            six.reraise(*exc_info)
+
+        return item
+
+    def __iter__(self):
+        while True:
+            yield self.get()
+
+    def dataset(self, prefetch=1):
+        """
+        Create a `tf.data.Dataset` of finished batches.
+
+        Args:
+            prefetch: Number of batches to prefetch (default: 1).
+
+        Returns:
+            Dataset of `(transitions, version)` tuples.
+        """
+        transitions = self.rollouts[0]._buffers[0]
+        output_types = (
+            type(transitions)(*[tf.as_dtype(buffer.dtype) for buffer in transitions]),
+            tf.int64,
+        )
+        output_shapes = (
+            type(transitions)(
+                *[tf.TensorShape(buffer.shape) for buffer in transitions]
+            ),
+            tf.TensorShape([]),
+        )
+
+        dataset = tf.data.Dataset.from_generator(
+            self.__iter__, output_types=output_types, output_shapes=output_shapes
+        )
+        dataset = dataset.prefetch(prefetch)
+        return dataset
+
+    def close(self):
+        """
+        Stop the actor threads and close the rollouts.
+        """
+        self._stop.set()
+
+        # unblock actors waiting on a full queue
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+        for rollout in self.rollouts:
+            rollout.close()
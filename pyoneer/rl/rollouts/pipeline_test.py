@@ -0,0 +1,81 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import time
+
+import numpy as np
+import tensorflow as tf
+
+from pyoneer.rl.rollouts.pipeline_impl import Pipeline
+from pyoneer.rl.rollouts.rollout_impl import Rollout
+from pyoneer.rl.rollouts.rollout_test import CountingEnv, policy
+from pyoneer.rl.strategies.strategies_impl import Mode
+from pyoneer.rl.wrappers.batch_impl import Batch
+
+
+class PipelineTest(tf.test.TestCase):
+    def test_pipeline(self):
+        batch_size = 2
+        horizon = 3
+
+        rollouts = []
+        for seed in [10, 20]:
+            env = Batch(CountingEnv, batch_size=batch_size)
+            env.seed(seed)
+            rollouts.append(Rollout(env, policy, horizon=horizon, strategy=Mode))
+
+        pipeline = Pipeline(rollouts, capacity=1)
+
+        for transitions, version in pipeline.dataset().take(4):
+            self.assertEqual(transitions.states.dtype, tf.float32)
+            self.assertShapeEqual(
+                np.zeros((batch_size, horizon, 1)), transitions.states
+            )
+            self.assertAllEqual(transitions.actions, np.ones((batch_size, horizon)))
+            self.assertGreaterEqual(pipeline.lag(version.numpy()), 0)
+            pipeline.increment_version()
+
+        self.assertEqual(pipeline.version, 4)
+
+        pipeline.close()
+
+    def test_pipeline_lag(self):
+        env = Batch(CountingEnv, batch_size=1)
+        env.seed(0)
+
+        pipeline = Pipeline(Rollout(env, policy, horizon=1), capacity=1)
+
+        _, version = pipeline.get()
+        self.assertEqual(version, 0)
+
+        # wait for the actor to queue the next batch
+        while not pipeline._queue.full():
+            time.sleep(0.01)
+
+        pipeline.increment_version()
+        pipeline.increment_version()
+
+        # the batch queued while learning was collected with the old policy
+        _, version = pipeline.get()
+        self.assertEqual(pipeline.lag(version), 2)
+
+        pipeline.close()
+
+    def test_pipeline_error(self):
+        env = Batch(CountingEnv, batch_size=1)
+        env.seed(0)
+
+        def failing_policy(states):
+            raise ValueError("policy failed")
+
+        pipeline = Pipeline([Rollout(env, failing_policy, horizon=1)])
+
+        with self.assertRaisesRegex(ValueError, "policy failed"):
+            pipeline.get()
+
+        pipeline.close()
+
+
+if __name__ == "__main__":
+    tf.test.main()
@@ -0,0 +1,192 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import sys
+import collections
+import threading
+
+import numpy as np
+import six
+
+from pyoneer.rl.strategies import strategies_impl
+
+
+class Transitions(
+    collections.namedtuple(
+        "Transitions",
+        ["states", "actions", "rewards", "dones", "log_probs", "sample_weight"],
+    )
+):
+    """
+    Batch of trajectories with shape `[batch_size, horizon, ...]`.
+
+    Attributes:
+        states: States the actions were taken in.
+        actions: Actions taken.
+        rewards: Rewards received.
+        dones: Boolean episode boundaries.
+        log_probs: Log probabilities of the actions under the policy.
+        sample_weight: Mask which is zero after the end of an episode.
+    """
+
+
+class Rollout(object):
+    """
+    Collects trajectories from a `pynr.rl.wrappers.Batch` into preallocated
+    `[batch_size, horizon, ...]` NumPy buffers.
+
+    Each call to `collect` resets the environments and steps them for
+    `horizon` steps, or until every environment is done. When the batch
+    uses `auto_reset=True`, the environments are only reset on the first
+    call and each rollout continues where the previous one stopped.
+
+    With `double_buffer=True`, the next rollout is collected in a
+    background thread into a second set of buffers while the previous one
+    is consumed by the learner.
+
+    The buffers are reused: the arrays returned by `collect` are valid
+    until the next call to `collect`.
+
+    Example:
+
+    ```
+    rollout = Rollout(env, policy, horizon=200)
+    transitions = rollout.collect()
+    returns = pyrl.targets.DiscountedReturns()(
+        transitions.rewards, sample_weight=transitions.sample_weight)
+    ```
+
+    Args:
+        env: A `pynr.rl.wrappers.Batch` of environments.
+        policy: Callable which takes the states and returns a
+            `tfp.distributions.Distribution`.
+        horizon: Number of steps per rollout.
+        strategy: Callable which takes the policy and returns a strategy,
+            such as `pynr.rl.strategies.Sample` (default),
+            `pynr.rl.strategies.Mode` or
+            `functools.partial(pynr.rl.strategies.EpsilonGreedy, epsilon=0.1)`.
+        double_buffer: Boolean indicating whether the next rollout is
+            collected in the background (default: False).
+    """
+
+    def __init__(
+        self,
+        env,
+        policy,
+        horizon,
+        strategy=strategies_impl.Sample,
+        double_buffer=False,
+    ):
+        self.env = env
+        self.policy = policy
+        self.horizon = horizon
+        self.double_buffer = double_buffer
+
+        self._strategy = strategy(self._policy)
+        self._distribution = None
+        self._state = None
+
+        num_buffers = 2 if double_buffer else 1
+        self._buffers = [self._create_buffers() for _ in range(num_buffers)]
+        self._index = 0
+        self._thread = None
+        self._exc_info = None
+
+    def _create_buffers(self):
+        shape = (len(self.env), self.horizon)
+        observation_space = self.env.observation_space
+        action_space = self.env.action_space
+        return Transitions(
+            states=np.zeros(
+                shape + observation_space.shape, dtype=observation_space.dtype
+            ),
+            actions=np.zeros(shape + action_space.shape, dtype=action_space.dtype),
+            rewards=np.zeros(shape, dtype=np.float32),
+            dones=np.zeros(shape, dtype=np.bool_),
+            log_probs=np.zeros(shape, dtype=np.float32),
+            sample_weight=np.zeros(shape, dtype=np.float32),
+        )
+
+    def _policy(self, *args, **kwargs):
+        # keep the distribution so the log probabilities of the actions
+        # chosen by the strategy are computed without calling the policy twice
+        self._distribution = self.policy(*args, **kwargs)
+        return self._distribution
+
+    def _collect(self, buffers):
+        if self._state is None or not getattr(self.env, "auto_reset", False):
+            self._state = self.env.reset()
+
+        for t in range(self.horizon):
+            active = ~self.env.done
+
+            if not active.any():
+                # pad the remaining steps as finished episodes
+                for buffer in buffers:
+                    buffer[:, t:] = 0
+                buffers.dones[:, t:] = True
+                break
+
+            actions = np.asarray(self._strategy(self._state))
+            log_probs = np.asarray(self._distribution.log_prob(actions))
+
+            buffers.states[:, t] = self._state
+            buffers.actions[:, t] = actions
+            buffers.log_probs[:, t] = log_probs
+
+            next_state, reward, done, _ = self.env.step(actions)
+
+            buffers.rewards[:, t] = reward
+            buffers.dones[:, t] = done
+            buffers.sample_weight[:, t] = active
+
+            self._state = next_state
+
+        return buffers
+
+    def _run(self, buffers):
+        try:
+            self._collect(buffers)
+        except Exception:
+            self._exc_info = sys.exc_info()
+
+    def _start(self, buffers):
+        self._thread = threading.Thread(target=self._run, args=(buffers,))
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _join(self):
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+        if self._exc_info is not None:
+            exc_info, self._exc_info = self._exc_info, None
+            six.reraise(*exc_info)
+
+    def collect(self):
+        """
+        Collect a rollout.
+
+        Returns:
+            `Transitions` with arrays of shape `[batch_size, horizon, ...]`.
+        """
+        if not self.double_buffer:
+            return self._collect(self._buffers[0])
+
+        if self._thread is None:
+            self._start(self._buffers[self._index])
+
+        self._join()
+
+        buffers = self._buffers[self._index]
+        self._index = 1 - self._index
+        self._start(self._buffers[self._index])
+        return buffers
+
+    def close(self):
+        """
+        Wait for a rollout in the background to finish.
+        """
+        self._join()
@@ -0,0 +1,162 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import functools
+
+import gym
+import numpy as np
+import tensorflow as tf
+import tensorflow_probability as tfp
+
+from pyoneer.rl.rollouts.rollout_impl import Rollout
+from pyoneer.rl.strategies.strategies_impl import EpsilonGreedy, Mode
+from pyoneer.rl.wrappers.batch_impl import Batch
+
+
+class CountingEnv(gym.Env):
+    """
+    Environment whose episodes last `seed + 1` steps.
+    """
+
+    def __init__(self):
+        self.observation_space = gym.spaces.Box(
+            low=0.0, high=np.inf, shape=(1,), dtype=np.float32
+        )
+        self.action_space = gym.spaces.Discrete(2)
+        self.episode_length = 1
+        self.steps = 0
+
+    def seed(self, seed=None):
+        self.episode_length = seed + 1
+        return [seed]
+
+    def reset(self):
+        self.steps = 0
+        return np.array([self.steps], dtype=np.float32)
+
+    def step(self, action):
+        self.steps += 1
+        state = np.array([self.steps], dtype=np.float32)
+        reward = float(action)
+        done = self.steps >= self.episode_length
+        info = {}
+        return state, reward, done, info
+
+
+def policy(states):
+    batch_size = tf.shape(states)[0]
+    logits = tf.tile(tf.constant([[0.0, 1.0]]), [batch_size, 1])
+    return tfp.distributions.Categorical(logits=logits)
+
+
+class RolloutTest(tf.test.TestCase):
+    def test_rollout(self):
+        batch_size = 3
+        horizon = 4
+
+        env = Batch(CountingEnv, batch_size=batch_size)
+        env.seed(0)
+
+        rollout = Rollout(env, policy, horizon=horizon)
+        transitions = rollout.collect()
+
+        expected_sample_weight = [
+            [1.0, 0.0, 0.0, 0.0],
+            [1.0, 1.0, 0.0, 0.0],
+            [1.0, 1.0, 1.0, 0.0],
+        ]
+        expected_dones = [
+            [True, True, True, True],
+            [False, True, True, True],
+            [False, False, True, True],
+        ]
+        expected_states = np.array(expected_sample_weight).cumsum(axis=1) - 1
+        expected_states = np.maximum(expected_states, 0) * expected_sample_weight
+
+        self.assertTupleEqual(transitions.states.shape, (batch_size, horizon, 1))
+        self.assertTupleEqual(transitions.actions.shape, (batch_size, horizon))
+        self.assertAllEqual(transitions.sample_weight, expected_sample_weight)
+        self.assertAllEqual(transitions.dones, expected_dones)
+        self.assertAllEqual(
+            transitions.states[..., 0] * transitions.sample_weight, expected_states
+        )
+        self.assertAllEqual(
+            transitions.rewards, transitions.actions * transitions.sample_weight
+        )
+
+        expected_log_probs = policy(tf.zeros([batch_size, 1])).log_prob(
+            transitions.actions.T
+        )
+        self.assertAllClose(
+            transitions.log_probs * transitions.sample_weight,
+            tf.transpose(expected_log_probs) * transitions.sample_weight,
+        )
+
+    def test_rollout_strategy(self):
+        batch_size = 3
+        horizon = 4
+
+        env = Batch(CountingEnv, batch_size=batch_size)
+        env.seed(3)
+
+        for strategy in [Mode, functools.partial(EpsilonGreedy, epsilon=0.0)]:
+            rollout = Rollout(env, policy, horizon=horizon, strategy=strategy)
+            transitions = rollout.collect()
+
+            self.assertAllEqual(transitions.actions, np.ones((batch_size, horizon)))
+            self.assertAllEqual(
+                transitions.sample_weight, np.ones((batch_size, horizon))
+            )
+            self.assertAllClose(
+                transitions.log_probs,
+                np.full((batch_size, horizon), np.log(1 / (1 + np.exp(-1.0)))),
+            )
+
+    def test_rollout_auto_reset(self):
+        batch_size = 2
+        horizon = 3
+
+        env = Batch(CountingEnv, batch_size=batch_size, auto_reset=True)
+        env.seed(1)
+
+        rollout = Rollout(env, policy, horizon=horizon, strategy=Mode)
+
+        transitions = rollout.collect()
+        self.assertAllEqual(transitions.states[..., 0], [[0, 1, 0], [0, 1, 2]])
+        self.assertAllEqual(
+            transitions.dones, [[False, True, False], [False, False, True]]
+        )
+        self.assertAllEqual(transitions.sample_weight, np.ones((batch_size, horizon)))
+
+        # the next rollout continues the episodes
+        transitions = rollout.collect()
+        self.assertAllEqual(transitions.states[..., 0], [[1, 0, 1], [0, 1, 2]])
+
+    def test_rollout_double_buffer(self):
+        batch_size = 3
+        horizon = 4
+
+        env = Batch(CountingEnv, batch_size=batch_size)
+        env.seed(0)
+
+        rollout = Rollout(env, policy, horizon=horizon, double_buffer=True)
+
+        first = rollout.collect()
+        second = rollout.collect()
+        self.assertIsNot(first, second)
+
+        for transitions in [first, second]:
+            self.assertAllEqual(
+                transitions.sample_weight,
+                [[1.0, 0.0, 0.0, 0.0], [1.0, 1.0, 0.0, 0.0], [1.0, 1.0, 1.0, 0.0]],
+            )
+
+        third = rollout.collect()
+        self.assertIs(first, third)
+
+        rollout.close()
+
+
+if __name__ == "__main__":
+    tf.test.main()
@@ -3,13 +3,17 @@ from __future__ import division
 from __future__ import print_function
 
 import tensorflow as tf
-import tensorflow_probability as tfp
 
 
 class EpsilonGreedy(object):
     """
-    Epsilon-greedy strategy. Samples from a policy distribution with
-    `1 - epsilon` probability.
+    Epsilon-greedy strategy. Explores with `epsilon` probability and
+    returns the mode of the policy distribution otherwise.
+
+    Exploration samples from the policy distribution or, when
+    `num_actions` is given, samples actions uniformly at random. Each
+    branch is only evaluated when at least one element of the batch
+    needs it.
 
     Example:
 
@@ -26,25 +30,71 @@ class EpsilonGreedy(object):
                 0.96))
         ```
 
+        Per-environment epsilons of an Ape-X actor population:
+
+        ```
+        epsilon = 0.4 ** (1 + 7 * tf.range(num_envs) / (num_envs - 1))
+        strategy = EpsilonGreedy(policy, epsilon, num_actions=4)
+        ```
+
     Args:
         policy: callable that returns a `tfp.distributions.Distribution`.
-        epsilon: epsilon value. This can be
-            a callable that takes no arguments and returns the actual
-            value to use.
+        epsilon: epsilon value. This can be a scalar, a tensor
+            broadcastable to the batch shape of the policy, e.g. one
+            epsilon per environment, or a callable that takes no arguments
+            and returns the actual value to use.
+        num_actions: optional number of discrete actions. When given,
+            exploration samples actions uniformly instead of sampling the
+            policy distribution.
     """
 
-    def __init__(self, policy, epsilon=1.0):
+    def __init__(self, policy, epsilon=1.0, num_actions=None):
         self.policy = policy
         self.epsilon = epsilon
+        self.num_actions = num_actions
+
+    def _explore(self, policy):
+        if self.num_actions is None:
+            return policy.sample()
+        shape = tf.concat(
+            [policy.batch_shape_tensor(), policy.event_shape_tensor()], axis=0
+        )
+        return tf.random.uniform(shape, maxval=self.num_actions, dtype=policy.dtype)
 
     def __call__(self, *args, **kwargs):
         policy = self.policy(*args, **kwargs)
         epsilon = self.epsilon() if callable(self.epsilon) else self.epsilon
-        mask_dist = tfp.distributions.Bernoulli(probs=1 - epsilon, dtype=tf.bool)
-        sample_mask = mask_dist.sample(policy.batch_shape)
-        sample = policy.sample()
-        mode = policy.mode()
-        return tf.where(sample_mask, mode, sample)
+
+        # constant epsilons only need a single branch
+        if isinstance(epsilon, (int, float)):
+            if epsilon <= 0:
+                return policy.mode()
+            if epsilon >= 1:
+                return self._explore(policy)
+
+        batch_shape = policy.batch_shape_tensor()
+        epsilon = tf.cast(epsilon, tf.float32)
+        explore_mask = tf.random.uniform(batch_shape) < epsilon
+
+        def mixed_fn():
+            explore = self._explore(policy)
+            mode = policy.mode()
+            # broadcast the mask over the event dimensions
+            mask = tf.reshape(
+                explore_mask,
+                tf.concat(
+                    [batch_shape, tf.ones_like(policy.event_shape_tensor())], axis=0
+                ),
+            )
+            return tf.where(mask, explore, mode)
+
+        return tf.case(
+            [
+                (tf.reduce_all(explore_mask), lambda: self._explore(policy)),
+                (tf.logical_not(tf.reduce_any(explore_mask)), policy.mode),
+            ],
+            default=mixed_fn,
+        )
 
 
 class Mode(object):
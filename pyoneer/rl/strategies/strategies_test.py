@@ -23,6 +23,40 @@ class StrategiesTest(tf.test.TestCase):
         samples = epsilon_greedy(logits)
         self.assertAllEqual(samples, expected_policy_samples)
 
+    def test_epsilon_greedy_per_env(self):
+        logits = tf.constant([[0.0, 1.0, -2.0]] * 4)
+
+        def policy(x):
+            return tfp.distributions.Categorical(logits=x)
+
+        # only the first two environments explore, uniformly over one action
+        epsilon = tf.constant([1.0, 1.0, 0.0, 0.0])
+        strategy = strategies_impl.EpsilonGreedy(policy, epsilon, num_actions=1)
+        samples = strategy(logits)
+        self.assertAllEqual(samples, [0, 0, 1, 1])
+
+        strategy = strategies_impl.EpsilonGreedy(policy, 1.0, num_actions=3)
+        samples = strategy(tf.tile(logits, [64, 1]))
+        self.assertEqual(samples.dtype, tf.int32)
+        self.assertAllInSet(samples, [0, 1, 2])
+        self.assertGreater(len(set(samples.numpy().tolist())), 1)
+
+    def test_epsilon_greedy_function(self):
+        logits = tf.constant([[0.0, 1.0, -2.0], [0.0, 1.0, 2.0]])
+
+        def policy(x):
+            return tfp.distributions.Categorical(logits=x)
+
+        epsilon = tf.Variable(0.0)
+        strategy = strategies_impl.EpsilonGreedy(
+            policy, lambda: epsilon.read_value(), num_actions=3
+        )
+        strategy_fn = tf.function(strategy)
+        self.assertAllEqual(strategy_fn(logits), [1, 2])
+
+        epsilon.assign(1.0)
+        self.assertAllInSet(strategy_fn(logits), [0, 1, 2])
+
     def test_sample(self):
         logits = [[0.0, 1.0, -2.0], [0.0, 1.0, 2.0]]
 
@@ -2,6 +2,32 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
-from pyoneer.rl.targets.target_ops import DiscountedReturns, GeneralizedAdvantages
+from pyoneer import _lazy_imports
 
-__all__ = ["DiscountedReturns", "GeneralizedAdvantages"]
+# the tensorflow modules are imported on first access so `numpy_ops` can
+# be imported without tensorflow, e.g. by actor processes
+__all__ = [
+    "DiscountedReturns",
+    "GeneralizedAdvantages",
+    "StreamingGeneralizedAdvantages",
+    "LambdaReturns",
+    "VTrace",
+    "Retrace",
+    "discounted_cumsum",
+    "numpy_ops",
+]
+
+__getattr__, __dir__ = _lazy_imports.attach(
+    __name__,
+    globals(),
+    ["numpy_ops", "off_policy_ops", "target_ops"],
+    attributes={
+        "DiscountedReturns": "target_ops",
+        "GeneralizedAdvantages": "target_ops",
+        "StreamingGeneralizedAdvantages": "target_ops",
+        "discounted_cumsum": "target_ops",
+        "LambdaReturns": "off_policy_ops",
+        "VTrace": "off_policy_ops",
+        "Retrace": "off_policy_ops",
+    },
+)
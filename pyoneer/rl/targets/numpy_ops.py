@@ -0,0 +1,136 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import numpy as np
+
+
+def discounted_cumsum(inputs, discounts, out=None):
+    """
+    Reverse discounted cumulative sum over the time axis of `[batch_size,
+    max_time]` NumPy arrays:
+
+    ```
+    out[:, t] = inputs[:, t] + discounts[:, t] * out[:, t + 1]
+    ```
+
+    Args:
+        inputs: Array with shape `[batch_size, max_time]`.
+        discounts: Scalar or array of per-step discounts broadcastable to
+            the shape of `inputs`.
+        out: Optional preallocated output array, which may be `inputs`.
+
+    Returns:
+        Array of discounted cumulative sums.
+    """
+    inputs = np.asarray(inputs)
+    discounts = np.broadcast_to(discounts, inputs.shape)
+
+    if out is None:
+        out = np.empty_like(inputs)
+
+    agg = np.zeros_like(out[:, -1])
+    for t in reversed(range(inputs.shape[1])):
+        agg *= discounts[:, t]
+        agg += inputs[:, t]
+        out[:, t] = agg
+
+    return out
+
+
+class DiscountedReturns(object):
+    """
+    Compute discounted returns with NumPy. Same as
+    `pynr.rl.targets.DiscountedReturns` without TensorFlow.
+
+    Args:
+        rewards: Rewards array.
+        discount_factor: Weighting factor for discounting.
+        sample_weight: Optional sample_weight array.
+        out: Optional preallocated output array.
+
+    Returns:
+        Array of discounted returns.
+    """
+
+    def __init__(self, discount_factor=0.99):
+        self.discount_factor = discount_factor
+
+    def __call__(self, rewards, sample_weight=1.0, out=None):
+        rewards = np.asarray(rewards)
+
+        returns = np.multiply(rewards, sample_weight, out=out)
+        returns = discounted_cumsum(returns, self.discount_factor, out=returns)
+        returns *= sample_weight
+
+        if not np.all(np.isfinite(returns)):
+            raise ValueError("returns had NaN or Inf values.")
+        return returns
+
+
+class GeneralizedAdvantages(object):
+    """
+    Compute generalized advantages with NumPy. Same as
+    `pynr.rl.targets.GeneralizedAdvantages` without TensorFlow.
+    """
+
+    def __init__(self, discount_factor=0.99, lambda_factor=0.95, normalize=True):
+        self.discount_factor = discount_factor
+        self.lambda_factor = lambda_factor
+        self.normalize = normalize
+
+    def __call__(self, rewards, values, sample_weight=1.0, out=None):
+        """
+        Compute generalized advantage for policy optimization. Equation 11 and 12.
+
+        Args:
+            rewards: Rewards array.
+            values: Values array.
+            sample_weight: Optional sample_weight array.
+            out: Optional preallocated output array.
+
+        Returns:
+            Array of advantages.
+        """
+        rewards = np.asarray(rewards)
+        values = np.asarray(values)
+        sample_weight = np.broadcast_to(sample_weight, rewards.shape)
+
+        batch_size = rewards.shape[0]
+        sequence_lengths = np.sum(sample_weight, axis=1)
+        last_steps = sequence_lengths.astype(np.int64) - 1
+        bootstrap_values = np.where(
+            last_steps >= 0,
+            values[np.arange(batch_size), np.maximum(last_steps, 0)],
+            np.zeros_like(values[:, -1]),
+        )
+
+        # deltas = rewards + discount_factor * values_next - values
+        deltas = np.subtract(rewards, values, out=out)
+        deltas[:, :-1] += self.discount_factor * values[:, 1:]
+        deltas[:, -1] += self.discount_factor * bootstrap_values
+        deltas *= sample_weight
+
+        advantages = discounted_cumsum(
+            deltas, self.discount_factor * self.lambda_factor, out=deltas
+        )
+
+        if self.normalize:
+            weight_sum = np.sum(sample_weight)
+            advantages_mean = np.sum(advantages * sample_weight) / weight_sum
+            advantages_variance = (
+                np.sum(np.square(advantages - advantages_mean) * sample_weight)
+                / weight_sum
+            )
+            advantages_std = np.sqrt(advantages_variance)
+            if np.isclose(advantages_std, 0.0, rtol=1e-5, atol=1e-8):
+                advantages_std = 1.0
+
+            advantages -= advantages_mean
+            advantages /= advantages_std
+
+        advantages *= sample_weight
+
+        if not np.all(np.isfinite(advantages)):
+            raise ValueError("advantages had NaN or Inf values.")
+        return advantages
@@ -0,0 +1,69 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import numpy as np
+import tensorflow as tf
+
+from pyoneer.rl.targets import numpy_ops
+from pyoneer.rl.targets import target_ops
+
+
+class NumpyOpsTest(tf.test.TestCase):
+    def setUp(self):
+        random = np.random.RandomState(0)
+        self.rewards = random.normal(size=(3, 20)).astype(np.float32)
+        self.values = random.normal(size=(3, 20)).astype(np.float32)
+        self.sample_weight = np.ones((3, 20), dtype=np.float32)
+        self.sample_weight[0, 12:] = 0.0
+        self.sample_weight[2, :] = 0.0
+
+    def test_discounted_returns(self):
+        rewards = np.array([[0.0, 0.0, 1.0]], dtype=np.float32)
+        outputs = numpy_ops.DiscountedReturns(discount_factor=0.99)(rewards)
+        self.assertAllClose(outputs, [[0.9801, 0.99, 1.0]])
+
+        expected = target_ops.DiscountedReturns(discount_factor=0.99)(
+            self.rewards, sample_weight=self.sample_weight
+        )
+
+        out = np.empty_like(self.rewards)
+        outputs = numpy_ops.DiscountedReturns(discount_factor=0.99)(
+            self.rewards, sample_weight=self.sample_weight, out=out
+        )
+        self.assertIs(outputs, out)
+        self.assertEqual(outputs.dtype, np.float32)
+        self.assertAllClose(outputs, expected)
+
+    def test_generalized_advantages(self):
+        rewards = np.array([[0.0, 0.0, 1.0]], dtype=np.float32)
+        values = np.array([[0.0, 0.0, 1.0]], dtype=np.float32)
+        outputs = numpy_ops.GeneralizedAdvantages(
+            discount_factor=0.99, lambda_factor=0.95, normalize=True
+        )(rewards, values)
+        self.assertAllClose(outputs, [[0.564769, 0.840459, -1.405228]])
+
+        for normalize in [False, True]:
+            expected = target_ops.GeneralizedAdvantages(
+                discount_factor=0.99, lambda_factor=0.95, normalize=normalize
+            )(self.rewards, self.values, sample_weight=self.sample_weight)
+
+            # the rewards buffer is reused for the advantages
+            out = self.rewards.copy()
+            outputs = numpy_ops.GeneralizedAdvantages(
+                discount_factor=0.99, lambda_factor=0.95, normalize=normalize
+            )(out, self.values, sample_weight=self.sample_weight, out=out)
+            self.assertIs(outputs, out)
+            self.assertAllClose(outputs, expected, rtol=1e-5, atol=1e-5)
+
+    def test_discounted_cumsum(self):
+        discounts = np.full((3, 20), 0.9, dtype=np.float32)
+        discounts[:, 5] = 0.0
+
+        expected = target_ops.discounted_cumsum(self.rewards, discounts)
+        outputs = numpy_ops.discounted_cumsum(self.rewards, discounts)
+        self.assertAllClose(outputs, expected)
+
+
+if __name__ == "__main__":
+    tf.test.main()
@@ -0,0 +1,220 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import tensorflow as tf
+
+from pyoneer.debugging import numerics_ops
+from pyoneer.manip import array_ops, indexing_ops
+from pyoneer.rl.targets.target_ops import discounted_cumsum
+
+
+def _next_values(values, sample_weight):
+    # bootstrap from the value of the last valid step, as in
+    # `GeneralizedAdvantages`
+    sequence_lengths = tf.reduce_sum(tf.ones_like(values) * sample_weight, axis=1)
+    last_steps = tf.cast(sequence_lengths - 1, tf.int32)
+    bootstrap_values = indexing_ops.batched_index(values, last_steps)
+    return array_ops.shift(
+        values, shift=-1, axis=1, padding_values=bootstrap_values[:, None]
+    )
+
+
+def _importance_ratios(log_probs, behavior_log_probs):
+    return tf.exp(
+        tf.convert_to_tensor(log_probs) - tf.convert_to_tensor(behavior_log_probs)
+    )
+
+
+class LambdaReturns(object):
+    """
+    Compute TD(lambda) returns:
+
+    ```
+    returns[t] = rewards[t] + discount_factor * (
+        (1 - lambda_factor) * values[t + 1] + lambda_factor * returns[t + 1])
+    ```
+
+    Args:
+        discount_factor: Weighting factor for discounting.
+        lambda_factor: Weighting factor for the multi-step returns.
+        method: Either "scan" or "associative". See `discounted_cumsum`.
+    """
+
+    def __init__(self, discount_factor=0.99, lambda_factor=0.95, method="scan"):
+        self.discount_factor = discount_factor
+        self.lambda_factor = lambda_factor
+        self.method = method
+
+    def __call__(self, rewards, values, sample_weight=1.0):
+        """
+        Args:
+            rewards: Rewards tensor.
+            values: Values tensor.
+            sample_weight: Optional sample_weight tensor.
+
+        Returns:
+            Tensor of lambda returns.
+        """
+        rewards = tf.convert_to_tensor(rewards)
+        values = tf.convert_to_tensor(values)
+        sample_weight = tf.convert_to_tensor(sample_weight)
+
+        values_next = _next_values(values, sample_weight)
+        deltas = rewards + self.discount_factor * values_next - values
+
+        returns = values + discounted_cumsum(
+            deltas * sample_weight,
+            self.discount_factor * self.lambda_factor,
+            method=self.method,
+        )
+
+        returns = returns * sample_weight
+        returns = numerics_ops.check_numerics(returns, "returns")
+        returns = tf.stop_gradient(returns)
+        return returns
+
+
+class VTrace(object):
+    """
+    Compute V-trace value targets and policy advantages for off-policy
+    actor-critic learning from the trajectories of a behavior policy.
+    See "IMPALA: Scalable Distributed Deep-RL with Importance Weighted
+    Actor-Learner Architectures" (Espeholt et al., 2018).
+
+    Args:
+        discount_factor: Weighting factor for discounting.
+        lambda_factor: Weighting factor for the traces.
+        clip_rho: Clipping threshold of the importance weights of the
+            temporal differences and advantages.
+        clip_c: Clipping threshold of the importance weights of the traces.
+        method: Either "scan" or "associative". See `discounted_cumsum`.
+    """
+
+    def __init__(
+        self,
+        discount_factor=0.99,
+        lambda_factor=1.0,
+        clip_rho=1.0,
+        clip_c=1.0,
+        method="scan",
+    ):
+        self.discount_factor = discount_factor
+        self.lambda_factor = lambda_factor
+        self.clip_rho = clip_rho
+        self.clip_c = clip_c
+        self.method = method
+
+    def __call__(
+        self, rewards, values, log_probs, behavior_log_probs, sample_weight=1.0
+    ):
+        """
+        Args:
+            rewards: Rewards tensor.
+            values: Values tensor.
+            log_probs: Log probabilities of the actions under the target
+                policy.
+            behavior_log_probs: Log probabilities of the actions under the
+                behavior policy which collected the trajectories.
+            sample_weight: Optional sample_weight tensor.
+
+        Returns:
+            Tuple of the value targets and the policy advantages.
+        """
+        rewards = tf.convert_to_tensor(rewards)
+        values = tf.convert_to_tensor(values)
+        sample_weight = tf.convert_to_tensor(sample_weight)
+
+        ratios = _importance_ratios(log_probs, behavior_log_probs)
+        rhos = tf.minimum(ratios, self.clip_rho)
+        traces = self.lambda_factor * tf.minimum(ratios, self.clip_c)
+
+        values_next = _next_values(values, sample_weight)
+        deltas = rhos * (rewards + self.discount_factor * values_next - values)
+
+        targets = values + discounted_cumsum(
+            deltas * sample_weight,
+            self.discount_factor * traces,
+            method=self.method,
+        )
+
+        # the last step bootstraps from its own value as for `values_next`
+        targets_next = array_ops.shift(
+            targets, shift=-1, axis=1, padding_values=values_next[:, -1:]
+        )
+        advantages = rhos * (rewards + self.discount_factor * targets_next - values)
+
+        targets = targets * sample_weight
+        targets = numerics_ops.check_numerics(targets, "targets")
+        targets = tf.stop_gradient(targets)
+
+        advantages = advantages * sample_weight
+        advantages = numerics_ops.check_numerics(advantages, "advantages")
+        advantages = tf.stop_gradient(advantages)
+        return targets, advantages
+
+
+class Retrace(object):
+    """
+    Compute Retrace(lambda) action-value targets from the trajectories of
+    a behavior policy. See "Safe and Efficient Off-Policy Reinforcement
+    Learning" (Munos et al., 2016).
+
+    Args:
+        discount_factor: Weighting factor for discounting.
+        lambda_factor: Weighting factor for the traces.
+        method: Either "scan" or "associative". See `discounted_cumsum`.
+    """
+
+    def __init__(self, discount_factor=0.99, lambda_factor=1.0, method="scan"):
+        self.discount_factor = discount_factor
+        self.lambda_factor = lambda_factor
+        self.method = method
+
+    def __call__(
+        self,
+        rewards,
+        action_values,
+        values,
+        log_probs,
+        behavior_log_probs,
+        sample_weight=1.0,
+    ):
+        """
+        Args:
+            rewards: Rewards tensor.
+            action_values: Action-values of the actions taken.
+            values: Expected action-values under the target policy.
+            log_probs: Log probabilities of the actions under the target
+                policy.
+            behavior_log_probs: Log probabilities of the actions under the
+                behavior policy which collected the trajectories.
+            sample_weight: Optional sample_weight tensor.
+
+        Returns:
+            Tensor of action-value targets.
+        """
+        rewards = tf.convert_to_tensor(rewards)
+        action_values = tf.convert_to_tensor(action_values)
+        values = tf.convert_to_tensor(values)
+        sample_weight = tf.convert_to_tensor(sample_weight)
+
+        ratios = _importance_ratios(log_probs, behavior_log_probs)
+        traces = self.lambda_factor * tf.minimum(ratios, 1.0)
+
+        # the correction at step t is traced by the next step
+        traces_next = array_ops.shift(traces, shift=-1, axis=1)
+
+        values_next = _next_values(values, sample_weight)
+        deltas = rewards + self.discount_factor * values_next - action_values
+
+        targets = action_values + discounted_cumsum(
+            deltas * sample_weight,
+            self.discount_factor * traces_next,
+            method=self.method,
+        )
+
+        targets = targets * sample_weight
+        targets = numerics_ops.check_numerics(targets, "targets")
+        targets = tf.stop_gradient(targets)
+        return targets
@@ -0,0 +1,143 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import numpy as np
+import tensorflow as tf
+
+from pyoneer.rl.targets.off_policy_ops import LambdaReturns, Retrace, VTrace
+from pyoneer.rl.targets.target_ops import GeneralizedAdvantages
+
+
+class OffPolicyOpsTest(tf.test.TestCase):
+    def setUp(self):
+        random = np.random.RandomState(0)
+        shape = (3, 10)
+        self.rewards = random.normal(size=shape).astype(np.float32)
+        self.values = random.normal(size=shape).astype(np.float32)
+        self.action_values = random.normal(size=shape).astype(np.float32)
+        self.log_probs = random.uniform(-2.0, 0.0, size=shape).astype(np.float32)
+        self.behavior_log_probs = random.uniform(-2.0, 0.0, size=shape).astype(
+            np.float32
+        )
+
+    def test_lambda_returns(self):
+        discount_factor, lambda_factor = 0.99, 0.9
+
+        expected = np.zeros_like(self.rewards)
+        returns = self.values[:, -1]
+        values_next = self.values[:, -1]
+        for t in reversed(range(10)):
+            returns = self.rewards[:, t] + discount_factor * (
+                (1 - lambda_factor) * values_next + lambda_factor * returns
+            )
+            expected[:, t] = returns
+            values_next = self.values[:, t]
+
+        for method in ["scan", "associative"]:
+            outputs = LambdaReturns(
+                discount_factor=discount_factor,
+                lambda_factor=lambda_factor,
+                method=method,
+            )(self.rewards, self.values)
+            self.assertAllClose(outputs, expected, rtol=1e-5, atol=1e-5)
+
+        sample_weight = np.ones_like(self.rewards)
+        sample_weight[0, 6:] = 0.0
+        outputs = LambdaReturns(
+            discount_factor=discount_factor, lambda_factor=lambda_factor
+        )(self.rewards, self.values, sample_weight=sample_weight)
+        advantages = GeneralizedAdvantages(
+            discount_factor=discount_factor,
+            lambda_factor=lambda_factor,
+            normalize=False,
+        )(self.rewards, self.values, sample_weight=sample_weight)
+        self.assertAllClose(
+            outputs, (advantages + self.values) * sample_weight, rtol=1e-5, atol=1e-5
+        )
+
+    def test_vtrace(self):
+        discount_factor, clip_rho, clip_c = 0.99, 1.0, 0.9
+
+        ratios = np.exp(self.log_probs - self.behavior_log_probs)
+        rhos = np.minimum(ratios, clip_rho)
+        cs = np.minimum(ratios, clip_c)
+
+        values_next = np.concatenate([self.values[:, 1:], self.values[:, -1:]], axis=1)
+        expected_targets = np.zeros_like(self.rewards)
+        correction = np.zeros(3, dtype=np.float32)
+        for t in reversed(range(10)):
+            delta = rhos[:, t] * (
+                self.rewards[:, t]
+                + discount_factor * values_next[:, t]
+                - self.values[:, t]
+            )
+            correction = delta + discount_factor * cs[:, t] * correction
+            expected_targets[:, t] = self.values[:, t] + correction
+
+        targets_next = np.concatenate(
+            [expected_targets[:, 1:], self.values[:, -1:]], axis=1
+        )
+        expected_advantages = rhos * (
+            self.rewards + discount_factor * targets_next - self.values
+        )
+
+        for method in ["scan", "associative"]:
+            targets, advantages = VTrace(
+                discount_factor=discount_factor,
+                clip_rho=clip_rho,
+                clip_c=clip_c,
+                method=method,
+            )(self.rewards, self.values, self.log_probs, self.behavior_log_probs)
+            self.assertAllClose(targets, expected_targets, rtol=1e-5, atol=1e-5)
+            self.assertAllClose(advantages, expected_advantages, rtol=1e-5, atol=1e-5)
+
+    def test_vtrace_on_policy(self):
+        # without policy lag, v-trace reduces to the lambda returns
+        targets, _ = VTrace(discount_factor=0.99, lambda_factor=0.9)(
+            self.rewards, self.values, self.log_probs, self.log_probs
+        )
+        returns = LambdaReturns(discount_factor=0.99, lambda_factor=0.9)(
+            self.rewards, self.values
+        )
+        self.assertAllClose(targets, returns, rtol=1e-5, atol=1e-5)
+
+    def test_retrace(self):
+        discount_factor, lambda_factor = 0.99, 0.95
+
+        ratios = np.exp(self.log_probs - self.behavior_log_probs)
+        cs = lambda_factor * np.minimum(ratios, 1.0)
+
+        values_next = np.concatenate([self.values[:, 1:], self.values[:, -1:]], axis=1)
+        expected = np.zeros_like(self.rewards)
+        targets_next = np.zeros(3, dtype=np.float32)
+        for t in reversed(range(10)):
+            if t == 9:
+                correction = 0.0
+            else:
+                correction = cs[:, t + 1] * (
+                    targets_next - self.action_values[:, t + 1]
+                )
+            targets = self.rewards[:, t] + discount_factor * (
+                values_next[:, t] + correction
+            )
+            expected[:, t] = targets
+            targets_next = targets
+
+        for method in ["scan", "associative"]:
+            outputs = Retrace(
+                discount_factor=discount_factor,
+                lambda_factor=lambda_factor,
+                method=method,
+            )(
+                self.rewards,
+                self.action_values,
+                self.values,
+                self.log_probs,
+                self.behavior_log_probs,
+            )
+            self.assertAllClose(outputs, expected, rtol=1e-5, atol=1e-5)
+
+
+if __name__ == "__main__":
+    tf.test.main()
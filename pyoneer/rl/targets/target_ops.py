@@ -4,10 +4,96 @@ from __future__ import print_function
 
 import tensorflow as tf
 
+from pyoneer.debugging import numerics_ops
 from pyoneer.math import math_ops
 from pyoneer.manip import array_ops, indexing_ops
 
 
+def _reverse_scan(inputs, discounts):
+    def scan_fn(agg, cur):
+        inputs_t, discounts_t = cur
+        return inputs_t + discounts_t * agg
+
+    outputs = tf.reverse(
+        tf.transpose(
+            tf.scan(
+                scan_fn,
+                (
+                    tf.transpose(tf.reverse(inputs, [1]), [1, 0]),
+                    tf.transpose(tf.reverse(discounts, [1]), [1, 0]),
+                ),
+                tf.zeros_like(inputs[:, -1]),
+                1,
+                False,
+            ),
+            [1, 0],
+        ),
+        [1],
+    )
+    return outputs
+
+
+def _shift_left(inputs, shift):
+    # shift left along the time axis and pad the end with zeros
+    return tf.pad(inputs[:, shift:], [[0, 0], [0, shift]])
+
+
+def _reverse_associative_scan(inputs, discounts):
+    # log-depth (Hillis-Steele) scan of the affine maps y -> x + d * y,
+    # after step k each position holds the composition of the next 2^k maps
+    def body(shift, inputs, discounts):
+        inputs = inputs + discounts * _shift_left(inputs, shift)
+        discounts = discounts * _shift_left(discounts, shift)
+        return shift * 2, inputs, discounts
+
+    max_time = inputs.shape[1]
+    if max_time is not None:
+        shift = 1
+        while shift < max_time:
+            shift, inputs, discounts = body(shift, inputs, discounts)
+        return inputs
+
+    _, inputs, _ = tf.while_loop(
+        lambda shift, inputs, discounts: shift < tf.shape(inputs)[1],
+        body,
+        (tf.constant(1), inputs, discounts),
+    )
+    return inputs
+
+
+def discounted_cumsum(inputs, discounts, method="scan"):
+    """
+    Reverse discounted cumulative sum over the time axis:
+
+    ```
+    outputs[:, t] = inputs[:, t] + discounts[:, t] * outputs[:, t + 1]
+    ```
+
+    Args:
+        inputs: Tensor with shape `[batch_size, max_time]`.
+        discounts: Scalar or tensor of per-step discounts broadcastable to
+            the shape of `inputs`.
+        method: Either "scan" for a sequential `tf.scan` over the time
+            axis or "associative" for a log-depth parallel prefix scan,
+            which is faster for long horizons (default: "scan").
+
+    Returns:
+        Tensor of discounted cumulative sums.
+    """
+    inputs = tf.convert_to_tensor(inputs)
+    discounts = tf.convert_to_tensor(discounts, dtype=inputs.dtype)
+    discounts = tf.broadcast_to(discounts, tf.shape(inputs))
+
+    if method == "scan":
+        return _reverse_scan(inputs, discounts)
+    if method == "associative":
+        return _reverse_associative_scan(inputs, discounts)
+
+    raise ValueError(
+        'Unknown method "{}", expected "scan" or "associative".'.format(method)
+    )
+
+
 class DiscountedReturns(object):
     """
     Compute discounted returns.
@@ -16,44 +102,53 @@ class DiscountedReturns(object):
         rewards: Rewards tensor.
         discount_factor: Weighting factor for discounting.
         sample_weight: Optional sample_weight tensor.
+        method: Either "scan" or "associative". See `discounted_cumsum`.
 
     Returns:
         Tensor of discounted returns.
     """
 
-    def __init__(self, discount_factor=0.99):
+    def __init__(self, discount_factor=0.99, method="scan"):
         self.discount_factor = discount_factor
+        self.method = method
 
     def __call__(self, rewards, sample_weight=1.0):
-        returns = tf.reverse(
-            tf.transpose(
-                tf.scan(
-                    lambda agg, cur: cur + self.discount_factor * agg,
-                    tf.transpose(tf.reverse(rewards * sample_weight, [1]), [1, 0]),
-                    tf.zeros_like(rewards[:, -1]),
-                    1,
-                    False,
-                ),
-                [1, 0],
-            ),
-            [1],
+        rewards = tf.convert_to_tensor(rewards)
+        returns = discounted_cumsum(
+            rewards * sample_weight, self.discount_factor, method=self.method
         )
         returns = returns * sample_weight
-        returns = tf.debugging.check_numerics(returns, "returns")
+        returns = numerics_ops.check_numerics(returns, "returns")
         returns = tf.stop_gradient(returns)
         return returns
 
 
 class GeneralizedAdvantages(object):
-    def __init__(self, discount_factor=0.99, lambda_factor=0.95, normalize=True):
+    def __init__(
+        self,
+        discount_factor=0.99,
+        lambda_factor=0.95,
+        normalize=True,
+        method="scan",
+        fused=False,
+    ):
         self.discount_factor = discount_factor
         self.lambda_factor = lambda_factor
         self.normalize = normalize
+        self.method = method
+        self.fused = fused
+        if fused:
+            self._fused_call = tf.function(self._call_fused)
 
     def __call__(self, rewards, values, sample_weight=1.0):
         """
         Compute generalized advantage for policy optimization. Equation 11 and 12.
 
+        With `fused=True`, the deltas, advantages and normalization
+        statistics are computed by a single compiled `tf.function`, in
+        fewer passes over the data. The results match up to floating point
+        rounding.
+
         Args:
             rewards: Rewards tensor.
             discount_factor: Weighting factor for discounting.
@@ -64,7 +159,11 @@ class GeneralizedAdvantages(object):
         """
         rewards = tf.convert_to_tensor(rewards)
         values = tf.convert_to_tensor(values)
-        sample_weight = tf.convert_to_tensor(sample_weight)
+        sample_weight = tf.convert_to_tensor(sample_weight, dtype=rewards.dtype)
+
+        if self.fused:
+            sample_weight = tf.broadcast_to(sample_weight, tf.shape(rewards))
+            return self._fused_call(rewards, values, sample_weight)
 
         sequence_lengths = tf.reduce_sum(tf.ones_like(rewards) * sample_weight, axis=1)
         last_steps = tf.cast(sequence_lengths - 1, tf.int32)
@@ -76,19 +175,10 @@ class GeneralizedAdvantages(object):
 
         deltas = rewards + self.discount_factor * values_next - values
 
-        advantages = tf.reverse(
-            tf.transpose(
-                tf.scan(
-                    lambda agg, cur: cur
-                    + self.discount_factor * self.lambda_factor * agg,
-                    tf.transpose(tf.reverse(deltas * sample_weight, [1]), [1, 0]),
-                    tf.zeros_like(deltas[:, -1]),
-                    1,
-                    False,
-                ),
-                [1, 0],
-            ),
-            [1],
+        advantages = discounted_cumsum(
+            deltas * sample_weight,
+            self.discount_factor * self.lambda_factor,
+            method=self.method,
         )
 
         if self.normalize:
@@ -104,6 +194,139 @@ class GeneralizedAdvantages(object):
             )
 
         advantages = advantages * sample_weight
-        advantages = tf.debugging.check_numerics(advantages, "advantages")
+        advantages = numerics_ops.check_numerics(advantages, "advantages")
+        advantages = tf.stop_gradient(advantages)
+        return advantages
+
+    def _call_fused(self, rewards, values, sample_weight):
+        # build the next values with a single concat
+        sequence_lengths = tf.reduce_sum(sample_weight, axis=1)
+        last_steps = tf.cast(sequence_lengths, tf.int32) - 1
+        bootstrap_values = indexing_ops.batched_index(values, last_steps)
+        values_next = tf.concat([values[:, 1:], bootstrap_values[:, None]], axis=1)
+
+        deltas = (rewards + self.discount_factor * values_next - values) * sample_weight
+
+        advantages = discounted_cumsum(
+            deltas, self.discount_factor * self.lambda_factor, method=self.method
+        )
+
+        if self.normalize:
+            # centred moments avoid the cancellation of E[x^2] - E[x]^2
+            weight_sum = tf.reduce_sum(sample_weight)
+            advantages_mean = tf.reduce_sum(advantages * sample_weight) / weight_sum
+            advantages_variance = (
+                tf.reduce_sum(tf.square(advantages - advantages_mean) * sample_weight)
+                / weight_sum
+            )
+            advantages_std = tf.sqrt(advantages_variance)
+            advantages_std = tf.where(
+                advantages_std > 1e-8, advantages_std, tf.ones_like(advantages_std)
+            )
+            advantages = (advantages - advantages_mean) / advantages_std
+
+        advantages = advantages * sample_weight
+        advantages = numerics_ops.check_numerics(advantages, "advantages")
+        advantages = tf.stop_gradient(advantages)
+        return advantages
+
+
+class StreamingGeneralizedAdvantages(object):
+    """
+    Compute generalized advantages chunk by chunk for rollouts which are
+    too long to keep in memory. Chunks are passed in reverse time order,
+    from the last to the first, and the running accumulator and next
+    values are carried between calls. The advantages are the same as
+    `GeneralizedAdvantages` with `normalize=False` on the concatenated
+    chunks. Call `reset` before streaming a new rollout.
+
+    Optional `dones` mark the last step of each episode, so the values and
+    advantages are not carried across episode boundaries inside a chunk.
+
+    Example:
+
+    ```
+    advantages_fn = StreamingGeneralizedAdvantages()
+    for rewards, values in reversed(chunks):
+        advantages = advantages_fn(rewards, values)
+    ```
+
+    Args:
+        discount_factor: Weighting factor for discounting.
+        lambda_factor: Weighting factor for the advantage traces.
+        method: Either "scan" or "associative". See `discounted_cumsum`.
+    """
+
+    def __init__(self, discount_factor=0.99, lambda_factor=0.95, method="scan"):
+        self.discount_factor = discount_factor
+        self.lambda_factor = lambda_factor
+        self.method = method
+        self.reset()
+
+    def reset(self):
+        """
+        Forget the carried state to start a new rollout.
+        """
+        self._advantages = None
+        self._values = None
+
+    def __call__(self, rewards, values, sample_weight=1.0, dones=None):
+        """
+        Compute the generalized advantages of the given chunk, which
+        precedes the chunk of the previous call.
+
+        Args:
+            rewards: Rewards tensor of the chunk.
+            values: Values tensor of the chunk.
+            sample_weight: Optional sample_weight tensor of the chunk.
+            dones: Optional boolean tensor marking the last step of each
+                episode in the chunk.
+
+        Returns:
+            Tensor of advantages of the chunk.
+        """
+        rewards = tf.convert_to_tensor(rewards)
+        values = tf.convert_to_tensor(values)
+        sample_weight = tf.broadcast_to(
+            tf.convert_to_tensor(sample_weight, dtype=rewards.dtype),
+            tf.shape(rewards),
+        )
+
+        if self._values is None:
+            # the last chunk bootstraps from its last valid step
+            sequence_lengths = tf.reduce_sum(sample_weight, axis=1)
+            last_steps = tf.cast(sequence_lengths - 1, tf.int32)
+            next_values = indexing_ops.batched_index(values, last_steps)
+            accumulator = tf.zeros_like(rewards[:, -1])
+        else:
+            next_values = self._values
+            accumulator = self._advantages
+
+        values_next = array_ops.shift(
+            values, shift=-1, axis=1, padding_values=next_values[:, None]
+        )
+
+        discounts = tf.fill(
+            tf.shape(rewards), tf.cast(self.discount_factor, rewards.dtype)
+        )
+        if dones is not None:
+            discounts = discounts * (1 - tf.cast(dones, rewards.dtype))
+        traces = discounts * self.lambda_factor
+
+        deltas = (rewards + discounts * values_next - values) * sample_weight
+
+        # continue the accumulation from the later chunk
+        deltas = tf.concat(
+            [deltas[:, :-1], deltas[:, -1:] + traces[:, -1:] * accumulator[:, None]],
+            axis=1,
+        )
+
+        advantages = discounted_cumsum(deltas, traces, method=self.method)
+
+        self._advantages = advantages[:, 0]
+        self._values = values[:, 0]
+
+        advantages = advantages * sample_weight
+        advantages = numerics_ops.check_numerics(advantages, "advantages")
         advantages = tf.stop_gradient(advantages)
         return advantages
@@ -0,0 +1,94 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import time
+import itertools
+
+import numpy as np
+import tensorflow as tf
+
+from pyoneer.rl.targets.target_ops import DiscountedReturns, GeneralizedAdvantages
+
+
+class TargetOpsBenchmark(tf.test.Benchmark):
+    def _benchmark(self, name, fn, inputs, iters=20):
+        fn = tf.function(fn)
+
+        # trace outside of the timed loop
+        fn(*inputs)
+
+        start_time = time.time()
+        for _ in range(iters):
+            fn(*inputs)
+        wall_time = (time.time() - start_time) / iters
+
+        self.report_benchmark(iters=iters, wall_time=wall_time, name=name)
+
+    def benchmark_targets(self):
+        random = np.random.RandomState(0)
+
+        for batch_size in [1, 64]:
+            for max_time in [100, 1000, 4000]:
+                shape = (batch_size, max_time)
+                rewards = tf.constant(random.normal(size=shape), tf.float32)
+                values = tf.constant(random.normal(size=shape), tf.float32)
+
+                for method in ["scan", "associative"]:
+                    suffix = "{}_b{}_t{}".format(method, batch_size, max_time)
+
+                    returns = DiscountedReturns(method=method)
+                    self._benchmark("returns_" + suffix, returns, [rewards])
+
+                    advantages = GeneralizedAdvantages(method=method)
+                    self._benchmark(
+                        "advantages_" + suffix, advantages, [rewards, values]
+                    )
+
+    def benchmark_generalized_advantages_fused(self):
+        random = np.random.RandomState(0)
+
+        for batch_size, max_time in [(64, 200), (256, 1000)]:
+            shape = (batch_size, max_time)
+            rewards = tf.constant(random.normal(size=shape), tf.float32)
+            values = tf.constant(random.normal(size=shape), tf.float32)
+            sample_weight = tf.ones(shape)
+
+            for fused, jit_compile in itertools.product([False, True], [False, True]):
+                advantages = GeneralizedAdvantages(method="associative", fused=fused)
+
+                # both paths are traced as a single function so only the
+                # fusion differs, the number of ops approximates the
+                # intermediate tensors materialized by the computation
+                traced = tf.function(
+                    advantages._call_fused if fused else advantages.__call__,
+                    jit_compile=jit_compile,
+                )
+                graph = traced.get_concrete_function(
+                    rewards, values, sample_weight
+                ).graph
+                num_ops = len(graph.get_operations())
+
+                iters = 50
+                traced(rewards, values, sample_weight)
+                start_time = time.time()
+                for _ in range(iters):
+                    traced(rewards, values, sample_weight)
+                wall_time = (time.time() - start_time) / iters
+
+                name = "advantages_{}{}_b{}_t{}".format(
+                    "fused" if fused else "unfused",
+                    "_xla" if jit_compile else "",
+                    batch_size,
+                    max_time,
+                )
+                self.report_benchmark(
+                    iters=iters,
+                    wall_time=wall_time,
+                    name=name,
+                    extras={"num_ops": num_ops},
+                )
+
+
+if __name__ == "__main__":
+    tf.test.main()
@@ -2,9 +2,15 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import numpy as np
 import tensorflow as tf
 
-from pyoneer.rl.targets.target_ops import DiscountedReturns, GeneralizedAdvantages
+from pyoneer.rl.targets.target_ops import (
+    DiscountedReturns,
+    GeneralizedAdvantages,
+    StreamingGeneralizedAdvantages,
+    discounted_cumsum,
+)
 
 
 class TargetOpsTest(tf.test.TestCase):
@@ -25,6 +31,166 @@ class TargetOpsTest(tf.test.TestCase):
         expected = tf.constant([[0.564769, 0.840459, -1.405228]])
         self.assertAllClose(outputs, expected)
 
+    def test_discounted_cumsum(self):
+        random = np.random.RandomState(0)
+        inputs = random.normal(size=(4, 37)).astype(np.float32)
+        discounts = random.uniform(0.9, 1.0, size=(4, 37)).astype(np.float32)
+        discounts[random.uniform(size=(4, 37)) < 0.1] = 0.0
+
+        expected = np.zeros_like(inputs)
+        agg = np.zeros(4, dtype=np.float32)
+        for t in reversed(range(37)):
+            agg = inputs[:, t] + discounts[:, t] * agg
+            expected[:, t] = agg
+
+        for method in ["scan", "associative"]:
+            outputs = discounted_cumsum(inputs, discounts, method=method)
+            self.assertAllClose(outputs, expected, rtol=1e-5, atol=1e-5)
+
+        @tf.function(input_signature=[tf.TensorSpec([None, None], tf.float32)] * 2)
+        def dynamic_cumsum(inputs, discounts):
+            return discounted_cumsum(inputs, discounts, method="associative")
+
+        outputs = dynamic_cumsum(inputs, discounts)
+        self.assertAllClose(outputs, expected, rtol=1e-5, atol=1e-5)
+
+        with self.assertRaises(ValueError):
+            discounted_cumsum(inputs, discounts, method="unknown")
+
+    def test_targets_associative(self):
+        random = np.random.RandomState(0)
+        rewards = random.normal(size=(3, 50)).astype(np.float32)
+        values = random.normal(size=(3, 50)).astype(np.float32)
+        sample_weight = np.ones((3, 50), dtype=np.float32)
+        sample_weight[0, 30:] = 0.0
+
+        returns = DiscountedReturns(discount_factor=0.99)
+        associative_returns = DiscountedReturns(
+            discount_factor=0.99, method="associative"
+        )
+        self.assertAllClose(
+            associative_returns(rewards, sample_weight=sample_weight),
+            returns(rewards, sample_weight=sample_weight),
+            rtol=1e-5,
+            atol=1e-5,
+        )
+
+        advantages = GeneralizedAdvantages(discount_factor=0.99, lambda_factor=0.95)
+        associative_advantages = GeneralizedAdvantages(
+            discount_factor=0.99, lambda_factor=0.95, method="associative"
+        )
+        self.assertAllClose(
+            associative_advantages(rewards, values, sample_weight=sample_weight),
+            advantages(rewards, values, sample_weight=sample_weight),
+            rtol=1e-5,
+            atol=1e-5,
+        )
+
+    def test_generalized_advantages_fused(self):
+        random = np.random.RandomState(0)
+        rewards = random.normal(size=(3, 50)).astype(np.float32)
+        values = random.normal(size=(3, 50)).astype(np.float32)
+        sample_weight = np.ones((3, 50), dtype=np.float32)
+        sample_weight[0, 30:] = 0.0
+        sample_weight[2, :] = 0.0
+
+        for normalize in [False, True]:
+            for method in ["scan", "associative"]:
+                advantages = GeneralizedAdvantages(normalize=normalize)
+                fused_advantages = GeneralizedAdvantages(
+                    normalize=normalize, method=method, fused=True
+                )
+                self.assertAllClose(
+                    fused_advantages(rewards, values, sample_weight=sample_weight),
+                    advantages(rewards, values, sample_weight=sample_weight),
+                    rtol=1e-5,
+                    atol=1e-5,
+                )
+
+        fused_advantages = GeneralizedAdvantages(fused=True)
+        outputs = fused_advantages(
+            tf.constant([[0.0, 0.0, 1.0]]), tf.constant([[0.0, 0.0, 1.0]])
+        )
+        self.assertAllClose(outputs, [[0.564769, 0.840459, -1.405228]])
+
+        # large offsets with a small spread cancel in E[x^2] - E[x]^2
+        rewards = (1000.0 + 0.01 * random.normal(size=(4, 64))).astype(np.float32)
+        values = np.zeros_like(rewards)
+        for fused in [False, True]:
+            advantages = GeneralizedAdvantages(discount_factor=0.0, fused=fused)
+            outputs = advantages(rewards, values)
+            self.assertAllClose(tf.math.reduce_std(outputs), 1.0, atol=1e-2)
+        self.assertFalse(hasattr(GeneralizedAdvantages(), "_fused_call"))
+
+    def test_streaming_generalized_advantages(self):
+        random = np.random.RandomState(0)
+        rewards = random.normal(size=(3, 20)).astype(np.float32)
+        values = random.normal(size=(3, 20)).astype(np.float32)
+        sample_weight = np.ones((3, 20), dtype=np.float32)
+        sample_weight[0, 12:] = 0.0
+        sample_weight[1, 17:] = 0.0
+
+        expected = GeneralizedAdvantages(
+            discount_factor=0.99, lambda_factor=0.95, normalize=False
+        )(rewards, values, sample_weight=sample_weight)
+
+        for method in ["scan", "associative"]:
+            advantages_fn = StreamingGeneralizedAdvantages(
+                discount_factor=0.99, lambda_factor=0.95, method=method
+            )
+
+            for _ in range(2):
+                advantages_fn.reset()
+
+                chunks = []
+                for start in reversed(range(0, 20, 7)):
+                    chunk = slice(start, start + 7)
+                    chunks.insert(
+                        0,
+                        advantages_fn(
+                            rewards[:, chunk],
+                            values[:, chunk],
+                            sample_weight=sample_weight[:, chunk],
+                        ),
+                    )
+
+                outputs = tf.concat(chunks, axis=1)
+                self.assertAllClose(outputs, expected, rtol=1e-5, atol=1e-5)
+
+    def test_streaming_generalized_advantages_dones(self):
+        random = np.random.RandomState(0)
+        rewards = random.normal(size=(2, 12)).astype(np.float32)
+        values = random.normal(size=(2, 12)).astype(np.float32)
+        dones = np.zeros((2, 12), dtype=np.bool_)
+        dones[0, 4] = True
+        dones[1, [2, 8]] = True
+
+        expected = np.zeros_like(rewards)
+        advantages = np.zeros(2, dtype=np.float32)
+        next_values = values[:, -1]
+        for t in reversed(range(12)):
+            not_done = 1.0 - dones[:, t]
+            delta = rewards[:, t] + 0.99 * not_done * next_values - values[:, t]
+            advantages = delta + 0.99 * 0.95 * not_done * advantages
+            expected[:, t] = advantages
+            next_values = values[:, t]
+
+        advantages_fn = StreamingGeneralizedAdvantages(
+            discount_factor=0.99, lambda_factor=0.95
+        )
+        chunks = []
+        for start in [8, 4, 0]:
+            chunk = slice(start, start + 4)
+            chunks.insert(
+                0,
+                advantages_fn(
+                    rewards[:, chunk], values[:, chunk], dones=dones[:, chunk]
+                ),
+            )
+
+        outputs = tf.concat(chunks, axis=1)
+        self.assertAllClose(outputs, expected, rtol=1e-5, atol=1e-5)
+
 
 if __name__ == "__main__":
     tf.test.main()
@@ -3,10 +3,22 @@ from __future__ import division
 from __future__ import print_function
 
 from pyoneer.rl.wrappers.observation_impl import (
+    BatchObservationCoordinates,
+    BatchObservationNormalization,
     ObservationCoordinates,
     ObservationNormalization,
 )
 from pyoneer.rl.wrappers.batch_impl import Batch
-from pyoneer.rl.wrappers.process_impl import Process
+from pyoneer.rl.wrappers.process_impl import Process, ProcessError
+from pyoneer.rl.wrappers.reset_impl import AutoReset
 
-__all__ = ["ObservationCoordinates", "ObservationNormalization", "Batch", "Process"]
+__all__ = [
+    "BatchObservationCoordinates",
+    "BatchObservationNormalization",
+    "ObservationCoordinates",
+    "ObservationNormalization",
+    "Batch",
+    "Process",
+    "ProcessError",
+    "AutoReset",
+]
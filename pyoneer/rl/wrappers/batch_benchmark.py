@@ -0,0 +1,140 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import time
+import functools
+
+import gym
+import numpy as np
+import tensorflow as tf
+
+from pyoneer.rl.wrappers.batch_impl import Batch
+
+
+def make_env():
+    return gym.make("Pendulum-v0")
+
+
+class VectorizedPendulum(object):
+    """
+    NumPy implementation of the pendulum dynamics stepping all
+    environments at once.
+    """
+
+    def __init__(self, batch_size):
+        self.batch_size = batch_size
+        self.observation_space = gym.spaces.Box(
+            low=np.array([-1.0, -1.0, -8.0], dtype=np.float32),
+            high=np.array([1.0, 1.0, 8.0], dtype=np.float32),
+            dtype=np.float32,
+        )
+        self.action_space = gym.spaces.Box(
+            low=-2.0, high=2.0, shape=(1,), dtype=np.float32
+        )
+        self.random = np.random.RandomState()
+        self.theta = np.zeros(batch_size)
+        self.theta_dot = np.zeros(batch_size)
+
+    def seed(self, seed):
+        self.random.seed(seed)
+
+    def _observation(self):
+        return np.stack(
+            [np.cos(self.theta), np.sin(self.theta), self.theta_dot], axis=-1
+        ).astype(np.float32)
+
+    def reset(self):
+        self.theta = self.random.uniform(-np.pi, np.pi, size=self.batch_size)
+        self.theta_dot = self.random.uniform(-1.0, 1.0, size=self.batch_size)
+        return self._observation()
+
+    def step(self, actions):
+        u = np.clip(actions[:, 0], -2.0, 2.0)
+        theta_norm = ((self.theta + np.pi) % (2 * np.pi)) - np.pi
+        reward = -(theta_norm**2 + 0.1 * self.theta_dot**2 + 0.001 * u**2)
+        self.theta_dot = np.clip(
+            self.theta_dot + (3 * 10.0 / 2 * np.sin(self.theta) + 3.0 * u) * 0.05,
+            -8.0,
+            8.0,
+        )
+        self.theta = self.theta + self.theta_dot * 0.05
+        done = np.zeros(self.batch_size, dtype=np.bool_)
+        info = ({},) * self.batch_size
+        return self._observation(), reward, done, info
+
+
+class BatchBenchmark(tf.test.Benchmark):
+    def _benchmark_step(self, name, iters=200, batch_size=64, **kwargs):
+        env = Batch(batch_size=batch_size, **kwargs)
+        env.seed(0)
+        env.reset()
+
+        action = np.zeros(
+            (batch_size,) + env.action_space.shape, dtype=env.action_space.dtype
+        )
+
+        start_time = time.time()
+        for _ in range(iters):
+            env.step(action)
+        wall_time = (time.time() - start_time) / iters
+
+        env.close()
+
+        self.report_benchmark(iters=iters, wall_time=wall_time, name=name)
+
+    def _benchmark_startup(self, start_method, batch_size):
+        # an importable constructor which does not import tensorflow. The
+        # "forkserver" and "spawn" workers also import this main module and
+        # tensorflow with it, a launcher which imports tensorflow under its
+        # `__main__` guard starts them faster.
+        constructor = functools.partial(gym.make, "CartPole-v0")
+
+        start_time = time.time()
+        env = Batch(
+            constructor=constructor,
+            batch_size=batch_size,
+            blocking=False,
+            start_method=start_method,
+        )
+        env.reset()
+        wall_time = time.time() - start_time
+
+        env.close()
+
+        self.report_benchmark(
+            iters=1,
+            wall_time=wall_time,
+            name="startup_{}_{}".format(start_method, batch_size),
+        )
+
+    def benchmark_startup(self):
+        for start_method in ["fork", "forkserver", "spawn"]:
+            for batch_size in [8, 64, 256]:
+                self._benchmark_startup(start_method, batch_size)
+
+    def benchmark_step_blocking(self):
+        self._benchmark_step("step_blocking", constructor=make_env)
+
+    def benchmark_step_blocking_preallocated(self):
+        self._benchmark_step(
+            "step_blocking_preallocated", constructor=make_env, shared_memory=True
+        )
+
+    def benchmark_step_blocking_vectorized(self):
+        self._benchmark_step(
+            "step_blocking_vectorized",
+            constructor=VectorizedPendulum,
+            vectorized=True,
+        )
+
+    def benchmark_step_blocking_vectorized_batch(self):
+        self._benchmark_step(
+            "step_blocking_vectorized_batch",
+            constructor=functools.partial(Batch, make_env, shared_memory=True),
+            vectorized=True,
+        )
+
+
+if __name__ == "__main__":
+    tf.test.main()
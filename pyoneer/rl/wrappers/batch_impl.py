@@ -2,9 +2,19 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import time
+import itertools
+import functools
+import multiprocessing.connection
+
 import numpy as np
 
-from pyoneer.rl.wrappers.process_impl import Process
+from pyoneer.rl.wrappers.process_impl import Process, ProcessError, SharedArray
+from pyoneer.rl.wrappers.reset_impl import AutoReset
+
+
+def _auto_reset(constructor):
+    return AutoReset(constructor())
 
 
 class Batch(object):
@@ -19,6 +29,49 @@ class Batch(object):
     For more complex environments, use `blocking=False` so the CPU
     computation can be offloaded.
 
+    With `envs_per_worker > 1` and `blocking=False`, each external process
+    hosts a slice of the environments and steps them in a loop so only one
+    message is sent to and received from each process per call. This keeps
+    the number of processes close to the number of cores for wide batches.
+
+    With `shared_memory=True`, the observations, rewards and dones are
+    allocated once and each transition is written into them in place,
+    avoiding stacking on every step. When `blocking=False` the block is
+    shared with the external processes so transitions are not pickled
+    either. The arrays returned by `reset` and `step` are views over that
+    block and are overwritten by the next call, so copy them if they need
+    to be kept around.
+
+    With `vectorized=True`, the constructor takes a number of environments
+    and returns a single natively vectorized environment whose `step`
+    takes `[batch_size, ...]` actions and returns `[batch_size, ...]`
+    arrays, with the spaces of a single environment. It is stepped as a
+    whole instead of dispatching to each environment. When
+    `blocking=False`, each external process hosts a vectorized environment
+    of `envs_per_worker` environments. Vectorized environments are
+    responsible for their own resets, so `auto_reset` only stops the
+    accumulation of `Batch.done`.
+
+    With `auto_reset=True`, environments reset themselves (inside the
+    external process when `blocking=False`) as soon as an episode ends so
+    every slot keeps producing real transitions. The returned `done` marks
+    the episode boundaries and the last observation of each finished
+    episode is in `info["final_observation"]`. `Batch.done` is not
+    accumulated in this mode.
+
+    With `restart=True`, external processes which die, raise an exception
+    or exceed `step_timeout` are restarted from the constructor and their
+    environments are marked as done with `info["restarted"] = True`,
+    instead of failing the whole batch.
+
+    With `blocking=False`, `start_method` selects how the external
+    processes are started and `preload` lists the modules a
+    "forkserver" imports once for all workers. See `Process`.
+
+    Use `step_async` and `recv` to act on whichever environments finish
+    first instead of waiting for the whole batch on each step. This keeps
+    the policy busy when step costs vary a lot between environments.
+
     Note: When rendering with `mode="human"` only the first
         environment is rendered.
 
@@ -31,21 +84,132 @@ class Batch(object):
         blocking=True)
     ```
 
+    Asynchronous example:
+
+    ```
+    state = env.reset()
+    env.step_async(policy(state))
+    while not env.done.all():
+        indices, next_state, reward, done, info = env.recv(min_ready=8)
+        env.step_async(policy(next_state), indices=indices)
+    ```
+
     Args:
         constructor: Constructor which returns a `gym.Env`.
         batch_size: Number of parallel environments.
         blocking: Boolean indicating whether each call to an environment
             is blocking (default: True).
+        shared_memory: Boolean indicating whether transitions are written
+            in place into preallocated buffers, shared with the external
+            processes when `blocking=False` (default: False).
+        envs_per_worker: Number of environments hosted by each external
+            process. Only used when `blocking=False` (default: 1).
+        auto_reset: Boolean indicating whether environments are reset
+            automatically at the end of each episode (default: False).
+        restart: Boolean indicating whether external processes which die,
+            raise or time out are restarted. Only used when
+            `blocking=False` (default: False).
+        step_timeout: Optional number of seconds to wait for a step of an
+            external process before treating it as hung. Only used when
+            `blocking=False` (default: None).
+        vectorized: Boolean indicating whether the constructor returns a
+            natively vectorized environment (default: False).
+        start_method: Optional `multiprocessing` start method of the
+            external processes. Only used when `blocking=False`
+            (default: None).
+        preload: Optional list of modules imported by the forkserver. Only
+            used when `blocking=False` (default: gym and the wrappers).
     """
 
-    def __init__(self, constructor, batch_size, blocking=True):
-        if blocking:
-            self.envs = [constructor() for _ in range(batch_size)]
-        else:
-            self.envs = [Process(constructor) for _ in range(batch_size)]
+    def __init__(
+        self,
+        constructor,
+        batch_size,
+        blocking=True,
+        shared_memory=False,
+        envs_per_worker=1,
+        auto_reset=False,
+        restart=False,
+        step_timeout=None,
+        vectorized=False,
+        start_method=None,
+        preload=None,
+    ):
+        if envs_per_worker < 1:
+            raise ValueError("`envs_per_worker` must be at least 1.")
 
-        self.done = np.zeros(len(self.envs), dtype=np.bool)
+        self.batch_size = batch_size
         self.blocking = blocking
+        self.envs_per_worker = 1 if blocking else envs_per_worker
+        self.auto_reset = auto_reset
+        self.restart = restart
+        self.vectorized = vectorized
+        self.buffers = None
+
+        if auto_reset and not vectorized:
+            env_constructor = functools.partial(_auto_reset, constructor)
+        else:
+            env_constructor = constructor
+
+        # constructs a vectorized environment from a number of environments
+        if vectorized:
+            vector_constructor = constructor
+        else:
+            vector_constructor = functools.partial(
+                Batch, constructor, auto_reset=auto_reset
+            )
+
+        if blocking and vectorized:
+            self.envs = [constructor(batch_size)]
+            self.indices = [slice(0, batch_size)]
+        elif blocking:
+            self.envs = [env_constructor() for _ in range(batch_size)]
+            self.indices = list(range(batch_size))
+        else:
+            if vectorized or self.envs_per_worker > 1:
+                self.indices = [
+                    slice(start, min(start + self.envs_per_worker, batch_size))
+                    for start in range(0, batch_size, self.envs_per_worker)
+                ]
+                constructors = [
+                    functools.partial(vector_constructor, self._size(index))
+                    for index in self.indices
+                ]
+            else:
+                self.indices = list(range(batch_size))
+                constructors = [env_constructor] * batch_size
+
+            if shared_memory:
+                # the buffers must exist before the workers start so
+                # construct a throwaway environment to infer the space
+                env = constructors[0]()
+                self.buffers = self._create_buffers(env.observation_space, batch_size)
+                if hasattr(env, "close"):
+                    env.close()
+
+            self.envs = [
+                Process(
+                    worker_constructor,
+                    buffers=self.buffers,
+                    index=index,
+                    timeout=step_timeout,
+                    start_method=start_method,
+                    preload=preload,
+                )
+                for worker_constructor, index in zip(constructors, self.indices)
+            ]
+
+        if blocking and shared_memory:
+            self.buffers = self._create_buffers(
+                self.envs[0].observation_space, batch_size
+            )
+
+        if self.buffers is not None:
+            self._buffer_arrays = tuple(buffer.array for buffer in self.buffers)
+
+        self.done = np.zeros(batch_size, dtype=np.bool)
+        self._batched = isinstance(self.indices[0], slice)
+        self._pending = {}
 
         observation_space = self.observation_space
         if not all(env.observation_space == observation_space for env in self.envs):
@@ -55,8 +219,32 @@ class Batch(object):
         if not all(env.action_space == action_space for env in self.envs):
             raise ValueError("All environments must use the same action space.")
 
+    @staticmethod
+    def _create_buffers(observation_space, batch_size):
+        observations = SharedArray(
+            shape=(batch_size,) + observation_space.shape,
+            dtype=observation_space.dtype,
+        )
+        rewards = SharedArray(shape=(batch_size,), dtype=np.float64)
+        dones = SharedArray(shape=(batch_size,), dtype=np.bool_)
+        return observations, rewards, dones
+
+    @staticmethod
+    def _offset(index):
+        return index.start if isinstance(index, slice) else index
+
+    @staticmethod
+    def _size(index):
+        return index.stop - index.start if isinstance(index, slice) else 1
+
+    @staticmethod
+    def _env_indices(index):
+        if isinstance(index, slice):
+            return list(range(index.start, index.stop))
+        return [index]
+
     def __len__(self):
-        return len(self.envs)
+        return self.batch_size
 
     def __getitem__(self, index):
         return self.envs[index]
@@ -66,69 +254,370 @@ class Batch(object):
 
     def seed(self, seed):
         if self.blocking:
-            for i, env in enumerate(self.envs):
-                env.seed(seed + i)
+            for env, index in zip(self.envs, self.indices):
+                env.seed(seed + self._offset(index))
         else:
-            promises = [env.seed(seed + i) for i, env in enumerate(self.envs)]
+            promises = [
+                self._supervise(
+                    functools.partial(env.seed, seed + self._offset(index)),
+                    functools.partial(
+                        self._retry, worker, "seed", seed + self._offset(index)
+                    ),
+                )
+                for worker, (env, index) in enumerate(zip(self.envs, self.indices))
+            ]
             for promise in promises:
                 promise()
 
     def reset(self):
+        # discard transitions from outstanding asynchronous steps
+        for worker in sorted(self._pending):
+            self._pending.pop(worker)()
+
         self.done[:] = False
 
         if self.blocking:
             states = [env.reset() for env in self.envs]
         else:
-            promises = [env.reset() for env in self.envs]
+            promises = [
+                self._supervise(
+                    env.reset, functools.partial(self._retry, worker, "reset")
+                )
+                for worker, env in enumerate(self.envs)
+            ]
             states = [promise() for promise in promises]
 
+        if self.buffers is not None:
+            observations, _, _ = self._buffer_arrays
+
+            if self.blocking:
+                for index, state in zip(self.indices, states):
+                    observations[index] = state
+
+            return observations
+
+        if self._batched:
+            return np.concatenate(states, axis=0)
+
         state = np.stack(states, axis=0)
         return state
 
-    def _dummy_transition(self):
+    def _update_done(self, done, indices=None):
+        if self.auto_reset:
+            return
+
+        if indices is None:
+            self.done = self.done | done
+        else:
+            self.done[indices] |= done
+
+    def _dummy_transitions(self, size):
         next_state = np.zeros(
-            shape=self.observation_space.shape, dtype=self.observation_space.dtype
+            shape=(size,) + self.observation_space.shape,
+            dtype=self.observation_space.dtype,
         )
-        reward = 0.0
-        done = True
-        info = {}
-        transition = (next_state, reward, done, info)
+        reward = np.zeros(size, dtype=np.float64)
+        done = np.ones(size, dtype=np.bool_)
+        info = ({},) * size
+        transitions = (next_state, reward, done, info)
+        return transitions
+
+    def _empty_transition(self, worker, restarted=False):
+        """
+        Transition for a worker which is done or which failed and was
+        restarted. Written into the shared buffers when `shared_memory=True`.
+        """
+        index = self.indices[worker]
+        next_state, reward, done, info = self._dummy_transitions(self._size(index))
+
+        if restarted:
+            self.envs[worker].restart()
+            info = tuple({"restarted": True} for _ in info)
+
+            # with auto-reset the slot continues with a new episode
+            if self.auto_reset:
+                next_state[:] = self.envs[worker].reset()()
+
+        if not isinstance(index, slice):
+            next_state, reward, done, info = next_state[0], reward[0], done[0], info[0]
+
+        if self.buffers is not None:
+            self._write(index, next_state, reward, done)
+
+        return next_state, reward, done, info
+
+    def _write(self, index, next_state, reward, done):
+        observations, rewards, dones = self._buffer_arrays
+        observations[index] = next_state
+        rewards[index] = reward
+        dones[index] = done
+
+    def _step_in_place(self, worker, action):
+        transition = self.envs[worker].step(action)
+        next_state, reward, done, _ = transition
+        self._write(self.indices[worker], next_state, reward, done)
         return transition
 
-    def step(self, actions):
+    def _retry(self, worker, name, *args):
+        env = self.envs[worker]
+        env.restart()
+        return getattr(env, name)(*args)()
+
+    def _supervise(self, call, fallback):
+        """
+        Wraps the promise returned by `call` so that failures of the worker
+        return `fallback()` instead of raising when `restart=True`.
+        """
+        try:
+            promise = call()
+        except ProcessError:
+            if not self.restart:
+                raise
+            return fallback
+
+        def supervised():
+            try:
+                return promise()
+            except ProcessError:
+                if not self.restart:
+                    raise
+                return fallback()
+
+        return supervised
+
+    def _step_worker(self, worker, action):
+        env = self.envs[worker]
+
+        if self.blocking and self.buffers is not None:
+            return functools.partial(self._step_in_place, worker, action)
+
         if self.blocking:
-            transitions = []
-            for i, env in enumerate(self.envs):
-                if self.done[i]:
-                    transition = self._dummy_transition()
-                else:
-                    transition = env.step(actions[i])
-                transitions.append(transition)
-        else:
-            promises = []
-            for i, env in enumerate(self.envs):
-                if self.done[i]:
-                    promise = self._dummy_transition
-                else:
-                    promise = env.step(actions[i])
-                promises.append(promise)
-            transitions = [promise() for promise in promises]
+            return functools.partial(env.step, action)
 
+        return self._supervise(
+            functools.partial(env.step, action),
+            functools.partial(self._empty_transition, worker, restarted=True),
+        )
+
+    def _combine_info(self, infos):
+        if self._batched:
+            return tuple(itertools.chain.from_iterable(infos))
+        return tuple(infos)
+
+    def _combine(self, transitions):
         next_states, rewards, dones, infos = zip(*transitions)
-        next_state = np.stack(next_states, axis=0)
-        reward = np.stack(rewards, axis=0)
-        done = np.stack(dones, axis=0)
-        info = tuple(infos)
-        self.done = self.done | done
+
+        if self._batched:
+            next_state = np.concatenate(next_states, axis=0)
+            reward = np.concatenate(rewards, axis=0)
+            done = np.concatenate(dones, axis=0)
+        else:
+            next_state = np.stack(next_states, axis=0)
+            reward = np.stack(rewards, axis=0)
+            done = np.stack(dones, axis=0)
+
+        info = self._combine_info(infos)
+        return next_state, reward, done, info
+
+    def _mask_done(self, next_state, reward, done, indices=None):
+        # vectorized environments are stepped as a whole so the environments
+        # which were already done are masked out here
+        if not self.vectorized or self.auto_reset:
+            return
+
+        mask = self.done if indices is None else self.done[indices]
+        if mask.any():
+            next_state[mask] = 0
+            reward[mask] = 0.0
+            done[mask] = True
+
+    def step(self, actions):
+        if self._pending:
+            raise ValueError("Cannot call `step` while asynchronous steps are pending.")
+
+        promises = []
+        for worker, index in enumerate(self.indices):
+            if np.all(self.done[index]):
+                promise = functools.partial(self._empty_transition, worker)
+            else:
+                promise = self._step_worker(worker, actions[index])
+            promises.append(promise)
+        transitions = [promise() for promise in promises]
+
+        if self.buffers is not None:
+            # the transitions are already in the buffers
+            next_state, reward, done = self._buffer_arrays
+            info = self._combine_info([info for _, _, _, info in transitions])
+        else:
+            next_state, reward, done, info = self._combine(transitions)
+
+        self._mask_done(next_state, reward, done)
+        self._update_done(done)
         return next_state, reward, done, info
 
+    def step_async(self, actions, indices=None):
+        """
+        Send actions to the environments without waiting for the
+        transitions. Use `recv` to collect the transitions.
+
+        Environments which are done are skipped. When environments are
+        grouped (`envs_per_worker > 1` or `vectorized=True`), `indices` must
+        cover whole groups.
+
+        Args:
+            actions: Actions for the environments in `indices`.
+            indices: Optional sequence of environment indices. Defaults to
+                all environments.
+        """
+        if indices is None:
+            indices = range(self.batch_size)
+        positions = {int(index): position for position, index in enumerate(indices)}
+
+        promises = {}
+        for worker, (env, index) in enumerate(zip(self.envs, self.indices)):
+            env_indices = self._env_indices(index)
+            included = [i in positions for i in env_indices]
+
+            if not any(included):
+                continue
+
+            if not all(included):
+                raise ValueError(
+                    "Indices must cover all environments of a worker: {}.".format(
+                        env_indices
+                    )
+                )
+
+            if worker in self._pending:
+                raise ValueError(
+                    "Environments {} already have a pending step.".format(env_indices)
+                )
+
+            if np.all(self.done[index]):
+                continue
+
+            if isinstance(index, slice):
+                action = actions[[positions[i] for i in env_indices]]
+            else:
+                action = actions[positions[index]]
+
+            promises[worker] = self._step_worker(worker, action)
+
+        self._pending.update(promises)
+
+    def recv(self, min_ready=None, timeout=None):
+        """
+        Receive transitions from environments with a pending `step_async`.
+
+        Blocks until at least `min_ready` environments are ready or `timeout`
+        seconds elapse, then returns every environment which is ready.
+
+        Args:
+            min_ready: Minimum number of environments to wait for. Defaults
+                to all pending environments.
+            timeout: Optional timeout in seconds.
+
+        Returns:
+            Tuple of `(indices, next_state, reward, done, info)` where
+            `indices` are the environment indices of the transitions.
+        """
+        pending = sorted(self._pending)
+        if min_ready is None:
+            min_ready = self.batch_size
+
+        deadline = None if timeout is None else time.time() + timeout
+
+        ready = []
+        num_ready = 0
+        while pending and num_ready < min_ready:
+            if self.blocking:
+                workers = pending
+            else:
+                wait_timeout = (
+                    None if deadline is None else max(deadline - time.time(), 0.0)
+                )
+                envs = {self.envs[worker]: worker for worker in pending}
+                workers = [
+                    envs[env]
+                    for env in multiprocessing.connection.wait(
+                        list(envs), timeout=wait_timeout
+                    )
+                ]
+
+            if not workers:
+                break
+
+            ready.extend(workers)
+            num_ready += sum(self._size(self.indices[worker]) for worker in workers)
+            workers = set(workers)
+            pending = [worker for worker in pending if worker not in workers]
+
+        ready = sorted(ready)
+        transitions = [self._pending.pop(worker)() for worker in ready]
+        indices = np.array(
+            sum([self._env_indices(self.indices[worker]) for worker in ready], []),
+            dtype=np.int64,
+        )
+
+        if transitions:
+            next_state, reward, done, info = self._combine(transitions)
+        else:
+            next_state, reward, done, info = self._dummy_transitions(0)
+
+        self._mask_done(next_state, reward, done, indices)
+        self._update_done(done, indices)
+        return indices, next_state, reward, done, info
+
+    def call(self, name, *args, **kwargs):
+        """
+        Call a method on every environment, inside the external processes
+        when `blocking=False`.
+
+        Args:
+            name: Name of the method.
+            *args: Positional arguments of the method.
+            **kwargs: Keyword arguments of the method.
+
+        Returns:
+            List with the result of each environment in batch order, or of
+            each natively vectorized environment when `vectorized=True`.
+        """
+        if self.blocking:
+            return [getattr(env, name)(*args, **kwargs) for env in self.envs]
+
+        hosts_batch = self._batched and not self.vectorized
+
+        promises = []
+        for env in self.envs:
+            if hosts_batch:
+                promises.append(env.call("call", name, *args, **kwargs))
+            else:
+                promises.append(env.call(name, *args, **kwargs))
+
+        results = []
+        for promise in promises:
+            if hosts_batch:
+                results.extend(promise())
+            else:
+                results.append(promise())
+        return results
+
     def render(self, mode="human"):
         assert (
             self.blocking or mode == "rgb_array"
         ), 'only the "rgb_array" mode is supported when `blocking=False`'
 
         if mode == "rgb_array":
-            return np.stack([env.render(mode=mode) for env in self.envs], axis=0)
+            if self.blocking:
+                frames = [env.render(mode=mode) for env in self.envs]
+            else:
+                promises = [env.call("render", mode=mode) for env in self.envs]
+                frames = [promise() for promise in promises]
+
+            if self._batched:
+                return np.concatenate(frames, axis=0)
+
+            return np.stack(frames, axis=0)
         else:
             return self.envs[0].render(mode=mode)
 
@@ -2,6 +2,10 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import os
+import time
+import functools
+
 import gym
 import numpy as np
 import tensorflow as tf
@@ -9,6 +13,43 @@ import tensorflow as tf
 from pyoneer.rl.wrappers.batch_impl import Batch
 
 
+class FlakyEnv(gym.Env):
+    """
+    Environment which exits its process on the third step when seeded
+    with 1 and hangs on the third step when seeded with 2.
+    """
+
+    def __init__(self):
+        self.observation_space = gym.spaces.Box(
+            low=0.0, high=1.0, shape=(3,), dtype=np.float32
+        )
+        self.action_space = gym.spaces.Box(
+            low=0.0, high=1.0, shape=(1,), dtype=np.float32
+        )
+        self._seed = None
+        self.steps = 0
+
+    def seed(self, seed=None):
+        self._seed = seed
+        return [seed]
+
+    def reset(self):
+        self.steps = 0
+        return np.ones(3, dtype=np.float32)
+
+    def step(self, action):
+        self.steps += 1
+        if self.steps == 3 and self._seed == 1:
+            os._exit(1)
+        if self.steps == 3 and self._seed == 2:
+            time.sleep(60)
+        state = np.ones(3, dtype=np.float32)
+        reward = 1.0
+        done = False
+        info = {}
+        return state, reward, done, info
+
+
 class BatchTest(tf.test.TestCase):
     def test_batch_blocking(self):
         batch_size = 8
@@ -58,6 +99,352 @@ class BatchTest(tf.test.TestCase):
             self.assertTupleEqual(done.shape, (batch_size,))
             self.assertAllEqual(len(info), batch_size)
 
+    def test_batch_start_method(self):
+        batch_size = 4
+
+        env = Batch(
+            constructor=functools.partial(gym.make, "CartPole-v0"),
+            batch_size=batch_size,
+            blocking=False,
+            envs_per_worker=2,
+            start_method="forkserver",
+        )
+        env.seed(0)
+
+        state = env.reset()
+        next_state, reward, done, info = env.step(np.zeros(batch_size, np.int64))
+
+        self.assertTupleEqual(state.shape, (batch_size, 4))
+        self.assertTupleEqual(next_state.shape, (batch_size, 4))
+        self.assertAllEqual(reward, np.ones(batch_size))
+
+        env.close()
+
+    def test_batch_shared_memory(self):
+        batch_size = 8
+
+        env = Batch(
+            constructor=lambda: gym.make("Pendulum-v0"),
+            batch_size=batch_size,
+            blocking=False,
+            shared_memory=True,
+        )
+        env.seed(0)
+
+        expected_env = Batch(
+            constructor=lambda: gym.make("Pendulum-v0"),
+            batch_size=batch_size,
+            blocking=True,
+        )
+        expected_env.seed(0)
+
+        state = env.reset()
+        expected_state = expected_env.reset()
+        self.assertAllClose(state, expected_state)
+
+        for _ in range(200):
+            action = np.stack(
+                [env.action_space.sample() for _ in range(batch_size)], axis=0
+            )
+            next_state, reward, done, info = env.step(action)
+            expected_next_state, expected_reward, expected_done, _ = expected_env.step(
+                action
+            )
+
+            self.assertTupleEqual(next_state.shape, (batch_size, 3))
+            self.assertTupleEqual(reward.shape, (batch_size,))
+            self.assertTupleEqual(done.shape, (batch_size,))
+            self.assertAllEqual(len(info), batch_size)
+
+            self.assertAllClose(next_state, expected_next_state)
+            self.assertAllClose(reward, expected_reward)
+            self.assertAllEqual(done, expected_done)
+
+        env.close()
+
+    def test_batch_envs_per_worker(self):
+        batch_size = 8
+
+        for shared_memory in [False, True]:
+            env = Batch(
+                constructor=lambda: gym.make("Pendulum-v0"),
+                batch_size=batch_size,
+                blocking=False,
+                shared_memory=shared_memory,
+                envs_per_worker=3,
+            )
+            env.seed(0)
+
+            expected_env = Batch(
+                constructor=lambda: gym.make("Pendulum-v0"),
+                batch_size=batch_size,
+                blocking=True,
+            )
+            expected_env.seed(0)
+
+            self.assertEqual(len(env), batch_size)
+            self.assertEqual(len(env.envs), 3)
+
+            state = env.reset()
+            expected_state = expected_env.reset()
+            self.assertTupleEqual(state.shape, (batch_size, 3))
+            self.assertAllClose(state, expected_state)
+
+            for _ in range(200):
+                action = np.stack(
+                    [env.action_space.sample() for _ in range(batch_size)], axis=0
+                )
+                next_state, reward, done, info = env.step(action)
+                expected_next_state, expected_reward, expected_done, _ = (
+                    expected_env.step(action)
+                )
+
+                self.assertTupleEqual(next_state.shape, (batch_size, 3))
+                self.assertTupleEqual(reward.shape, (batch_size,))
+                self.assertTupleEqual(done.shape, (batch_size,))
+                self.assertAllEqual(len(info), batch_size)
+
+                self.assertAllClose(next_state, expected_next_state)
+                self.assertAllClose(reward, expected_reward)
+                self.assertAllEqual(done, expected_done)
+
+            env.close()
+
+    def test_batch_call(self):
+        batch_size = 5
+
+        for blocking, envs_per_worker in [(True, 1), (False, 1), (False, 2)]:
+            env = Batch(
+                constructor=lambda: gym.make("Pendulum-v0"),
+                batch_size=batch_size,
+                blocking=blocking,
+                envs_per_worker=envs_per_worker,
+            )
+
+            seeds = env.call("seed", 7)
+            self.assertEqual(len(seeds), batch_size)
+            self.assertAllEqual(seeds, [[7]] * batch_size)
+
+            env.close()
+
+    def test_batch_async(self):
+        batch_size = 8
+
+        for blocking, envs_per_worker in [(True, 1), (False, 1), (False, 2)]:
+            env = Batch(
+                constructor=lambda: gym.make("Pendulum-v0"),
+                batch_size=batch_size,
+                blocking=blocking,
+                envs_per_worker=envs_per_worker,
+            )
+            env.seed(0)
+
+            expected_env = Batch(
+                constructor=lambda: gym.make("Pendulum-v0"),
+                batch_size=batch_size,
+                blocking=True,
+            )
+            expected_env.seed(0)
+
+            env.reset()
+            expected_env.reset()
+
+            for _ in range(200):
+                action = np.stack(
+                    [env.action_space.sample() for _ in range(batch_size)], axis=0
+                )
+                expected_next_state, expected_reward, expected_done, _ = (
+                    expected_env.step(action)
+                )
+
+                env.step_async(action)
+
+                next_state = np.zeros_like(expected_next_state)
+                reward = np.zeros_like(expected_reward)
+                done = np.zeros_like(expected_done)
+                received = np.zeros(batch_size, dtype=np.bool_)
+
+                while not received.all():
+                    indices, next_state_, reward_, done_, info_ = env.recv(min_ready=1)
+
+                    self.assertGreaterEqual(len(indices), 1)
+                    self.assertFalse(received[indices].any())
+                    self.assertAllEqual(len(info_), len(indices))
+
+                    received[indices] = True
+                    next_state[indices] = next_state_
+                    reward[indices] = reward_
+                    done[indices] = done_
+
+                self.assertAllClose(next_state, expected_next_state)
+                self.assertAllClose(reward, expected_reward)
+                self.assertAllEqual(done, expected_done)
+
+            env.close()
+
+    def test_batch_async_indices(self):
+        batch_size = 4
+
+        env = Batch(
+            constructor=lambda: gym.make("Pendulum-v0"),
+            batch_size=batch_size,
+            blocking=False,
+        )
+        env.seed(0)
+        env.reset()
+
+        action = np.stack(
+            [env.action_space.sample() for _ in range(batch_size)], axis=0
+        )
+        env.step_async(action[1:3], indices=[1, 2])
+
+        with self.assertRaises(ValueError):
+            env.step_async(action[1:2], indices=[1])
+
+        with self.assertRaises(ValueError):
+            env.step(action)
+
+        indices, next_state, reward, done, info = env.recv()
+        self.assertAllEqual(indices, [1, 2])
+        self.assertTupleEqual(next_state.shape, (2, 3))
+
+        indices, next_state, reward, done, info = env.recv(timeout=0.1)
+        self.assertTupleEqual(indices.shape, (0,))
+        self.assertTupleEqual(next_state.shape, (0, 3))
+
+        env.close()
+
+    def test_batch_auto_reset(self):
+        batch_size = 4
+
+        for blocking, shared_memory, envs_per_worker in [
+            (True, False, 1),
+            (False, False, 1),
+            (False, True, 2),
+        ]:
+            env = Batch(
+                constructor=lambda: gym.make("Pendulum-v0"),
+                batch_size=batch_size,
+                blocking=blocking,
+                shared_memory=shared_memory,
+                envs_per_worker=envs_per_worker,
+                auto_reset=True,
+            )
+            env.seed(0)
+            env.reset()
+
+            for step in range(300):
+                action = np.stack(
+                    [env.action_space.sample() for _ in range(batch_size)], axis=0
+                )
+                next_state, reward, done, info = env.step(action)
+
+                # pendulum episodes are truncated after 200 steps
+                self.assertAllEqual(done, np.full(batch_size, step == 199))
+                self.assertFalse(env.done.any())
+                self.assertTrue(np.all(np.abs(next_state).sum(axis=-1) > 0))
+
+                for i in range(batch_size):
+                    self.assertEqual("final_observation" in info[i], step == 199)
+
+            env.close()
+
+    def test_batch_restart(self):
+        batch_size = 4
+
+        for shared_memory, auto_reset in [(False, False), (True, True)]:
+            env = Batch(
+                constructor=FlakyEnv,
+                batch_size=batch_size,
+                blocking=False,
+                shared_memory=shared_memory,
+                auto_reset=auto_reset,
+                restart=True,
+                step_timeout=1.0,
+            )
+            env.seed(0)
+            env.reset()
+
+            action = np.zeros((batch_size, 1), dtype=np.float32)
+            for step in range(5):
+                next_state, reward, done, info = env.step(action)
+
+                failed = step == 2
+                stopped = failed if auto_reset else step >= 2
+                self.assertAllEqual(done, [False, stopped, stopped, False])
+                self.assertAllEqual(reward, [1.0, not stopped, not stopped, 1.0])
+
+                for i in [1, 2]:
+                    self.assertEqual(info[i].get("restarted", False), failed)
+
+                if auto_reset:
+                    # restarted environments are reset and keep stepping
+                    self.assertAllEqual(next_state, np.ones((batch_size, 3)))
+                    self.assertFalse(env.done.any())
+                elif step >= 2:
+                    self.assertAllEqual(next_state[1:3], np.zeros((2, 3)))
+                    self.assertAllEqual(env.done, [False, True, True, False])
+
+            env.close()
+
+    def test_batch_vectorized(self):
+        batch_size = 8
+
+        def env_constructor():
+            return gym.make("Pendulum-v0")
+
+        # a blocking batch is itself a vectorized environment
+        vector_constructor = functools.partial(Batch, env_constructor)
+
+        for blocking, shared_memory, vectorized in [
+            (True, True, False),
+            (True, False, True),
+            (True, True, True),
+            (False, False, True),
+            (False, True, True),
+        ]:
+            env = Batch(
+                constructor=vector_constructor if vectorized else env_constructor,
+                batch_size=batch_size,
+                blocking=blocking,
+                shared_memory=shared_memory,
+                envs_per_worker=3,
+                vectorized=vectorized,
+            )
+            env.seed(0)
+
+            expected_env = Batch(
+                constructor=lambda: gym.make("Pendulum-v0"),
+                batch_size=batch_size,
+                blocking=True,
+            )
+            expected_env.seed(0)
+
+            state = env.reset()
+            expected_state = expected_env.reset()
+            self.assertTupleEqual(state.shape, (batch_size, 3))
+            self.assertAllClose(state, expected_state)
+
+            for _ in range(201):
+                action = np.stack(
+                    [env.action_space.sample() for _ in range(batch_size)], axis=0
+                )
+                next_state, reward, done, info = env.step(action)
+                expected_next_state, expected_reward, expected_done, _ = (
+                    expected_env.step(action)
+                )
+
+                self.assertTupleEqual(next_state.shape, (batch_size, 3))
+                self.assertTupleEqual(reward.shape, (batch_size,))
+                self.assertTupleEqual(done.shape, (batch_size,))
+                self.assertAllEqual(len(info), batch_size)
+
+                self.assertAllClose(next_state, expected_next_state)
+                self.assertAllClose(reward, expected_reward)
+                self.assertAllEqual(done, expected_done)
+
+            env.close()
+
 
 if __name__ == "__main__":
     tf.test.main()
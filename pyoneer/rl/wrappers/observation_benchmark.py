@@ -0,0 +1,81 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import time
+
+import gym
+import numpy as np
+import tensorflow as tf
+
+from pyoneer.rl.wrappers.observation_impl import ObservationCoordinates
+
+
+class ImageEnv(gym.Env):
+    def __init__(self):
+        self.observation_space = gym.spaces.Box(
+            low=0.0, high=1.0, shape=(84, 84, 4), dtype=np.float32
+        )
+        self.action_space = gym.spaces.Discrete(2)
+        self.observation = np.zeros(self.observation_space.shape, dtype=np.float32)
+
+    def reset(self):
+        return self.observation
+
+    def step(self, action):
+        return self.observation, 0.0, False, {}
+
+
+class UncachedObservationCoordinates(ObservationCoordinates):
+    """
+    Baseline which rebuilds the coordinates and concatenates them with
+    the observation on every step.
+    """
+
+    def step(self, action):
+        observation, reward, done, info = self.env.step(action)
+
+        observation_space = self.observation_space
+        x_dim, y_dim = observation_space.shape[:2]
+        xx_range = np.linspace(0.0, 1.0, num=x_dim, dtype=observation_space.dtype)
+        yy_range = np.linspace(0.0, 1.0, num=y_dim, dtype=observation_space.dtype)
+        xx_ones = np.ones(x_dim, dtype=observation_space.dtype)
+        yy_ones = np.ones(y_dim, dtype=observation_space.dtype)
+        xx_channel = np.matmul(xx_ones[..., None], xx_range[None, ...])
+        yy_channel = np.matmul(yy_range[..., None], yy_ones[None, ...])
+        rr_channel = np.sqrt(np.square(xx_channel) + np.square(yy_channel))
+        rr_channel = rr_channel / np.amax(rr_channel)
+        coords = np.stack([xx_channel, yy_channel, rr_channel], axis=-1)
+
+        observation = np.concatenate([observation, coords], axis=-1)
+        return observation, reward, done, info
+
+
+class ObservationBenchmark(tf.test.Benchmark):
+    def _benchmark_step(self, name, env, iters=2000):
+        env.reset()
+
+        start_time = time.time()
+        for _ in range(iters):
+            env.step(0)
+        wall_time = (time.time() - start_time) / iters
+
+        self.report_benchmark(iters=iters, wall_time=wall_time, name=name)
+
+    def benchmark_coords_uncached(self):
+        self._benchmark_step(
+            "coords_uncached", UncachedObservationCoordinates(ImageEnv())
+        )
+
+    def benchmark_coords(self):
+        self._benchmark_step("coords", ObservationCoordinates(ImageEnv()))
+
+    def benchmark_coords_preallocated(self):
+        self._benchmark_step(
+            "coords_preallocated",
+            ObservationCoordinates(ImageEnv(), preallocate=True),
+        )
+
+
+if __name__ == "__main__":
+    tf.test.main()
@@ -6,13 +6,242 @@ import gym
 import numpy as np
 
 
-class ObservationNormalization(gym.Wrapper):
+class _RunningMoments(object):
+    """
+    NumPy moments of batches of observations, so they can be updated
+    inside external processes without TensorFlow. Follows
+    `pynr.moments.StreamingMoments` when `rate` is None and
+    `pynr.moments.ExponentialMovingMoments` otherwise.
+    """
+
+    def __init__(self, shape, rate=None):
+        self.rate = rate
+        self.count = 0
+        self.mean = np.zeros(shape, dtype=np.float64)
+        # sum of squared deviations when streaming, variance otherwise
+        self.m2 = np.zeros(shape, dtype=np.float64)
+
+    @property
+    def variance(self):
+        if self.rate is not None:
+            return self.m2
+        if self.count > 1:
+            return self.m2 / (self.count - 1)
+        return np.zeros_like(self.m2)
+
+    @property
+    def std(self):
+        return np.sqrt(self.variance)
+
+    def get_state(self):
+        return {"count": self.count, "mean": self.mean.copy(), "m2": self.m2.copy()}
+
+    def set_state(self, state):
+        self.count = state["count"]
+        self.mean = np.array(state["mean"], dtype=np.float64)
+        self.m2 = np.array(state["m2"], dtype=np.float64)
+
+    def _combine(self, count, mean, m2):
+        if count == 0:
+            return
+
+        if self.count == 0:
+            self.count, self.mean, self.m2 = count, mean, m2
+            return
+
+        total = self.count + count
+
+        if self.rate is None:
+            # parallel update of the sum of squared deviations
+            delta = mean - self.mean
+            self.mean = self.mean + delta * (count / total)
+            self.m2 = self.m2 + m2 + np.square(delta) * (self.count * count / total)
+        else:
+            self.mean = self.mean * self.rate + mean * (1 - self.rate)
+            self.m2 = self.m2 * self.rate + m2 * (1 - self.rate)
+
+        self.count = total
+
+    def update(self, inputs, sample_weight=None):
+        """
+        Update the moments from a batch of inputs with a leading batch
+        dimension, optionally weighted per sample.
+        """
+        inputs = np.asarray(inputs, dtype=np.float64)
+
+        if sample_weight is None:
+            sample_weight = np.ones(inputs.shape[:1], dtype=np.float64)
+        sample_weight = np.asarray(sample_weight, dtype=np.float64)
+
+        count = sample_weight.sum()
+        if count == 0:
+            return
+
+        weights = sample_weight.reshape((-1,) + (1,) * (inputs.ndim - 1))
+        mean = np.sum(inputs * weights, axis=0) / count
+        m2 = np.sum(np.square(inputs - mean) * weights, axis=0)
+
+        if self.rate is not None:
+            m2 = m2 / count
+
+        self._combine(int(count), mean, m2)
+
+    def merge(self, state):
+        """
+        Merge the moments of another set of samples. Exponential moving
+        moments are averaged by count.
+        """
+        if self.rate is None:
+            self._combine(state["count"], state["mean"], state["m2"])
+            return
+
+        total = self.count + state["count"]
+        if total == 0:
+            return
+
+        weight = state["count"] / total
+        self.mean = self.mean * (1 - weight) + state["mean"] * weight
+        self.m2 = self.m2 * (1 - weight) + state["m2"] * weight
+        self.count = total
+
+
+def _normalize(observation, mean, std):
+    std = np.where(np.isclose(std, 0.0), np.ones_like(std), std)
+    return (observation - mean) / std
+
+
+class _RunningNormalization(object):
+    """
+    Shared running statistics logic of the normalization wrappers.
+    """
+
+    def _init_running(self, observation_space, running, rate):
+        self.running = running
+        self.frozen = False
+
+        if not running:
+            return
+
+        self.moments = _RunningMoments(observation_space.shape, rate=rate)
+
+        # streaming moments gathered since the last sync with other workers
+        self._local = _RunningMoments(observation_space.shape, rate=rate)
+        self._synced = _RunningMoments(observation_space.shape, rate=rate)
+
+    def _running_space(self, observation_space):
+        return gym.spaces.Box(
+            low=-np.inf,
+            high=np.inf,
+            shape=observation_space.shape,
+            dtype=observation_space.dtype,
+        )
+
+    def freeze(self):
+        """
+        Stop updating the running statistics, e.g. for evaluation.
+        """
+        self.frozen = True
+
+    def unfreeze(self):
+        """
+        Resume updating the running statistics.
+        """
+        self.frozen = False
+
+    def get_state(self):
+        """
+        Get the running statistics as a dictionary of NumPy values which
+        can be pickled or saved to checkpoint them.
+        """
+        return self.moments.get_state()
+
+    def set_state(self, state):
+        """
+        Restore the running statistics from `get_state`.
+        """
+        self.moments.set_state(state)
+        self._synced.set_state(state)
+        self._local = _RunningMoments(self.moments.mean.shape, rate=self.moments.rate)
+
+    def get_update(self):
+        """
+        Get the statistics from the last sync and the samples gathered
+        since. Used by `ObservationNormalization.sync`.
+        """
+        rate = self.moments.rate
+        if rate is not None:
+            # exponential moving moments are averaged as a whole
+            synced = _RunningMoments(self.moments.mean.shape, rate=rate)
+            local = self.moments
+        else:
+            synced = self._synced
+            local = self._local
+        return {"rate": rate, "synced": synced.get_state(), "local": local.get_state()}
+
+    def _update(self, observation, sample_weight=None):
+        if not self.running or self.frozen:
+            return
+
+        self.moments.update(observation, sample_weight)
+        if self.moments.rate is None:
+            self._local.update(observation, sample_weight)
+
+    def _normalize_running(self, observation, dtype):
+        observation = _normalize(observation, self.moments.mean, self.moments.std)
+        return observation.astype(dtype)
+
+
+class ObservationNormalization(gym.Wrapper, _RunningNormalization):
     """
     Wraps the environment to normalize observations.
+
+    By default, the observations are normalized with static statistics
+    taken from the bounds of the observation space or passed as `mean` and
+    `std`.
+
+    With `running=True`, the statistics are instead computed online from
+    the observations, which also supports unbounded spaces. They follow
+    `pynr.moments.StreamingMoments` by default, or
+    `pynr.moments.ExponentialMovingMoments` when a `rate` is given. Use
+    `freeze` to stop updating them during evaluation, and `get_state` and
+    `set_state` to checkpoint them.
+
+    When each environment of a `pynr.rl.wrappers.Batch` is wrapped, the
+    statistics of all the environments, including those in external
+    processes, are merged with `ObservationNormalization.sync(env)`. Use
+    `BatchObservationNormalization` to normalize the batch as a whole in
+    the main process instead.
+
+    Example:
+
+    ```
+    env = Batch(
+        lambda: ObservationNormalization(gym.make(name), running=True),
+        batch_size=32,
+        blocking=False)
+    ...
+    ObservationNormalization.sync(env)
+    ```
+
+    Args:
+        env: A `gym.Env`.
+        mean: Optional static mean.
+        std: Optional static standard deviation.
+        running: Boolean indicating whether the statistics are computed
+            online from the observations (default: False).
+        rate: Optional update rate of exponential moving statistics. Only
+            used when `running=True`.
     """
 
-    def __init__(self, env, mean=None, std=None):
+    def __init__(self, env, mean=None, std=None, running=False, rate=None):
         super(ObservationNormalization, self).__init__(env)
+        self._init_running(self.observation_space, running, rate)
+
+        if running:
+            self.mean = None
+            self.std = None
+            self.observation_space = self._running_space(self.observation_space)
+            return
 
         if mean is None:
             self.mean = (self.observation_space.high + self.observation_space.low) / 2
@@ -32,6 +261,10 @@ class ObservationNormalization(gym.Wrapper):
         return gym.spaces.Box(low, high, dtype=self.env.observation_space.dtype)
 
     def normalize_observation(self, observ):
+        if self.running:
+            self._update(observ[None])
+            return self._normalize_running(observ, self.observation_space.dtype)
+
         observ = (observ - self.mean) / self.std
         return observ
 
@@ -43,59 +276,271 @@ class ObservationNormalization(gym.Wrapper):
         observation = self.normalize_observation(observation)
         return observation, reward, done, info
 
+    @staticmethod
+    def sync(env):
+        """
+        Merge the running statistics of every `ObservationNormalization`
+        in a `pynr.rl.wrappers.Batch` and send the result back to each
+        environment.
+
+        Args:
+            env: A `pynr.rl.wrappers.Batch` of running
+                `ObservationNormalization` environments.
+
+        Returns:
+            The merged state, as returned by `get_state`.
+        """
+        updates = env.call("get_update")
+
+        # the statistics from the last sync are the same in every worker
+        synced = updates[0]["synced"]
+        moments = _RunningMoments(np.shape(synced["mean"]), rate=updates[0]["rate"])
+        moments.set_state(synced)
+
+        for update in updates:
+            moments.merge(update["local"])
+
+        state = moments.get_state()
+        env.call("set_state", state)
+        return state
+
+
+class BatchObservationNormalization(_RunningNormalization):
+    """
+    Normalizes the batched observations of a `pynr.rl.wrappers.Batch` with
+    running statistics, updated once per step from the whole batch in the
+    main process. Observations of environments which are already done are
+    not counted.
+
+    The statistics follow `pynr.moments.StreamingMoments` by default, or
+    `pynr.moments.ExponentialMovingMoments` when a `rate` is given. Use
+    `freeze` to stop updating them during evaluation, and `get_state` and
+    `set_state` to checkpoint them.
+
+    Example:
+
+    ```
+    env = BatchObservationNormalization(Batch(constructor, batch_size=32))
+    ```
+
+    Args:
+        env: A `pynr.rl.wrappers.Batch`.
+        rate: Optional update rate of exponential moving statistics.
+    """
+
+    def __init__(self, env, rate=None):
+        self.env = env
+        self._init_running(env.observation_space, running=True, rate=rate)
+        self.observation_space = self._running_space(env.observation_space)
+
+    def __len__(self):
+        return len(self.env)
+
+    def __getattr__(self, name):
+        return getattr(self.env, name)
+
+    def normalize_observation(self, observation, sample_weight=None):
+        self._update(observation, sample_weight)
+        return self._normalize_running(observation, self.observation_space.dtype)
+
+    def reset(self):
+        return self.normalize_observation(self.env.reset())
+
+    def step(self, actions):
+        sample_weight = ~self.env.done
+        observation, reward, done, info = self.env.step(actions)
+        observation = self.normalize_observation(observation, sample_weight)
+        return observation, reward, done, info
+
+    def recv(self, *args, **kwargs):
+        done_before = self.env.done.copy()
+        indices, observation, reward, done, info = self.env.recv(*args, **kwargs)
+        observation = self.normalize_observation(observation, ~done_before[indices])
+        return indices, observation, reward, done, info
+
+
+_coordinates_cache = {}
+
+
+def _coordinates(shape, dtype):
+    """
+    Coordinate channels for observations of shape `[height, width, ...]`.
+    Cached per shape and dtype so they are only computed once and shared
+    across wrappers. The returned array is read-only.
+    """
+    x_dim, y_dim = shape[:2]
+    dtype = np.dtype(dtype)
+    key = (x_dim, y_dim, dtype)
+
+    coords = _coordinates_cache.get(key)
+    if coords is not None:
+        return coords
+
+    xx_range = np.linspace(0.0, 1.0, num=x_dim, dtype=dtype)
+    yy_range = np.linspace(0.0, 1.0, num=y_dim, dtype=dtype)
+
+    xx_ones = np.ones(x_dim, dtype=dtype)
+    yy_ones = np.ones(y_dim, dtype=dtype)
+
+    xx_channel = np.matmul(xx_ones[..., None], xx_range[None, ...])
+    yy_channel = np.matmul(yy_range[..., None], yy_ones[None, ...])
+    rr_channel = np.sqrt(np.square(xx_channel) + np.square(yy_channel))
+    rr_channel = rr_channel / np.amax(rr_channel)
+
+    coords = np.stack([xx_channel, yy_channel, rr_channel], axis=-1)
+    coords.setflags(write=False)
+
+    _coordinates_cache[key] = coords
+    return coords
+
+
+def _coordinates_space(observation_space):
+    coord_low = np.zeros_like(observation_space.low[..., :1])
+    coord_high = np.ones_like(observation_space.high[..., :1])
+
+    coords_low = np.tile(coord_low, [1, 1, 3])
+    coords_high = np.tile(coord_high, [1, 1, 3])
+
+    low = np.concatenate([observation_space.low, coords_low], axis=-1)
+    high = np.concatenate([observation_space.high, coords_high], axis=-1)
+
+    space = gym.spaces.Box(low, high, dtype=observation_space.dtype)
+    return space
+
+
+def _append_coordinates(observation, coords, out=None):
+    """
+    Write the observation and coordinates into `out`. When `out` is not
+    given, a new array is allocated and the coordinates are written into
+    it. A preallocated `out` is expected to already hold the coordinates.
+    """
+    if out is None:
+        shape = observation.shape[:-1] + (observation.shape[-1] + coords.shape[-1],)
+        out = np.empty(shape, dtype=coords.dtype)
+        out[..., -coords.shape[-1] :] = coords
+    out[..., : -coords.shape[-1]] = observation
+    return out
+
 
 class ObservationCoordinates(gym.Wrapper):
     """
     Wraps the environment to append coordinate features.
 
     Expects the observation space to have shape [height, width, channel]`.
+
+    The coordinates are computed once per observation shape and shared
+    across wrappers. With `preallocate=True`, each observation is written
+    into a reusable buffer which already holds the coordinates. The
+    returned observation is then overwritten by the next call to `reset`
+    or `step`, so copy it if it needs to be kept around.
+
+    Args:
+        env: A `gym.Env`.
+        preallocate: Boolean indicating whether observations are written
+            into a reusable buffer (default: False).
     """
 
-    def __init__(self, env):
+    def __init__(self, env, preallocate=False):
         super(ObservationCoordinates, self).__init__(env)
         self.observation_space = self._create_observation_space()
+        self.preallocate = preallocate
+
+        self._out = None
+        if preallocate:
+            self._out = np.empty(
+                self.observation_space.shape, dtype=self.observation_space.dtype
+            )
+            self._out[..., -3:] = self.generate_coords()
 
     def _create_observation_space(self):
-        observation_space = self.env.observation_space
+        return _coordinates_space(self.env.observation_space)
 
-        coord_low = np.zeros_like(observation_space.low[..., :1])
-        coord_high = np.ones_like(observation_space.high[..., :1])
+    def generate_coords(self):
+        observation_space = self.observation_space
+        return _coordinates(observation_space.shape, observation_space.dtype)
 
-        coords_low = np.tile(coord_low, [1, 1, 3])
-        coords_high = np.tile(coord_high, [1, 1, 3])
+    def reset(self):
+        observation = self.env.reset()
+        observation = _append_coordinates(
+            observation, self.generate_coords(), out=self._out
+        )
+        return observation
 
-        low = np.concatenate([observation_space.low, coords_low], axis=-1)
-        high = np.concatenate([observation_space.high, coords_high], axis=-1)
+    def step(self, action):
+        observation, reward, done, info = self.env.step(action)
+        observation = _append_coordinates(
+            observation, self.generate_coords(), out=self._out
+        )
+        return observation, reward, done, info
 
-        space = gym.spaces.Box(low, high, dtype=observation_space.dtype)
-        return space
 
-    def generate_coords(self):
-        observation_space = self.observation_space
-        x_dim, y_dim = observation_space.shape[:2]
+class BatchObservationCoordinates(object):
+    """
+    Appends coordinate features to the batched observations of a
+    `pynr.rl.wrappers.Batch`, once for the whole batch instead of inside
+    each environment.
 
-        xx_range = np.linspace(0.0, 1.0, num=x_dim, dtype=observation_space.dtype)
-        yy_range = np.linspace(0.0, 1.0, num=y_dim, dtype=observation_space.dtype)
+    Expects the observation space of each environment to have shape
+    `[height, width, channel]`.
 
-        xx_ones = np.ones(x_dim, dtype=observation_space.dtype)
-        yy_ones = np.ones(y_dim, dtype=observation_space.dtype)
+    With `preallocate=True`, the observations of `reset` and `step` are
+    written into a reusable `[batch_size, height, width, channel + 3]`
+    buffer which already holds the coordinates. The returned observations
+    are then overwritten by the next call, so copy them if they need to be
+    kept around.
 
-        xx_channel = np.matmul(xx_ones[..., None], xx_range[None, ...])
-        yy_channel = np.matmul(yy_range[..., None], yy_ones[None, ...])
-        rr_channel = np.sqrt(np.square(xx_channel) + np.square(yy_channel))
-        rr_channel = rr_channel / np.amax(rr_channel)
+    Example:
 
-        coords = np.stack([xx_channel, yy_channel, rr_channel], axis=-1)
-        return coords
+    ```
+    env = BatchObservationCoordinates(
+        Batch(constructor, batch_size=32), preallocate=True)
+    ```
+
+    Args:
+        env: A `pynr.rl.wrappers.Batch`.
+        preallocate: Boolean indicating whether observations are written
+            into a reusable buffer (default: False).
+    """
+
+    def __init__(self, env, preallocate=False):
+        self.env = env
+        self.preallocate = preallocate
+        self.observation_space = ObservationCoordinates._create_observation_space(self)
+
+        self._out = None
+        if preallocate:
+            self._out = np.empty(
+                (len(env),) + self.observation_space.shape,
+                dtype=self.observation_space.dtype,
+            )
+            self._out[..., -3:] = self.generate_coords()
+
+    def __len__(self):
+        return len(self.env)
+
+    def __getattr__(self, name):
+        return getattr(self.env, name)
+
+    def generate_coords(self):
+        observation_space = self.observation_space
+        return _coordinates(observation_space.shape, observation_space.dtype)
 
     def reset(self):
         observation = self.env.reset()
-        coords = self.generate_coords()
-        observation = np.concatenate([observation, coords], axis=-1)
+        observation = _append_coordinates(
+            observation, self.generate_coords(), out=self._out
+        )
         return observation
 
-    def step(self, action):
-        observation, reward, done, info = self.env.step(action)
-        coords = self.generate_coords()
-        observation = np.concatenate([observation, coords], axis=-1)
+    def step(self, actions):
+        observation, reward, done, info = self.env.step(actions)
+        observation = _append_coordinates(
+            observation, self.generate_coords(), out=self._out
+        )
         return observation, reward, done, info
+
+    def recv(self, *args, **kwargs):
+        indices, observation, reward, done, info = self.env.recv(*args, **kwargs)
+        # only a subset of the batch is returned so it is never preallocated
+        observation = _append_coordinates(observation, self.generate_coords())
+        return indices, observation, reward, done, info
@@ -6,7 +6,11 @@ import gym
 import numpy as np
 import tensorflow as tf
 
+from pyoneer.rl.wrappers.batch_impl import Batch
+from pyoneer.moments import ExponentialMovingMoments, StreamingMoments
 from pyoneer.rl.wrappers.observation_impl import (
+    BatchObservationCoordinates,
+    BatchObservationNormalization,
     ObservationCoordinates,
     ObservationNormalization,
 )
@@ -32,12 +36,220 @@ class TestEnv(gym.Env):
         return state, reward, done, info
 
 
+class SeededEnv(gym.Env):
+    """
+    Environment whose observations are `[seed + steps, 2 * steps]`.
+    """
+
+    def __init__(self):
+        self.observation_space = gym.spaces.Box(
+            low=-np.inf, high=np.inf, shape=(2,), dtype=np.float32
+        )
+        self.action_space = gym.spaces.Discrete(2)
+        self.offset = 0
+        self.steps = 0
+
+    def seed(self, seed=None):
+        self.offset = seed
+        return [seed]
+
+    def _observation(self):
+        return np.array([self.offset + self.steps, 2 * self.steps], dtype=np.float32)
+
+    def reset(self):
+        self.steps = 0
+        return self._observation()
+
+    def step(self, action):
+        self.steps += 1
+        return self._observation(), 0.0, False, {}
+
+
+def running_normalization():
+    return ObservationNormalization(SeededEnv(), running=True)
+
+
 class ObservationTest(tf.test.TestCase):
     def test_observation_coords(self):
         env = TestEnv()
         env = ObservationCoordinates(env)
         self.assertTupleEqual(env.observation_space.shape, (4, 4, 4))
 
+        observation = env.reset()
+        self.assertTupleEqual(observation.shape, (4, 4, 4))
+        self.assertAllClose(observation[0, 0, -3:], [0.0, 0.0, 0.0])
+        self.assertAllClose(observation[-1, -1, -3:], [1.0, 1.0, 1.0])
+        self.assertAllClose(observation[0, -1, -3:], [1.0, 0.0, 1.0 / np.sqrt(2.0)])
+
+    def test_observation_norm_running(self):
+        env = ObservationNormalization(SeededEnv(), running=True)
+        self.assertAllEqual(env.observation_space.low, [-np.inf, -np.inf])
+
+        env.seed(1)
+        env.reset()
+        for _ in range(3):
+            observation, _, _, _ = env.step(0)
+
+        expected = np.array([[1 + t, 2 * t] for t in range(4)])
+        self.assertEqual(env.get_state()["count"], 4)
+        self.assertAllClose(env.moments.mean, expected.mean(axis=0))
+        self.assertAllClose(env.moments.variance, expected.var(axis=0, ddof=1))
+
+        self.assertEqual(observation.dtype, np.float32)
+        self.assertAllClose(
+            observation,
+            (expected[-1] - expected.mean(axis=0)) / expected.std(axis=0, ddof=1),
+        )
+
+    def test_observation_norm_running_moments(self):
+        inputs = np.random.RandomState(0).normal(size=(8, 3)).astype(np.float32)
+
+        for rate, expected_moments in [
+            (None, StreamingMoments(shape=(3,))),
+            (0.9, ExponentialMovingMoments(rate=0.9, shape=(3,))),
+        ]:
+            env = BatchObservationNormalization(
+                Batch(SeededEnv, batch_size=2), rate=rate
+            )
+            for batch in np.split(inputs, 4):
+                env.normalize_observation(batch)
+                expected_moments.update_state(
+                    batch, sample_weight=np.ones((2, 1), dtype=np.float32)
+                )
+
+            self.assertAllClose(env.moments.mean, expected_moments.mean)
+            self.assertAllClose(env.moments.variance, expected_moments.variance)
+
+    def test_observation_norm_freeze(self):
+        env = ObservationNormalization(SeededEnv(), running=True)
+        env.seed(1)
+        env.reset()
+        env.step(0)
+
+        env.freeze()
+        state = env.get_state()
+        env.step(0)
+        self.assertAllEqual(env.get_state()["mean"], state["mean"])
+        self.assertEqual(env.get_state()["count"], 2)
+
+        env.unfreeze()
+        env.step(0)
+        self.assertEqual(env.get_state()["count"], 3)
+
+        other_env = ObservationNormalization(SeededEnv(), running=True)
+        other_env.set_state(env.get_state())
+        self.assertAllEqual(other_env.moments.mean, env.moments.mean)
+        self.assertAllEqual(other_env.moments.variance, env.moments.variance)
+
+    def test_observation_norm_sync(self):
+        batch_size = 4
+
+        env = Batch(
+            running_normalization,
+            batch_size=batch_size,
+            blocking=False,
+            envs_per_worker=2,
+        )
+        env.seed(0)
+        env.reset()
+
+        actions = np.zeros(batch_size, dtype=np.int64)
+        for _ in range(2):
+            env.step(actions)
+
+        expected = np.array(
+            [[seed + t, 2 * t] for seed in range(batch_size) for t in range(3)]
+        )
+
+        state = ObservationNormalization.sync(env)
+        self.assertEqual(state["count"], expected.shape[0])
+        self.assertAllClose(state["mean"], expected.mean(axis=0))
+
+        # syncing again does not count the same observations twice
+        state = ObservationNormalization.sync(env)
+        self.assertEqual(state["count"], expected.shape[0])
+
+        env.step(actions)
+        expected = np.array(
+            [[seed + t, 2 * t] for seed in range(batch_size) for t in range(4)]
+        )
+
+        ObservationNormalization.sync(env)
+        for worker_state in env.call("get_state"):
+            self.assertEqual(worker_state["count"], expected.shape[0])
+            self.assertAllClose(worker_state["mean"], expected.mean(axis=0))
+            self.assertAllClose(
+                worker_state["m2"] / (expected.shape[0] - 1),
+                expected.var(axis=0, ddof=1),
+            )
+
+        env.close()
+
+    def test_batch_observation_norm(self):
+        batch_size = 3
+
+        env = BatchObservationNormalization(Batch(SeededEnv, batch_size=batch_size))
+        env.seed(0)
+        env.reset()
+        env.step(np.zeros(batch_size, dtype=np.int64))
+
+        expected = np.array(
+            [[seed + t, 2 * t] for seed in range(batch_size) for t in range(2)]
+        )
+        self.assertEqual(env.moments.count, expected.shape[0])
+        self.assertAllClose(env.moments.mean, expected.mean(axis=0))
+
+        # done environments are not counted
+        env.env.done[0] = True
+        env.step(np.zeros(batch_size, dtype=np.int64))
+        self.assertEqual(env.moments.count, expected.shape[0] + batch_size - 1)
+
+    def test_observation_coords_cached(self):
+        env = ObservationCoordinates(TestEnv())
+        other_env = ObservationCoordinates(TestEnv())
+        self.assertIs(env.generate_coords(), other_env.generate_coords())
+
+        coords = env.generate_coords()
+        self.assertFalse(coords.flags.writeable)
+
+        _, observation = env.reset(), env.step(0.0)[0]
+        self.assertAllEqual(observation[..., -3:], coords)
+
+    def test_observation_coords_preallocate(self):
+        env = ObservationCoordinates(TestEnv(), preallocate=True)
+
+        observation = env.reset()
+        next_observation, _, _, _ = env.step(0.0)
+        self.assertIs(observation, next_observation)
+        self.assertAllEqual(observation[..., -3:], env.generate_coords())
+
+        expected_env = ObservationCoordinates(TestEnv())
+        expected_env.env.observation_space.seed(0)
+        env.env.observation_space.seed(0)
+        self.assertAllEqual(env.reset(), expected_env.reset())
+
+    def test_batch_observation_coords(self):
+        batch_size = 3
+
+        for preallocate in [False, True]:
+            env = BatchObservationCoordinates(
+                Batch(TestEnv, batch_size=batch_size), preallocate=preallocate
+            )
+            self.assertEqual(len(env), batch_size)
+            self.assertTupleEqual(env.observation_space.shape, (4, 4, 4))
+
+            observation = env.reset()
+            self.assertTupleEqual(observation.shape, (batch_size, 4, 4, 4))
+
+            next_observation, reward, done, _ = env.step(np.zeros(batch_size))
+            self.assertTupleEqual(next_observation.shape, (batch_size, 4, 4, 4))
+            self.assertTupleEqual(reward.shape, (batch_size,))
+            self.assertAllEqual(
+                next_observation[..., -3:],
+                np.tile(env.generate_coords()[None], [batch_size, 1, 1, 1]),
+            )
+            self.assertAllEqual(env.done, done)
+
     def test_observation_norm(self):
         env = TestEnv()
         env = ObservationNormalization(env)
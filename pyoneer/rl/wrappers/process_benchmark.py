@@ -0,0 +1,111 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import sys
+import time
+import traceback
+
+import gym
+import numpy as np
+import tensorflow as tf
+
+from pyoneer.rl.wrappers.process_impl import Process
+
+
+class PollingProcess(Process):
+    """
+    `Process` using the previous worker loop which polls the connection
+    every 0.1 seconds. Used as the baseline for the round trip latency.
+    """
+
+    @staticmethod
+    def _worker(constructor, conn, buffers, index, parent_conn=None):
+        try:
+            env = constructor()
+
+            while True:
+                try:
+                    if not conn.poll(0.1):
+                        continue
+                    message, payload = conn.recv()
+                except (EOFError, KeyboardInterrupt):
+                    break
+
+                if message == Process._ACCESS:
+                    conn.send((Process._RESULT, getattr(env, payload)))
+                    continue
+
+                if message == Process._CALL:
+                    name, args, kwargs = payload
+                    conn.send((Process._RESULT, getattr(env, name)(*args, **kwargs)))
+                    continue
+
+                if message == Process._CLOSE:
+                    break
+
+                raise KeyError("Received message of unknown type {}".format(message))
+
+        except Exception:
+            stacktrace = "".join(traceback.format_exception(*sys.exc_info()))
+            conn.send((Process._EXCEPTION, stacktrace))
+        finally:
+            conn.close()
+
+
+class ProcessBenchmark(tf.test.Benchmark):
+    def _benchmark_step(self, process_class, name, iters=2000):
+        env = process_class(lambda: gym.make("Pendulum-v0"))
+        env.seed(0)()
+        env.reset()()
+
+        action = np.zeros(env.action_space.shape, dtype=env.action_space.dtype)
+
+        # warm up
+        for _ in range(100):
+            env.step(action)()
+
+        start_time = time.time()
+        for _ in range(iters):
+            env.step(action)()
+        wall_time = (time.time() - start_time) / iters
+
+        env.close()
+
+        self.report_benchmark(iters=iters, wall_time=wall_time, name=name)
+        return wall_time
+
+    def benchmark_step_round_trip(self):
+        self._benchmark_step(Process, "step_round_trip")
+
+    def benchmark_step_round_trip_polling(self):
+        self._benchmark_step(PollingProcess, "step_round_trip_polling")
+
+    def benchmark_call_batch(self, iters=2000):
+        env = Process(lambda: gym.make("Pendulum-v0"))
+
+        calls = [("seed", (0,), {}), ("reset", (), {})]
+
+        start_time = time.time()
+        for _ in range(iters):
+            env.call_batch(calls)()
+        wall_time = (time.time() - start_time) / iters
+
+        start_time = time.time()
+        for _ in range(iters):
+            env.seed(0)()
+            env.reset()()
+        unbatched_wall_time = (time.time() - start_time) / iters
+
+        env.close()
+
+        self.report_benchmark(
+            iters=iters,
+            wall_time=wall_time,
+            extras={"unbatched_wall_time": unbatched_wall_time},
+            name="call_batch_seed_reset",
+        )
+
+
+if __name__ == "__main__":
+    tf.test.main()
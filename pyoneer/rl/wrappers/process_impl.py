@@ -4,22 +4,129 @@ from __future__ import print_function
 
 import sys
 import atexit
+import ctypes
+import signal
+import functools
 import traceback
 import multiprocessing
 
+import numpy as np
+
+
+class ProcessError(Exception):
+    """
+    Raised when the environment of a `Process` raises an exception, the
+    external process dies, or a step times out.
+    """
+
+
+class SharedArray(object):
+    """
+    NumPy array backed by shared memory. Allocated before starting
+    `Process` workers so that the workers inherit the same block and can
+    write into it in place.
+
+    Args:
+        shape: Shape of the array.
+        dtype: NumPy dtype of the array.
+    """
+
+    def __init__(self, shape, dtype):
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        nbytes = int(np.prod(self.shape)) * self.dtype.itemsize
+        self._buffer = multiprocessing.RawArray(ctypes.c_byte, max(nbytes, 1))
+        self._array = None
+
+    def __getstate__(self):
+        return self.shape, self.dtype, self._buffer
+
+    def __setstate__(self, state):
+        self.shape, self.dtype, self._buffer = state
+        self._array = None
+
+    @property
+    def array(self):
+        if self._array is None:
+            size = int(np.prod(self.shape))
+            self._array = np.frombuffer(
+                self._buffer, dtype=self.dtype, count=size
+            ).reshape(self.shape)
+        return self._array
+
+
+# modules imported once by the forkserver, callers add their environment
+# modules when they do not import tensorflow
+_DEFAULT_PRELOAD = ("gym", "pyoneer.rl.wrappers")
+
+
+def _get_context(start_method, preload):
+    context = multiprocessing.get_context(start_method)
+    if context.get_start_method() == "forkserver":
+        # only applies until the forkserver is started by the first worker
+        context.set_forkserver_preload(list(preload))
+    return context
+
 
 class Process(object):
     """
     Wraps a `gym.Env` to host the environment in an external process.
 
+    When `buffers` are provided, `step` and `reset` write the transition
+    into the slot `index` of the shared buffers instead of sending it back
+    through the pipe. Only the `info` dictionary is pickled.
+
+    Several calls can be sent in one round trip with `call_batch`.
+
+    Failures in the external process raise a `ProcessError`. A hung
+    environment is detected with `timeout`, and `restart` replaces the
+    external process with a new one built from the constructor.
+
+    The `start_method` selects the `multiprocessing` start method. Forking
+    a parent which already initialized TensorFlow is unsafe, so use
+    "forkserver" or "spawn" in that case. With "forkserver" the `preload`
+    modules are imported once by the server and each worker forks from
+    that warm template. By default only gym and the wrappers are preloaded;
+    add the module defining the environments to `preload` when it does
+    not import TensorFlow, so the template stays TensorFlow-free. Only the
+    preload of the first started forkserver applies. With "spawn" and
+    "forkserver" the constructor and buffers are pickled, so the
+    constructor must be importable, e.g. a module-level function or a
+    `functools.partial`. Their workers also import the main module of the
+    parent, so import TensorFlow under `if __name__ == "__main__":` to
+    keep it out of the workers.
+
     Example:
 
     ```
     env = Process(lambda: gym.make('Pendulum-v0'))
     ```
 
+    Forkserver example:
+
+    ```
+    env = Process(
+        functools.partial(gym.make, 'Pendulum-v0'), start_method="forkserver")
+    ```
+
+    Batched calls example:
+
+    ```
+    promise = env.call_batch([("seed", (0,), {}), ("reset", (), {})])
+    _, state = promise()
+    ```
+
     Args:
         constructor: Constructor which returns a `gym.Env`.
+        buffers: Optional tuple of `SharedArray` for the observations,
+            rewards and dones, each with a leading batch dimension.
+        index: Index of the slot in `buffers` owned by this environment.
+        timeout: Optional number of seconds to wait for a step before
+            raising a `ProcessError`.
+        start_method: Optional `multiprocessing` start method, one of
+            "fork", "spawn" or "forkserver" (default: the platform default).
+        preload: Optional list of modules imported by the forkserver
+            (default: gym and the wrappers).
     """
 
     _ACCESS = 1
@@ -27,19 +134,55 @@ class Process(object):
     _RESULT = 3
     _EXCEPTION = 4
     _CLOSE = 5
+    _STEP = 6
+    _RESET = 7
+    _BATCH = 8
 
-    def __init__(self, constructor):
-        self._conn, conn = multiprocessing.Pipe()
-        self._process = multiprocessing.Process(
-            target=self._worker, args=(constructor, conn)
-        )
+    def __init__(
+        self,
+        constructor,
+        buffers=None,
+        index=None,
+        timeout=None,
+        start_method=None,
+        preload=None,
+    ):
+        if buffers is not None and index is None:
+            raise ValueError("An `index` is required when using shared `buffers`.")
+
+        self._constructor = constructor
+        self._buffers = buffers
+        self._index = index
+        self._timeout = timeout
+
+        if preload is None:
+            preload = _DEFAULT_PRELOAD
+        self._context = _get_context(start_method, preload)
 
         atexit.register(self.close)
 
-        self._process.start()
+        self._start()
         self._observation_space = None
         self._action_space = None
 
+    def _start(self):
+        self._conn, conn = self._context.Pipe()
+
+        # only forked workers inherit the parent end and need to close it
+        if self._context.get_start_method() == "fork":
+            parent_conn = self._conn
+        else:
+            parent_conn = None
+
+        self._process = self._context.Process(
+            target=self._worker,
+            args=(self._constructor, conn, self._buffers, self._index, parent_conn),
+        )
+        self._process.start()
+
+        # close the child end in the parent so a dead worker is seen as EOF
+        conn.close()
+
     @property
     def observation_space(self):
         if self._observation_space is None:
@@ -53,14 +196,50 @@ class Process(object):
         return self._action_space
 
     def __getattr__(self, name):
-        self._conn.send((self._ACCESS, name))
+        self._send(self._ACCESS, name)
         return self._receive()
 
     def call(self, name, *args, **kwargs):
         payload = name, args, kwargs
-        self._conn.send((self._CALL, payload))
+        self._send(self._CALL, payload)
+        return self._receive
+
+    def call_batch(self, calls):
+        """
+        Send several calls to the environment in a single message.
+
+        Args:
+            calls: Sequence of `(name, args, kwargs)` tuples which are
+                called in order.
+
+        Returns:
+            Promise which returns a list with the result of each call.
+        """
+        payload = [(name, tuple(args), dict(kwargs)) for name, args, kwargs in calls]
+        self._send(self._BATCH, payload)
         return self._receive
 
+    def fileno(self):
+        """
+        File descriptor of the connection to the external process. Allows
+        waiting on several processes with `multiprocessing.connection.wait`.
+        """
+        return self._conn.fileno()
+
+    def is_alive(self):
+        return self._process.is_alive()
+
+    def restart(self):
+        """
+        Terminate the external process and start a new one from the
+        constructor. The new environment is not reset or seeded.
+        """
+        self._conn.close()
+        if self._process.is_alive():
+            self._process.terminate()
+        self._process.join()
+        self._start()
+
     def close(self):
         try:
             self._conn.send((self._CLOSE, None))
@@ -75,50 +254,126 @@ class Process(object):
         return self.call("seed", seed)
 
     def step(self, action):
-        return self.call("step", action)
+        if self._buffers is None:
+            self._send(self._CALL, ("step", (action,), {}))
+            return functools.partial(self._receive, self._timeout)
+
+        self._send(self._STEP, action)
+
+        def promise():
+            info = self._receive(self._timeout)
+            observations, rewards, dones = self._buffers
+            return (
+                observations.array[self._index],
+                rewards.array[self._index],
+                dones.array[self._index],
+                info,
+            )
+
+        return promise
 
     def reset(self):
-        return self.call("reset")
+        if self._buffers is None:
+            return self.call("reset")
+
+        self._send(self._RESET, None)
 
-    def _receive(self):
-        message, payload = self._conn.recv()
+        def promise():
+            self._receive()
+            observations, _, _ = self._buffers
+            return observations.array[self._index]
+
+        return promise
+
+    def _send(self, message, payload):
+        try:
+            self._conn.send((message, payload))
+        except IOError:
+            raise ProcessError(
+                "Process exited with code {}.".format(self._process.exitcode)
+            )
+
+    def _receive(self, timeout=None):
+        if timeout is not None and not self._conn.poll(timeout):
+            raise ProcessError("Process timed out after {} seconds.".format(timeout))
+
+        try:
+            message, payload = self._conn.recv()
+        except (EOFError, IOError):
+            self._process.join()
+            raise ProcessError(
+                "Process exited with code {}.".format(self._process.exitcode)
+            )
 
         # re-raise exceptions in the main process
         if message == self._EXCEPTION:
             stacktrace = payload
-            raise Exception(stacktrace)
+            raise ProcessError(stacktrace)
 
         if message == self._RESULT:
             return payload
 
         raise KeyError("Received message of unexpected type {}".format(message))
 
-    def _worker(self, constructor, conn):
+    @staticmethod
+    def _worker(constructor, conn, buffers, index, parent_conn=None):
+        # keyboard interrupts are handled by the parent which closes the
+        # workers, so the worker can block on the connection until a message
+        # arrives or the parent end is closed
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+        # close the inherited parent end so the connection reports EOF
+        # when the parent goes away
+        if parent_conn is not None:
+            parent_conn.close()
+
         try:
             env = constructor()
 
+            if buffers is not None:
+                observations, rewards, dones = [buffer.array for buffer in buffers]
+
             while True:
                 try:
-                    # only block for short times to support keyboard exceptions
-                    if not conn.poll(0.1):
-                        continue
                     message, payload = conn.recv()
-                except (EOFError, KeyboardInterrupt):
+                except EOFError:
                     break
 
-                if message == self._ACCESS:
+                if message == Process._ACCESS:
                     name = payload
                     result = getattr(env, name)
-                    conn.send((self._RESULT, result))
+                    conn.send((Process._RESULT, result))
                     continue
 
-                if message == self._CALL:
+                if message == Process._CALL:
                     name, args, kwargs = payload
                     result = getattr(env, name)(*args, **kwargs)
-                    conn.send((self._RESULT, result))
+                    conn.send((Process._RESULT, result))
+                    continue
+
+                if message == Process._BATCH:
+                    results = [
+                        getattr(env, name)(*args, **kwargs)
+                        for name, args, kwargs in payload
+                    ]
+                    conn.send((Process._RESULT, results))
+                    continue
+
+                if message == Process._STEP:
+                    next_state, reward, done, info = env.step(payload)
+                    observations[index] = next_state
+                    rewards[index] = reward
+                    dones[index] = done
+                    conn.send((Process._RESULT, info))
+                    continue
+
+                if message == Process._RESET:
+                    assert payload is None
+                    observations[index] = env.reset()
+                    conn.send((Process._RESULT, None))
                     continue
 
-                if message == self._CLOSE:
+                if message == Process._CLOSE:
                     assert payload is None
                     break
 
@@ -126,6 +381,6 @@ class Process(object):
 
         except Exception:
             stacktrace = "".join(traceback.format_exception(*sys.exc_info()))
-            conn.send((self._EXCEPTION, stacktrace))
+            conn.send((Process._EXCEPTION, stacktrace))
         finally:
             conn.close()
@@ -2,10 +2,42 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import os
+import time
+import functools
+
 import gym
+import numpy as np
 import tensorflow as tf
 
-from pyoneer.rl.wrappers.process_impl import Process
+from pyoneer.rl.wrappers.process_impl import Process, ProcessError, SharedArray
+
+
+class FailingEnv(gym.Env):
+    def __init__(self, failure=None):
+        self.failure = failure
+        self.observation_space = gym.spaces.Box(
+            low=0.0, high=1.0, shape=(3,), dtype=np.float32
+        )
+        self.action_space = gym.spaces.Box(
+            low=0.0, high=1.0, shape=(1,), dtype=np.float32
+        )
+
+    def reset(self):
+        return self.observation_space.sample()
+
+    def step(self, action):
+        if self.failure == "raise":
+            raise RuntimeError("step failed")
+        if self.failure == "exit":
+            os._exit(1)
+        if self.failure == "hang":
+            time.sleep(60)
+        state = self.observation_space.sample()
+        reward = 0.0
+        done = False
+        info = {}
+        return state, reward, done, info
 
 
 class ProcessTest(tf.test.TestCase):
@@ -26,6 +58,99 @@ class ProcessTest(tf.test.TestCase):
         self.assertTupleEqual(action.shape, (1,))
         self.assertTupleEqual(next_state.shape, (3,))
 
+    def test_process_call_batch(self):
+        env = Process(lambda: gym.make("Pendulum-v0"))
+
+        promise = env.call_batch([("seed", (0,), {}), ("reset", (), {})])
+        _, state = promise()
+
+        action = env.action_space.sample()
+        promise = env.call_batch([("step", (action,), {}), ("step", (action,), {})])
+        transitions = promise()
+
+        self.assertTupleEqual(state.shape, (3,))
+        self.assertEqual(len(transitions), 2)
+        for next_state, reward, done, info in transitions:
+            self.assertTupleEqual(next_state.shape, (3,))
+
+        env.close()
+
+    def test_process_failures(self):
+        for failure in ["raise", "exit", "hang"]:
+            env = Process(lambda: FailingEnv(failure), timeout=0.5)
+            env.reset()()
+
+            action = env.action_space.sample()
+            with self.assertRaises(ProcessError):
+                env.step(action)()
+
+            env.restart()
+            self.assertTrue(env.is_alive())
+
+            state = env.reset()()
+            self.assertTupleEqual(state.shape, (3,))
+
+            env.close()
+
+    def test_process_shared_memory(self):
+        buffers = (
+            SharedArray(shape=(2, 3), dtype=np.float32),
+            SharedArray(shape=(2,), dtype=np.float64),
+            SharedArray(shape=(2,), dtype=np.bool_),
+        )
+        env = Process(lambda: gym.make("Pendulum-v0"), buffers=buffers, index=1)
+
+        promise = env.seed(0)
+        promise()
+
+        promise = env.reset()
+        state = promise()
+
+        action = env.action_space.sample()
+        promise = env.step(action)
+        next_state, reward, done, info = promise()
+
+        observations, rewards, dones = [buffer.array for buffer in buffers]
+
+        self.assertTupleEqual(state.shape, (3,))
+        self.assertTupleEqual(next_state.shape, (3,))
+        self.assertAllEqual(observations[1], next_state)
+        self.assertAllEqual(observations[0], np.zeros(3))
+        self.assertEqual(rewards[1], reward)
+        self.assertEqual(dones[1], done)
+
+        env.close()
+
+    def test_process_start_methods(self):
+        # spawned workers unpickle the constructor so it must be importable
+        constructor = functools.partial(gym.make, "CartPole-v0")
+
+        for start_method in ["spawn", "forkserver"]:
+            buffers = (
+                SharedArray(shape=(2, 4), dtype=np.float64),
+                SharedArray(shape=(2,), dtype=np.float64),
+                SharedArray(shape=(2,), dtype=np.bool_),
+            )
+            env = Process(
+                constructor, buffers=buffers, index=1, start_method=start_method
+            )
+
+            env.seed(0)()
+            state = env.reset()()
+            next_state, reward, done, info = env.step(0)()
+
+            observations, _, _ = [buffer.array for buffer in buffers]
+
+            self.assertTupleEqual(state.shape, (4,))
+            self.assertAllEqual(observations[1], next_state)
+            self.assertEqual(reward, 1.0)
+
+            env.restart()
+            self.assertTupleEqual(env.reset()().shape, (4,))
+
+            env.close()
+            self.assertFalse(env.is_alive())
+
 
 if __name__ == "__main__":
     tf.test.main()
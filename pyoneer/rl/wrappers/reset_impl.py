@@ -0,0 +1,27 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import gym
+
+
+class AutoReset(gym.Wrapper):
+    """
+    Wraps the environment to reset automatically at the end of an episode.
+
+    The transition which ends an episode still returns `done=True` but its
+    observation is the first observation of the next episode. The final
+    observation of the finished episode is stored in
+    `info["final_observation"]`.
+    """
+
+    def step(self, action):
+        observation, reward, done, info = self.env.step(action)
+        if done:
+            info = dict(info)
+            info["final_observation"] = observation
+            observation = self.env.reset()
+        return observation, reward, done, info
+
+    def reset(self, **kwargs):
+        return self.env.reset(**kwargs)
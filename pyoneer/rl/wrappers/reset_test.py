@@ -0,0 +1,60 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import gym
+import numpy as np
+import tensorflow as tf
+
+from pyoneer.rl.wrappers.reset_impl import AutoReset
+
+
+class CountingEnv(gym.Env):
+    def __init__(self, episode_length=3):
+        self.episode_length = episode_length
+        self.observation_space = gym.spaces.Box(
+            low=0.0, high=np.inf, shape=(1,), dtype=np.float32
+        )
+        self.action_space = gym.spaces.Discrete(2)
+        self.episodes = 0
+        self.steps = 0
+
+    def reset(self):
+        self.episodes += 1
+        self.steps = 0
+        return np.array([self.steps], dtype=np.float32)
+
+    def step(self, action):
+        self.steps += 1
+        state = np.array([self.steps], dtype=np.float32)
+        reward = 1.0
+        done = self.steps >= self.episode_length
+        info = {}
+        return state, reward, done, info
+
+
+class AutoResetTest(tf.test.TestCase):
+    def test_auto_reset(self):
+        env = AutoReset(CountingEnv(episode_length=3))
+
+        state = env.reset()
+        self.assertAllEqual(state, [0.0])
+
+        dones = []
+        for step in range(7):
+            next_state, reward, done, info = env.step(0)
+            dones.append(done)
+
+            if done:
+                self.assertAllEqual(info["final_observation"], [3.0])
+                self.assertAllEqual(next_state, [0.0])
+            else:
+                self.assertNotIn("final_observation", info)
+                self.assertAllEqual(next_state, [(step % 3) + 1])
+
+        self.assertAllEqual(dones, [False, False, True, False, False, True, False])
+        self.assertEqual(env.unwrapped.episodes, 3)
+
+
+if __name__ == "__main__":
+    tf.test.main()